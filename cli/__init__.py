@@ -1,12 +1,19 @@
 import argparse
+import os
+import sys
+from fs import FORMATS, STORAGES, read_rows, write_rows
 from record import Record
 
 class Cli:
+    # Records are written to standard output in blocks of about this many characters instead of one print each.
+    OUTPUT_BUFFER_SIZE = 1024 * 1024
+
     def __init__(self):
-        self.__record = Record()
+        self.__record = None
 
     def run(self):
         parser = argparse.ArgumentParser(description='Financial Wallet CLI')
+        parser.add_argument('--storage', type=str, choices=list(STORAGES), default=os.environ.get('WALLET_STORAGE', 'json'), help='Ledger storage format (default: $WALLET_STORAGE or json)')
         subparsers = parser.add_subparsers(dest='command')
 
         add_parser = subparsers.add_parser('add', help='Add a new record')
@@ -15,6 +22,17 @@ class Cli:
         add_parser.add_argument('date', type=str, help='Transaction date')
         add_parser.add_argument('description', type=str, help='Transaction description')
 
+        import_parser = subparsers.add_parser('import', help='Add records from a CSV or JSON Lines file')
+        import_parser.add_argument('file', type=str, help='File to import, - for standard input')
+        import_parser.add_argument('--format', type=str, choices=FORMATS, help='File format (default: jsonl for .jsonl files, csv otherwise)')
+
+        export_parser = subparsers.add_parser('export', help='Write records to a CSV or JSON Lines file')
+        export_parser.add_argument('--format', type=str, choices=FORMATS, default='csv', help='File format (default: csv)')
+        export_parser.add_argument('--output', type=str, help='File to write, standard output if not given')
+        export_parser.add_argument('--from', dest='start', type=str, help='First date of the period')
+        export_parser.add_argument('--to', dest='end', type=str, help='Last date of the period')
+        export_parser.add_argument('--category', type=str, help='Only records of this category')
+
         update_parser = subparsers.add_parser('update', help='Update an existing record')
         update_parser.add_argument('index', type=int, help='Record index')
         update_parser.add_argument('--amount', type=float, help='Updated amount')
@@ -23,26 +41,75 @@ class Cli:
         update_parser.add_argument('--description', type=str, help='Updated description')
 
         balance_parser = subparsers.add_parser('get_balance', help='Get balance, income, and expenses')
+        balance_parser.add_argument('--from', dest='start', type=str, help='First date of the period')
+        balance_parser.add_argument('--to', dest='end', type=str, help='Last date of the period')
+        balance_parser.add_argument('--monthly', action='store_true', help='Show the balance of every month')
 
         get_parser = subparsers.add_parser('get', help='Get all records')
+        self.add_paging_arguments(get_parser)
 
         get_by_key_parser = subparsers.add_parser('get_by_key', help='Get records by key')
         get_by_key_parser.add_argument('by', type=str, choices=['amount', 'category', 'date'], help='Search key')
         get_by_key_parser.add_argument('value', help='Search value')
+        self.add_paging_arguments(get_by_key_parser)
+
+        get_range_parser = subparsers.add_parser('get_range', help='Get records within a period, in date order')
+        get_range_parser.add_argument('--from', dest='start', type=str, help='First date of the period')
+        get_range_parser.add_argument('--to', dest='end', type=str, help='Last date of the period')
+
+        get_by_amount_parser = subparsers.add_parser('get_by_amount', help='Get records within a range of amounts, in ascending order of amount')
+        get_by_amount_parser.add_argument('--min', dest='minimum', type=float, help='Smallest amount')
+        get_by_amount_parser.add_argument('--max', dest='maximum', type=float, help='Largest amount')
+        get_by_amount_parser.add_argument('--category', type=str, help='Only records of this category')
+        get_by_amount_parser.add_argument('--strict', action='store_true', help='Leave out amounts equal to the bounds')
+
+        search_parser = subparsers.add_parser('search', help='Get records whose descriptions contain all the words')
+        search_parser.add_argument('terms', type=str, nargs='+', help='Words to search for, a word ending with * matches any word that starts with it')
+
+        compact_parser = subparsers.add_parser('compact', help='Compact the ledger storage')
+
+        verify_parser = subparsers.add_parser('verify', help='Check the saved balance totals and indexes, rebuild them if needed, and report invalid records')
 
         args = parser.parse_args()
         command = args.command
+        self.__record = Record(STORAGES[args.storage]())
 
         if command == 'add':
             self.add(args.amount, args.category, args.date, args.description)
+        elif command == 'import':
+            self.import_file(args.file, args.format)
+        elif command == 'export':
+            self.export(args.format, args.output, args.start, args.end, args.category)
         elif command == 'update':
             self.update(args.index, args.amount, args.category, args.date, args.description)
         elif command == 'get_balance':
-            self.get_balance()
+            self.get_balance(args.start, args.end, args.monthly)
         elif command == 'get':
-            self.get_all()
+            if args.limit is None and args.offset is None and args.cursor is None:
+                self.get_all()
+            else:
+                self.print_page(self.__record.get_page(args.limit, args.offset or 0, args.cursor))
         elif command == 'get_by_key':
-            self.get_by_key(args.by, self.convert_value(args.by, args.value))
+            value = self.convert_value(args.by, args.value)
+            if args.limit is None and args.offset is None and args.cursor is None:
+                self.get_by_key(args.by, value)
+            else:
+                self.print_page(self.__record.get_by_key_page(args.by, value, args.limit, args.offset or 0, args.cursor))
+        elif command == 'get_range':
+            self.get_range(args.start, args.end)
+        elif command == 'get_by_amount':
+            self.get_by_amount(args.minimum, args.maximum, args.category, args.strict)
+        elif command == 'search':
+            self.search(' '.join(args.terms))
+        elif command == 'compact':
+            self.compact()
+        elif command == 'verify':
+            self.verify()
+
+    def add_paging_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Largest number of records to show')
+        parser.add_argument('--offset', type=int, help='Number of records to skip')
+        parser.add_argument('--cursor', type=str, help='Continue after the page that printed this cursor')
 
     def convert_value(self, key, value):
         if key == 'amount':
@@ -56,30 +123,118 @@ class Cli:
         result = self.__record.add(amount, category, date, description)
         print(result)
 
+    def import_file(self, path, format=None):
+        if format is None:
+            format = 'jsonl' if path.endswith('.jsonl') else 'csv'
+
+        if path == '-':
+            added, errors = self.__record.add_many(read_rows(sys.stdin, format))
+        else:
+            # utf-8-sig also reads files that start with a byte order mark, as spreadsheet exports often do.
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                added, errors = self.__record.add_many(read_rows(f, format))
+
+        for error in errors:
+            print(error)
+        print(f"{added} records were successfully imported.")
+        if errors:
+            print(f"{len(errors)} rows were rejected.")
+
+    def export(self, format='csv', path=None, start=None, end=None, category=None):
+        records = self.__record.export(start, end, category)
+        if isinstance(records, str):
+            print(records)
+            return
+
+        if path is None:
+            write_rows(sys.stdout, records, format)
+            return
+
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            count = write_rows(f, records, format)
+        print(f"{count} records were successfully exported.")
+
     def update(self, index, amount=None, category=None, date=None, description=None):
         result = self.__record.update(index, amount, category, date, description)
         print(result)
 
-    def get_balance(self):
-        balance = self.__record.get_balance()
-        for line in balance:
-            print(line)
+    def compact(self):
+        result = self.__record.compact()
+        print(result)
 
-    def get_all(self):
-        records = self.__record.get()
-        if records:
-            for record in records:
-                print(f"{record}\n")
+    def verify(self):
+        result = self.__record.verify()
+        print(result)
+
+    def get_balance(self, start=None, end=None, monthly=False):
+        if not monthly:
+            balance = self.__record.get_balance(start, end)
+            for line in balance:
+                print(line)
+            return
+
+        months = self.__record.get_monthly_balance(start, end)
+        if isinstance(months, str):
+            print(months)
+        elif months:
+            for month in months:
+                print(f"{month}\n")
         else:
             print("No records found.")
 
+    def get_all(self):
+        self.print_records(self.__record.iter_records())
+
+    def get_range(self, start=None, end=None):
+        self.print_records(self.__record.get_range(start, end))
+
+    def get_by_amount(self, minimum=None, maximum=None, category=None, strict=False):
+        self.print_records(self.__record.get_by_amount(minimum, maximum, category, strict))
+
+    def search(self, query):
+        self.print_records(self.__record.search(query))
+
+    def print_page(self, page):
+        if isinstance(page, str):
+            print(page)
+            return
+
+        records, cursor = page
+        self.print_records(records)
+        if cursor is not None:
+            print(f"Next page: --cursor {cursor}")
+
+    def print_records(self, records):
+        if isinstance(records, str):
+            print(records)
+            return
+
+        if not self.write_records(records):
+            print("No records found.")
+
+    def write_records(self, records):
+        buffer = []
+        size = 0
+        count = 0
+
+        for record in records:
+            text = f"{record}\n\n"
+            buffer.append(text)
+            size += len(text)
+            count += 1
+
+            if size >= self.OUTPUT_BUFFER_SIZE:
+                sys.stdout.write("".join(buffer))
+                buffer.clear()
+                size = 0
+
+        sys.stdout.write("".join(buffer))
+        sys.stdout.flush()
+        return count
+
     def get_by_key(self, by: str, value: float | str):
-        records = self.__record.get_by_key(by, value)
+        records = self.__record.iter_by_key(by, value)
         if isinstance(records, str):
             print(records)
-        else:
-            if records:
-                for record in records:
-                    print(f"{record}\n")
-            else:
-                print(f"No records found for {by}: {value}")
+        elif not self.write_records(records):
+            print(f"No records found for {by}: {value}")
@@ -3,6 +3,9 @@ from typing import Any
 from validator.record import ValidatorRecord
 
 class BaseEntity(ABC):
+    # Lets subclasses that define their own slots do without a `__dict__`.
+    __slots__ = ()
+
     def __init__(self) -> None:
         self._validator_record = ValidatorRecord()
 
@@ -0,0 +1,115 @@
+from typing import Any, Optional
+from entities.base import BaseEntity
+from entities.schema import compile_schema
+from entities.types import EntityTypeFloat, EntityTypeString
+from validator.record import ValidatorRecord
+
+class CompactRecord(BaseEntity):
+    """
+    Record with the fields and validation rules of `EntityRecord` that stores only the four raw values.
+
+    `EntityRecord` creates a validator and a wrapper object per field for every record. Here the validators are
+    created once and shared by all instances, and the values are kept in slots, so a record is a single small
+    object without a `__dict__`.
+    """
+
+    __slots__ = ("_amount", "_category", "_date", "_description")
+
+    # The validators of the fields, shared by all records. They are only used to check values, never to hold them.
+    _validator_record = ValidatorRecord()
+    _amount_type = EntityTypeFloat(min_val=0.0)
+    _date_type = EntityTypeString(validate_function=_validator_record.is_date)
+    _category_type = EntityTypeString(validate_function=_validator_record.is_category)
+    _description_type = EntityTypeString(min_length=0, max_length=ValidatorRecord.MAX_DESCRIPTION_LENGTH)
+    # Validates a record in the storage format at once, without building a record.
+    validate_json = staticmethod(compile_schema({
+        "amount": _amount_type,
+        "category": _category_type,
+        "date": _date_type,
+        "description": _description_type,
+    }))
+
+    def __init__(
+        self,
+        amount: Optional[float] = None,
+        category: Optional[str] = None,
+        date: Optional[str] = None,
+        description: Optional[str] = None,
+    ) -> None:
+        # BaseEntity.__init__ is not called, it would create a validator for this record only.
+        self._amount: Optional[float] = None
+        self._category: Optional[str] = None
+        self._date: Optional[str] = None
+        self._description: Optional[str] = None
+
+        if amount is not None:
+            self.amount = amount
+        if category is not None:
+            self.category = category
+        if date is not None:
+            self.date = date
+        if description is not None:
+            self.description = description
+
+    @classmethod
+    def from_trusted_json(cls, record: dict[str, Any]) -> "CompactRecord":
+        """
+        Builds a record from a stored one without validating it, for ledgers known to be valid (see
+        `fs.Aggregates.validated`). Values set later are validated as usual.
+        """
+        trusted = cls.__new__(cls)
+        trusted._amount = record["amount"]
+        trusted._category = record["category"]
+        trusted._date = record["date"]
+        trusted._description = record["description"]
+        return trusted
+
+    @staticmethod
+    def __initialized(value: Any) -> Any:
+        if value is None:
+            raise AttributeError("Value is not initialized.")
+        return value
+
+    @property
+    def amount(self) -> float:
+        return self.__initialized(self._amount)
+
+    @amount.setter
+    def amount(self, value: float) -> None:
+        if self._amount_type._is_valid(value):
+            self._amount = value
+
+    @property
+    def date(self) -> str:
+        return self.__initialized(self._date)
+
+    @date.setter
+    def date(self, value: str) -> None:
+        if self._date_type._is_valid(value):
+            self._date = value
+
+    @property
+    def category(self) -> str:
+        return self.__initialized(self._category)
+
+    @category.setter
+    def category(self, value: str) -> None:
+        if self._category_type._is_valid(value):
+            self._category = value
+
+    @property
+    def description(self) -> str:
+        return self.__initialized(self._description)
+
+    @description.setter
+    def description(self, value: str) -> None:
+        if self._description_type._is_valid(value):
+            self._description = value
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "amount": self.amount,
+            "date": self.date,
+            "category": self.category,
+            "description": self.description
+        }
@@ -0,0 +1,121 @@
+from typing import Any, Iterable, Optional
+from entities.compact_record import CompactRecord
+
+class ArrayListRecord:
+    """
+    Record container with the API of `LinkedListRecord`, backed by a contiguous array of `CompactRecord`.
+
+    Reading, updating and removing by index find the record in O(1) instead of walking the nodes, and
+    `insert_last` is amortized O(1). `insert_first` and `remove_by_index` shift the records after the index,
+    which is a single memory move.
+    """
+
+    def __init__(self) -> None:
+        self.__records: list[CompactRecord] = []
+
+    def insert_first(
+        self,
+        amount: float,
+        category: str,
+        date: str,
+        description: str,
+    ) -> None:
+        self.__records.insert(0, CompactRecord(amount, category, date, description))
+
+    def insert_last(
+        self,
+        amount: float,
+        category: str,
+        date: str,
+        description: str,
+    ) -> None:
+        self.__records.append(CompactRecord(amount, category, date, description))
+
+    def load_trusted(self, records: Iterable[dict[str, Any]]) -> None:
+        """
+        Appends stored records without validating them again, see `CompactRecord.from_trusted_json`.
+        """
+        self.__records.extend(map(CompactRecord.from_trusted_json, records))
+
+    @property
+    def length(self) -> int:
+        return len(self.__records)
+
+    def get(self, index: int = 0) -> Optional[CompactRecord]:
+        """
+        Returns the record at `index`, the first one by default, or None if there is no such record.
+        """
+        if 0 <= index < len(self.__records):
+            return self.__records[index]
+        return None
+
+    def get_by_amount(self, value: float) -> dict[int, CompactRecord]:
+        """
+        Retrieve all records that match the given amount.
+
+        Args:
+            value (float): The amount to search for.
+
+        Returns:
+            dict[int, CompactRecord]: A dictionary where the keys are the index positions of the matching records and the values are the matching `CompactRecord` instances.
+        """
+        amount = CompactRecord(amount=value).amount
+        return {index: record for index, record in enumerate(self.__records) if record.amount == amount}
+
+    def get_by_category(self, value: str) -> dict[int, CompactRecord]:
+        """
+        Retrieve all records that match the given category.
+
+        Args:
+            value (str): The category to search for.
+
+        Returns:
+            dict[int, CompactRecord]: A dictionary where the keys are the index positions of the matching records and the values are the matching `CompactRecord` instances.
+        """
+        category = CompactRecord(category=value).category
+        return {index: record for index, record in enumerate(self.__records) if record.category == category}
+
+    def get_by_date(self, value: str) -> dict[int, CompactRecord]:
+        """
+        Retrieve all records that match the given date.
+
+        Args:
+            value (str): The date to search for.
+
+        Returns:
+            dict[int, CompactRecord]: A dictionary where the keys are the index positions of the matching records and the values are the matching `CompactRecord` instances.
+        """
+        date = CompactRecord(date=value).date
+        return {index: record for index, record in enumerate(self.__records) if record.date == date}
+
+    def remove_by_index(self, index: int) -> bool:
+        if not 0 <= index < len(self.__records):
+            return False
+
+        del self.__records[index]
+        return True
+
+    def update_by_index(
+        self,
+        index: int,
+        new_amount: Optional[float] = None,
+        new_category: Optional[str] = None,
+        new_date: Optional[str] = None,
+        new_description: Optional[str] = None
+    ) -> bool:
+        record = self.get(index)
+
+        if record is None:
+            return False
+
+        # Empty values leave the field unchanged, as in `LinkedListRecord`.
+        if new_amount:
+            record.amount = new_amount
+        if new_category:
+            record.category = new_category
+        if new_date:
+            record.date = new_date
+        if new_description:
+            record.description = new_description
+
+        return True
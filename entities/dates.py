@@ -0,0 +1,20 @@
+import datetime
+
+# Day numbers count days from 1970-01-01, which keeps any realistic date within a signed 32-bit integer.
+EPOCH_ORDINAL: int = datetime.date(1970, 1, 1).toordinal()
+
+def to_day_number(value: str) -> int:
+    """
+    Converts a `YYYY-MM-DD` or `YYYY-M-D` date into a day number.
+
+    Raises:
+        ValueError: If the value is not a valid date.
+    """
+    year, month, day = map(int, value.split('-'))
+    return datetime.date(year, month, day).toordinal() - EPOCH_ORDINAL
+
+def from_day_number(value: int) -> str:
+    """
+    Converts a day number back into a `YYYY-MM-DD` date.
+    """
+    return datetime.date.fromordinal(value + EPOCH_ORDINAL).isoformat()
@@ -14,7 +14,7 @@ class EntityRecord(BaseEntity):
         self.__amount = EntityTypeFloat(min_val=0.0)
         self.__date = EntityTypeString(validate_function=self._validator_record.is_date) 
         self.__category = EntityTypeString(validate_function=self._validator_record.is_category)
-        self.__description = EntityTypeString(min_length=0, max_length=500)
+        self.__description = EntityTypeString(min_length=0, max_length=self._validator_record.MAX_DESCRIPTION_LENGTH)
 
         if amount is not None:
             self.__amount.value = amount
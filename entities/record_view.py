@@ -0,0 +1,23 @@
+from typing import Any, NamedTuple
+
+class RecordView(NamedTuple):
+    """
+    Read-only view of a stored record and its position in the ledger. Built straight from the storage format
+    without validation, since stored records were validated when they were written.
+    """
+
+    position: int
+    amount: float
+    category: str
+    date: str
+    description: str
+
+    @classmethod
+    def from_json(cls, position: int, record: dict[str, Any]) -> "RecordView":
+        return cls(position, record["amount"], record["category"], record["date"], record["description"])
+
+    def to_json(self) -> dict[str, Any]:
+        return {"amount": self.amount, "date": self.date, "category": self.category, "description": self.description}
+
+    def __str__(self) -> str:
+        return f"[{self.position}]\nAmount: {round(self.amount, 2)}.\nCategory: {self.category}.\nDate: {self.date}.\nDescription: {self.description}."
@@ -0,0 +1,32 @@
+from typing import Any, Callable
+
+def compile_schema(fields: dict[str, Any]) -> Callable[[dict[str, Any]], None]:
+    """
+    Compiles the constraints of a set of fields into a single function that validates a whole record.
+
+    Every field is compiled once with the `compile` method of its `EntityType*`, into a validator that holds
+    only the checks of the constraints given to the type, and the fields are unrolled into one generated
+    function that runs these validators in turn, without creating or changing any entity type.
+
+    Args:
+        fields (dict[str, Any]): The `EntityType*` instance of every field, by name.
+
+    Returns:
+        Callable[[dict[str, Any]], None]: A function that raises ValueError if a field is missing, and the
+        exceptions of the field types if a value is invalid.
+    """
+    namespace: dict[str, Any] = {}
+    lines: list[str] = ["def validate(record):"]
+
+    # The fields are unrolled into one function, each value read once and passed to its validator.
+    for idx, (name, entity_type) in enumerate(fields.items()):
+        namespace[f"validate_{idx}"] = entity_type.compile()
+        message: str = f"Missing field '{name}'."
+        lines += [
+            f"    if {name!r} not in record:",
+            f"        raise ValueError({message!r})",
+            f"    validate_{idx}(record[{name!r}])",
+        ]
+
+    exec("\n".join(lines), namespace)
+    return namespace["validate"]
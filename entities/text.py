@@ -0,0 +1,47 @@
+import re
+import unicodedata
+from typing import Iterable
+
+TOKEN = re.compile(r"\w+")
+
+def normalize(text: str) -> str:
+    """
+    Applies the NFKC normalization and case folding, so that text that only differs in the form of its
+    characters or in case compares equal: "ПРОДУКТЫ", "продукты" and "Ｐroducts" with a full-width letter.
+    """
+    return unicodedata.normalize("NFKC", text).casefold()
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into normalized word tokens (runs of letters, digits and underscores).
+    """
+    return TOKEN.findall(normalize(text))
+
+def parse_query(query: str) -> list[tuple[str, bool]]:
+    """
+    Splits a search query into the tokens a text must all contain. A word ending with `*` matches every token
+    that starts with it.
+
+    Returns:
+        list[tuple[str, bool]]: The tokens and whether each of them is a prefix.
+    """
+    terms: list[tuple[str, bool]] = []
+
+    for word in query.split():
+        tokens = tokenize(word)
+
+        if tokens:
+            terms += [(token, False) for token in tokens[:-1]]
+            terms.append((tokens[-1], word.endswith("*")))
+
+    return terms
+
+def matches(tokens: Iterable[str], terms: list[tuple[str, bool]]) -> bool:
+    """
+    Returns whether the tokens of a text satisfy every term of a parsed query.
+    """
+    tokens = set(tokens)
+    return all(
+        any(token.startswith(term) for token in tokens) if prefix else term in tokens
+        for term, prefix in terms
+    )
@@ -1,6 +1,104 @@
+import re
+from abc import ABC, abstractmethod
 from typing import Any, Optional, Callable, Type
 
-class EntityTypeInteger:
+# A compiled validator: checks a value and raises TypeError or ValueError if it is not allowed.
+Validator = Callable[[Any], None]
+
+def _check_limit(name: str, limit: Optional[int]) -> Optional[int]:
+    """
+    Raises the configuration error of a length or size limit that is less than 0, and returns the limit that
+    has to be checked: None for no limit or a minimum of 0, which every value satisfies.
+    """
+    if limit is not None and limit < 0:
+        raise AttributeError(f"The {name} cannot be less than 0, the current value is {limit}")
+    return limit
+
+# One check of a compiled validator: lines of Python that test `value` and raise if it is not allowed, and the
+# objects those lines refer to by name.
+Check = tuple[str, dict[str, Any]]
+
+def _type_check(kind: type, name: str) -> Check:
+    return (
+        'if not isinstance(value, kind):\n'
+        '    raise TypeError(f"Value must be {kind_name}, got {type(value)}.")',
+        {"kind": kind, "kind_name": name},
+    )
+
+def _bound_checks(minimum: Optional[float], maximum: Optional[float]) -> list[Check]:
+    checks: list[Check] = []
+
+    if minimum is not None:
+        checks.append((
+            'if value < minimum:\n'
+            '    raise ValueError(f"Value {value} is less than the minimum {minimum}.")',
+            {"minimum": minimum},
+        ))
+    if maximum is not None:
+        checks.append((
+            'if value > maximum:\n'
+            '    raise ValueError(f"Value {value} is greater than the maximum {maximum}.")',
+            {"maximum": maximum},
+        ))
+
+    return checks
+
+def _function_check(validate_function: Optional[Callable[[Any], None]]) -> list[Check]:
+    return [] if validate_function is None else [("validate_function(value)", {"validate_function": validate_function})]
+
+def _compile(checks: list[Check]) -> Validator:
+    """
+    Builds a single function that runs the given checks in order, with nothing else to test on each call.
+    """
+    namespace: dict[str, Any] = {}
+    lines: list[str] = ["def validate(value):"]
+
+    for source, names in checks:
+        namespace.update(names)
+        lines += [f"    {line}" for line in source.split("\n")]
+
+    exec("\n".join(lines), namespace)
+    return namespace["validate"]
+
+class _EntityType(ABC):
+    """
+    Base of the entity types: a type holds constraints, checks values against them with `_check` and keeps the
+    last value that passed.
+    """
+
+    # The validator built by the first call of `compile`, returned by the later ones.
+    __compiled: Optional[Validator] = None
+
+    @abstractmethod
+    def _check(self, value: Any) -> None:
+        """
+        Raises TypeError or ValueError if the value is not allowed by the constraints of the type.
+        """
+
+    @abstractmethod
+    def _checks(self) -> list[Check]:
+        """
+        Returns one check per constraint that was given, the check of the type of the value first, each raising
+        the error `_check` raises for it.
+        """
+
+    def compile(self) -> Validator:
+        """
+        Returns a validator that raises like `_check` if a value is not allowed, for validating many values
+        without setting them. It is a single function generated from the checks of the constraints that were
+        given, with their limits, patterns and allowed values bound in, so it does not test the missing ones on
+        every call. It is built on the first call and kept for the next ones; setting `value` keeps using
+        `_check`, so types that are never compiled build nothing.
+        """
+        if self.__compiled is None:
+            self.__compiled = _compile(self._checks())
+        return self.__compiled
+
+    def _is_valid(self, value: Any) -> bool:
+        self._check(value)
+        return True
+
+class EntityTypeInteger(_EntityType):
     def __init__(
         self,
         validate_function: Optional[Callable[[int], None]] = None,
@@ -19,7 +117,7 @@ class EntityTypeInteger:
         self.__max: Optional[int] = max_val
         self.__validate_function: Optional[Callable[[int], None]] = validate_function
 
-    def _is_valid(self, value: int) -> bool:
+    def _check(self, value: int) -> None:
         if not isinstance(value, int):
             raise TypeError(f"Value must be an integer, got {type(value)}.")
 
@@ -32,7 +130,8 @@ class EntityTypeInteger:
         if self.__validate_function is not None:
             self.__validate_function(value)
 
-        return True
+    def _checks(self) -> list[Check]:
+        return [_type_check(int, "an integer"), *_bound_checks(self.__min, self.__max), *_function_check(self.__validate_function)]
 
     @property
     def value(self) -> int:
@@ -45,7 +144,7 @@ class EntityTypeInteger:
         if self._is_valid(new_value):
             self.__value = new_value
 
-class EntityTypeFloat:
+class EntityTypeFloat(_EntityType):
     def __init__(
         self,
         validate_function: Optional[Callable[[float], None]] = None,
@@ -64,7 +163,7 @@ class EntityTypeFloat:
         self.__max: Optional[float] = max_val
         self.__validate_function: Optional[Callable[[float], None]] = validate_function
 
-    def _is_valid(self, value: float) -> bool:
+    def _check(self, value: float) -> None:
         if not isinstance(value, float):
             raise TypeError(f"Value must be a float, got {type(value)}.")
 
@@ -77,7 +176,8 @@ class EntityTypeFloat:
         if self.__validate_function is not None:
             self.__validate_function(value)
 
-        return True
+    def _checks(self) -> list[Check]:
+        return [_type_check(float, "a float"), *_bound_checks(self.__min, self.__max), *_function_check(self.__validate_function)]
 
     @property
     def value(self) -> float:
@@ -90,7 +190,7 @@ class EntityTypeFloat:
         if self._is_valid(new_value):
             self.__value = new_value
 
-class EntityTypeString:
+class EntityTypeString(_EntityType):
     def __init__(
         self,
         validate_function: Optional[Callable[[str], None]] = None,
@@ -111,41 +211,61 @@ class EntityTypeString:
         """
 
         self.__value: Optional[str] = None
-        self.__allowed_values: Optional[list[str]] = allowed_values
-        self.__pattern: Optional[str] = pattern
-        self.__min_length: Optional[int] = min_length
-        self.__max_length: Optional[int] = max_length
+        self.__allowed_values: Optional[frozenset[str]] = None if allowed_values is None else frozenset(allowed_values)
+        # The pattern is compiled once, and invalid limits are reported when the type is created.
+        self.__match: Optional[Callable[[str], Any]] = None if pattern is None else re.compile(pattern).match
+        self.__min_length: Optional[int] = _check_limit("minimum length", min_length) or None
+        self.__max_length: Optional[int] = _check_limit("maximum length", max_length)
         self.__validate_function: Optional[Callable[[str], None]] = validate_function
 
-    def _is_valid(self, value: str) -> bool:
+    def _check(self, value: str) -> None:
         if not isinstance(value, str):
             raise TypeError(f"Value must be a string, got {type(value)}.")
 
-        if self.__min_length is not None:
-            if self.__min_length < 0:
-                raise AttributeError(f"The minimum length cannot be less than 0, the current value is {self.__min_length}")
-            elif len(value) < self.__min_length:
-                raise ValueError(f"Length of the value ({len(value)}) is shorter than the minimum length ({self.__min_length}).")
-
-        if self.__max_length is not None:
-            if self.__max_length < 0:
-                raise AttributeError(f"The maximum length cannot be less than 0, the current value is {self.__max_length}")
-            elif len(value) > self.__max_length:
-                raise ValueError(f"Length of the value ({len(value)}) exceeds the maximum length ({self.__max_length}).")
+        if self.__min_length is not None and len(value) < self.__min_length:
+            raise ValueError(f"Length of the value ({len(value)}) is shorter than the minimum length ({self.__min_length}).")
 
+        if self.__max_length is not None and len(value) > self.__max_length:
+            raise ValueError(f"Length of the value ({len(value)}) exceeds the maximum length ({self.__max_length}).")
 
         if self.__allowed_values is not None and value not in self.__allowed_values:
             raise ValueError(f"Value '{value}' is not in the allowed values.")
 
-        if self.__pattern is not None:
-            import re
-            if not re.match(self.__pattern, value):
-                raise ValueError(f"Value '{value}' does not match the pattern.")
+        if self.__match is not None and not self.__match(value):
+            raise ValueError(f"Value '{value}' does not match the pattern.")
 
         if self.__validate_function is not None:
             self.__validate_function(value)
 
-        return True
+    def _checks(self) -> list[Check]:
+        checks: list[Check] = [_type_check(str, "a string")]
+
+        if self.__min_length is not None:
+            checks.append((
+                'if len(value) < min_length:\n'
+                '    raise ValueError(f"Length of the value ({len(value)}) is shorter than the minimum length ({min_length}).")',
+                {"min_length": self.__min_length},
+            ))
+        if self.__max_length is not None:
+            checks.append((
+                'if len(value) > max_length:\n'
+                '    raise ValueError(f"Length of the value ({len(value)}) exceeds the maximum length ({max_length}).")',
+                {"max_length": self.__max_length},
+            ))
+        if self.__allowed_values is not None:
+            checks.append((
+                'if value not in allowed_values:\n'
+                '    raise ValueError(f"Value \'{value}\' is not in the allowed values.")',
+                {"allowed_values": self.__allowed_values},
+            ))
+        if self.__match is not None:
+            checks.append((
+                'if not match(value):\n'
+                '    raise ValueError(f"Value \'{value}\' does not match the pattern.")',
+                {"match": self.__match},
+            ))
+
+        return checks + _function_check(self.__validate_function)
 
     @property
     def value(self) -> str:
@@ -158,7 +278,7 @@ class EntityTypeString:
         if self._is_valid(new_value):
             self.__value = new_value
 
-class EntityTypeList:
+class EntityTypeList(_EntityType):
     def __init__(
         self,
         validate_function: Optional[Callable[[list[Any]], None]] = None,
@@ -176,27 +296,19 @@ class EntityTypeList:
 
         self.__value: Optional[list[Any]] = None
         self.__allowed_type: Optional[Type] = allowed_type
-        self.__min_length: Optional[int] = min_length
-        self.__max_length: Optional[int] = max_length
+        self.__min_length: Optional[int] = _check_limit("minimum length", min_length) or None
+        self.__max_length: Optional[int] = _check_limit("maximum length", max_length)
         self.__validate_function: Optional[Callable[[list[Any]], None]] = validate_function
 
-    def _is_valid(self, value: list[Any]) -> bool:
+    def _check(self, value: list[Any]) -> None:
         if not isinstance(value, list):
             raise TypeError(f"Value must be a list, got {type(value)}.")
 
-        if self.__min_length is not None:
-            if self.__min_length < 0:
-                raise AttributeError(f"The minimum length cannot be less than 0, the current value is {self.__min_length}")
-            else:
-                if len(value) < self.__min_length:
-                    raise ValueError(f"Length of the list is less than the minimum {self.__min_length}.")
+        if self.__min_length is not None and len(value) < self.__min_length:
+            raise ValueError(f"Length of the list is less than the minimum {self.__min_length}.")
 
-        if self.__max_length is not None:
-            if self.__max_length < 0:
-                raise AttributeError(f"The maximum length cannot be less than 0, the current value is {self.__max_length}")
-            else:
-                if len(value) > self.__max_length:
-                    raise ValueError(f"Length of the list exceeds the maximum {self.__max_length}.")
+        if self.__max_length is not None and len(value) > self.__max_length:
+            raise ValueError(f"Length of the list exceeds the maximum {self.__max_length}.")
 
         if self.__allowed_type is not None:
             for item in value:
@@ -206,7 +318,30 @@ class EntityTypeList:
         if self.__validate_function is not None:
             self.__validate_function(value)
 
-        return True
+    def _checks(self) -> list[Check]:
+        checks: list[Check] = [_type_check(list, "a list")]
+
+        if self.__min_length is not None:
+            checks.append((
+                'if len(value) < min_length:\n'
+                '    raise ValueError(f"Length of the list is less than the minimum {min_length}.")',
+                {"min_length": self.__min_length},
+            ))
+        if self.__max_length is not None:
+            checks.append((
+                'if len(value) > max_length:\n'
+                '    raise ValueError(f"Length of the list exceeds the maximum {max_length}.")',
+                {"max_length": self.__max_length},
+            ))
+        if self.__allowed_type is not None:
+            checks.append((
+                'for item in value:\n'
+                '    if not isinstance(item, allowed_type):\n'
+                '        raise TypeError(f"Item {item} in list is not of the allowed type {allowed_type}.")',
+                {"allowed_type": self.__allowed_type},
+            ))
+
+        return checks + _function_check(self.__validate_function)
 
     @property
     def value(self) -> list[Any]:
@@ -219,7 +354,7 @@ class EntityTypeList:
         if self._is_valid(new_value):
             self.__value = new_value
 
-class EntityTypeDict:
+class EntityTypeDict(_EntityType):
     def __init__(
         self,
         validate_function: Optional[Callable[[dict], None]] = None,
@@ -242,28 +377,20 @@ class EntityTypeDict:
         self.__value: Optional[dict[Any, Any]] = None
         self.__allowed_key_type: Optional[Type] = allowed_key_type
         self.__allowed_value_type: Optional[Type] = allowed_value_type
-        self.__min_keys: Optional[int] = min_keys
-        self.__max_keys: Optional[int] = max_keys
+        self.__min_keys: Optional[int] = _check_limit("minimum number of keys", min_keys) or None
+        self.__max_keys: Optional[int] = _check_limit("maximum number of keys", max_keys)
         self.__required_keys: Optional[list[Any]] = required_keys
         self.__validate_function: Optional[Callable[[dict], None]] = validate_function
 
-    def _is_valid(self, value: dict[Any, Any]) -> bool:
+    def _check(self, value: dict[Any, Any]) -> None:
         if not isinstance(value, dict):
             raise TypeError(f"Value must be a dictionary, got {type(value)}.")
 
-        if self.__min_keys is not None:
-            if self.__min_keys < 0:
-                raise AttributeError(f"The minimum number of keys cannot be less than 0, the current value is {self.__min_keys}")
-            else:
-                if len(value) < self.__min_keys:
-                    raise ValueError(f"Dictionary has fewer keys than the minimum {self.__min_keys}.")
+        if self.__min_keys is not None and len(value) < self.__min_keys:
+            raise ValueError(f"Dictionary has fewer keys than the minimum {self.__min_keys}.")
 
-        if self.__max_keys is not None:
-            if self.__max_keys < 0:
-                raise AttributeError(f"The maximum number of keys cannot be less than 0, the current value is {self.__max_keys}")
-            else:
-                if len(value) > self.__max_keys:
-                    raise ValueError(f"Dictionary has more keys than the maximum {self.__max_keys}.")
+        if self.__max_keys is not None and len(value) > self.__max_keys:
+            raise ValueError(f"Dictionary has more keys than the maximum {self.__max_keys}.")
 
         if self.__allowed_key_type is not None:
             for key in value.keys():
@@ -283,7 +410,44 @@ class EntityTypeDict:
         if self.__validate_function is not None:
             self.__validate_function(value)
 
-        return True
+    def _checks(self) -> list[Check]:
+        checks: list[Check] = [_type_check(dict, "a dictionary")]
+
+        if self.__min_keys is not None:
+            checks.append((
+                'if len(value) < min_keys:\n'
+                '    raise ValueError(f"Dictionary has fewer keys than the minimum {min_keys}.")',
+                {"min_keys": self.__min_keys},
+            ))
+        if self.__max_keys is not None:
+            checks.append((
+                'if len(value) > max_keys:\n'
+                '    raise ValueError(f"Dictionary has more keys than the maximum {max_keys}.")',
+                {"max_keys": self.__max_keys},
+            ))
+        if self.__allowed_key_type is not None:
+            checks.append((
+                'for key in value.keys():\n'
+                '    if not isinstance(key, allowed_key_type):\n'
+                '        raise TypeError(f"Key \'{key}\' is not of the allowed type {allowed_key_type}. Current type {type(key)}.")',
+                {"allowed_key_type": self.__allowed_key_type},
+            ))
+        if self.__allowed_value_type is not None:
+            checks.append((
+                'for key, val in value.items():\n'
+                '    if not isinstance(val, allowed_value_type):\n'
+                '        raise TypeError(f"Value for key \'{key}\' is not of the allowed type {allowed_value_type}. Current type {type(val)}.")',
+                {"allowed_value_type": self.__allowed_value_type},
+            ))
+        if self.__required_keys is not None:
+            checks.append((
+                'for required_key in required_keys:\n'
+                '    if required_key not in value:\n'
+                '        raise KeyError(f"Missing required key \'{required_key}\'.")',
+                {"required_keys": self.__required_keys},
+            ))
+
+        return checks + _function_check(self.__validate_function)
 
     @property
     def value(self) -> dict[Any, Any]:
@@ -296,7 +460,7 @@ class EntityTypeDict:
         if self._is_valid(new_value):
             self.__value = new_value
 
-class EntityTypeBool:
+class EntityTypeBool(_EntityType):
     def __init__(
         self,
         validate_function: Optional[Callable[[bool], None]] = None,
@@ -309,14 +473,15 @@ class EntityTypeBool:
         self.__value: Optional[bool] = None
         self.__validate_function: Optional[Callable[[bool], None]] = validate_function
 
-    def _is_valid(self, value: bool) -> bool:
+    def _check(self, value: bool) -> None:
         if not isinstance(value, bool):
             raise TypeError(f"Value must be a boolean, got {type(value)}.")
 
         if self.__validate_function is not None:
             self.__validate_function(value)
 
-        return True
+    def _checks(self) -> list[Check]:
+        return [_type_check(bool, "a boolean"), *_function_check(self.__validate_function)]
 
     @property
     def value(self) -> bool:
@@ -0,0 +1,297 @@
+import math
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+from entities.dates import from_day_number, to_day_number
+from entities.record_attributes import EntityRecordAttributes
+from fs.base import BaseIndex, BaseStorage, Change
+
+# The days of the rollups and, per column, the running totals up to each of them.
+Rollups = tuple[Sequence[int], dict[str, Sequence[float]]]
+
+class Aggregates(BaseIndex):
+    """
+    Daily rollups of a ledger, persisted next to it in the binary `<FILENAME>.totals` file.
+
+    For every day that has records the file keeps prefix sums: the total amount of every category and the
+    number of records up to and including that day. The totals of any period are then the difference of two
+    prefix sums found by binary search over the days, and the totals of the whole ledger are the last ones.
+    The file is memory-mapped, so a query reads only the entries it needs.
+
+    The file layout, in int64 and float64 words of the native byte order:
+
+    - The length of the storage signature, the number of days and 1 if the ledger is validated, see `validated`.
+    - The storage signature the rollups were built from.
+    - The sorted day numbers (see `entities.dates`).
+    - One column of prefix sums per category and one for the number of records, each starting with 0.
+
+    Adds and updates apply their delta to the prefix sums. If the ledger is changed without them, by an
+    interrupted write or another program, the saved signature no longer matches and the rollups are rebuilt
+    from the ledger on the next read.
+
+    Storages with `NATIVE_QUERIES` keep the rollups as well, so that a period costs two binary searches on them
+    too instead of summing the records of the ledger, which is left to rebuilds.
+    """
+
+    def __init__(self, storage: BaseStorage) -> None:
+        """
+        Args:
+            storage (BaseStorage): The storage whose ledger is summed.
+        """
+        self.__storage = storage
+        self.FILENAME: str = f"{storage.FILENAME}.totals"
+        self.__columns: list[str] = [*EntityRecordAttributes().categories, "count"]
+
+    @contextmanager
+    def __map(self) -> Iterator[Optional[tuple[Rollups, bool]]]:
+        """
+        Maps the saved rollups and their validated flag, or yields None if they are missing or do not describe
+        the current ledger.
+        """
+        signature = self.__storage.signature()
+
+        try:
+            f = open(self.FILENAME, 'rb')
+        except FileNotFoundError:
+            yield None
+            return
+
+        with f:
+            size: int = os.fstat(f.fileno()).st_size
+
+            if signature is None or size < 16 or size % 8 != 0:
+                yield None
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                views: list[memoryview] = [memoryview(mapped)]
+                try:
+                    yield self.__parse(views, signature)
+                finally:
+                    # The map cannot be closed while a view of it is still alive.
+                    for view in reversed(views):
+                        view.release()
+
+    def __parse(self, views: list[memoryview], signature: tuple[int, ...]) -> Optional[tuple[Rollups, bool]]:
+        raw = views[0]
+        words = raw.cast("q")
+        views.append(words)
+        length, count, validated = words[0], words[1], words[2]
+
+        if raw.nbytes != 8 * (3 + length + count + (count + 1) * len(self.__columns)):
+            return None
+        if tuple(words[3:3 + length]) != signature:
+            return None
+
+        days = words[3 + length:3 + length + count]
+        views.append(days)
+        prefix: dict[str, Sequence[float]] = {}
+        offset: int = 8 * (3 + length + count)
+
+        for column in self.__columns:
+            values = raw[offset:offset + 8 * (count + 1)].cast("d")
+            views.append(values)
+            prefix[column] = values
+            offset += 8 * (count + 1)
+
+        return (days, prefix), validated == 1
+
+    def __save(self, days: array, prefix: dict[str, array], validated: bool = False) -> None:
+        signature = self.__storage.signature() or ()
+        header = array("q", [len(signature), len(days), int(validated), *signature])
+
+        def write(f: Any) -> None:
+            f.write(header.tobytes())
+            f.write(days.tobytes())
+            for column in self.__columns:
+                f.write(prefix[column].tobytes())
+
+        self.__storage._replace_file(self.FILENAME, write, encoding=None, durable=False)
+
+    def __build(self) -> tuple[array, dict[str, array]]:
+        """
+        Sums the whole ledger per day into prefix sums.
+        """
+        daily = self.__storage.daily_totals()
+        days = array("q", sorted(daily))
+        prefix: dict[str, array] = {column: array("d", [0.0]) for column in self.__columns}
+
+        for day in days:
+            for column, values in prefix.items():
+                values.append(values[-1] + daily[day].get(column, 0.0))
+
+        return days, prefix
+
+    def rebuild(self) -> None:
+        self.__save(*self.__build())
+
+    @contextmanager
+    def __rollups(self) -> Iterator[Rollups]:
+        """
+        Maps the saved rollups, rebuilding them first if they are out of date.
+        """
+        with self.__map() as loaded:
+            if loaded is not None:
+                yield loaded[0]
+                return
+
+        with self.__storage.locked(exclusive=True):
+            self.rebuild()
+
+        with self.__map() as loaded:
+            # A storage without a signature cannot keep saved rollups, they are used as built.
+            yield loaded[0] if loaded is not None else self.__build()
+
+    def __range(self, rollups: Rollups, start: Optional[int], end: Optional[int]) -> dict[str, float]:
+        days, prefix = rollups
+        low: int = 0 if start is None else bisect_left(days, start)
+        high: int = max(low, len(days) if end is None else bisect_right(days, end))
+        result: dict[str, float] = {column: values[high] - values[low] for column, values in prefix.items()}
+        result["count"] = round(result["count"])
+
+        return result
+
+    def totals(self, start: Optional[int] = None, end: Optional[int] = None) -> dict[str, float]:
+        """
+        Returns the totals of the records dated from `start` to `end`, in the format of `BaseStorage.totals`.
+
+        Args:
+            start (Optional[int]): The first day number of the period, or None for the beginning of the ledger.
+            end (Optional[int]): The last day number of the period, or None for the end of the ledger.
+
+        Returns:
+            dict[str, float]: The total amount of every category and the number of records under the "count" key.
+        """
+        with self.__rollups() as rollups:
+            return self.__range(rollups, start, end)
+
+    def months(self, start: Optional[int] = None, end: Optional[int] = None) -> list[tuple[str, dict[str, float]]]:
+        """
+        Returns the totals of every month from `start` to `end` that has records, in month order.
+
+        Args:
+            start (Optional[int]): The first day number of the period, or None for the beginning of the ledger.
+            end (Optional[int]): The last day number of the period, or None for the end of the ledger.
+
+        Returns:
+            list[tuple[str, dict[str, float]]]: The `YYYY-MM` months and their totals.
+        """
+        result: list[tuple[str, dict[str, float]]] = []
+
+        with self.__rollups() as rollups:
+            days = rollups[0]
+
+            if len(days) == 0:
+                return result
+
+            first: int = days[0] if start is None else max(start, days[0])
+            last: int = days[-1] if end is None else min(end, days[-1])
+            year, month = map(int, from_day_number(first).split('-')[:2])
+
+            while first <= last:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                # The day before the first day of the next month.
+                month_end: int = to_day_number(f"{year}-{month}-1") - 1
+                totals = self.__range(rollups, first, min(month_end, last))
+
+                if totals["count"] > 0:
+                    result.append((from_day_number(first)[:7], totals))
+                first = month_end + 1
+
+        return result
+
+    def validated(self) -> bool:
+        """
+        Returns True if every record of the ledger is known to pass validation: the ledger has only been changed
+        along with the rollups, by writes that validate what they store, since it was empty or since `Record.verify`
+        found its records valid. Rebuilding the rollups, after the ledger was changed without them, drops the flag.
+        """
+        with self.__map() as loaded:
+            return loaded is not None and loaded[1]
+
+    def set_validated(self, validated: bool) -> None:
+        """
+        Sets the flag returned by `validated` in the header of the saved rollups, if they are current.
+        """
+        with self.__map() as loaded:
+            if loaded is None:
+                return
+
+        with open(self.FILENAME, 'r+b') as f:
+            f.seek(16)
+            f.write(array("q", [int(validated)]).tobytes())
+
+    def verify(self) -> bool:
+        days, prefix = self.__build()
+        valid: bool = False
+
+        with self.__map() as loaded:
+            if loaded is not None:
+                rollups = loaded[0]
+                # Every running total of the ledger must match, which also covers the total of every single day.
+                valid = all(
+                    math.isclose(saved, prefix[column][idx + 1], abs_tol=1e-6)
+                    for idx, day in enumerate(days)
+                    for column, saved in self.__range(rollups, None, day).items()
+                ) and all(
+                    math.isclose(saved, prefix[column][-1], abs_tol=1e-6)
+                    for column, saved in self.__range(rollups, None, None).items()
+                )
+
+        if not valid:
+            self.__save(days, prefix)
+
+        return valid
+
+    @contextmanager
+    def change_many(self, changes: list[Change]) -> Iterator[None]:
+        # Rollups do not depend on positions.
+        with self.__map() as saved:
+            loaded: Optional[tuple[array, dict[str, array], bool]] = None if saved is None else (
+                array("q", saved[0][0]),
+                {column: array("d", values) for column, values in saved[0][1].items()},
+                saved[1],
+            )
+
+        if loaded is None and self.__storage.signature() is not None:
+            days, prefix = self.__build()
+            # An empty ledger has nothing left to validate, so one written only by validated writes stays validated.
+            loaded = days, prefix, len(days) == 0
+
+        yield
+
+        if self.__storage.signature() is None or loaded is None:
+            # The writes of the block are held back by `group_commit`, see `BaseIndex`.
+            return
+
+        days, prefix, validated = loaded
+        deltas: dict[int, dict[str, float]] = {}
+
+        for _, old, new in changes:
+            for record, sign in ((old, -1), (new, 1)):
+                if record is not None:
+                    delta = deltas.setdefault(to_day_number(record["date"]), {})
+                    delta[record["category"]] = delta.get(record["category"], 0.0) + sign * record["amount"]
+                    delta["count"] = delta.get("count", 0.0) + sign
+
+        for day in sorted(deltas):
+            idx: int = bisect_left(days, day)
+
+            if idx == len(days) or days[idx] != day:
+                days.insert(idx, day)
+                for values in prefix.values():
+                    values.insert(idx + 1, values[idx])
+
+        # The deltas of all days are added up in a single pass over every column.
+        for column, values in prefix.items():
+            running: float = 0.0
+            for idx, day in enumerate(days):
+                if day in deltas:
+                    running += deltas[day].get(column, 0.0)
+                if running:
+                    values[idx + 1] += running
+
+        self.__save(days, prefix, validated)
@@ -0,0 +1,457 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, contextmanager
+from itertools import islice
+from typing import IO, Any, Callable, Iterable, Iterator, Optional
+from entities.dates import to_day_number
+from entities.record_attributes import EntityRecordAttributes
+from entities.text import matches, tokenize
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore
+
+# The position of a record, or None for one added to the end of the ledger, its old and its new version.
+Change = tuple[Optional[int], Optional[dict[str, Any]], Optional[dict[str, Any]]]
+
+class BaseStorage(ABC):
+    """
+    Interface shared by all ledger storage formats.
+
+    Records are addressed by their position in the ledger, the same index that `get` prints and `update` accepts.
+    """
+
+    FILENAME: str
+    # Whether a record keeps its position for good, new records taking the next free one.
+    STABLE_POSITIONS: bool = True
+    # Whether key and range lookups are answered by the storage itself, without the indexes that `Record`
+    # otherwise keeps next to the ledger. Balances and searches use the rollups and the text index either way.
+    NATIVE_QUERIES: bool = False
+
+    def __init__(self) -> None:
+        # Depth of nested `group_commit` blocks and the files written inside them that still need an fsync.
+        self._group_depth: int = 0
+        self._unsynced: Optional[set[str]] = None
+        # The `locked` blocks that have not exited yet, as the thread that entered each and whether it is exclusive,
+        # and the mode of the file lock they hold together, None while there are none.
+        self.__holders: list[tuple[int, bool]] = []
+        self.__lock_mode: Optional[bool] = None
+        self.__lock_file: Optional[IO[bytes]] = None
+        self.__lock_changed = threading.Condition()
+
+    @abstractmethod
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Returns the whole ledger in the `{"list": [...]}` document format.
+        """
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """
+        Yields the records of the ledger one at a time, in ledger order.
+
+        Storages override this to avoid holding the whole ledger in memory.
+        """
+        yield from self.read_json()["list"]
+
+    @abstractmethod
+    def write_json(self, data: dict[str, list[dict[str, Any]]]) -> None:
+        """
+        Replaces the whole ledger with the given `{"list": [...]}` document.
+        """
+
+    @abstractmethod
+    def append(self, record: dict[str, Any]) -> None:
+        """
+        Adds a record to the end of the ledger.
+        """
+
+    def append_many(self, records: list[dict[str, Any]]) -> None:
+        """
+        Adds records to the end of the ledger, in order, as a single durable commit.
+
+        Storages override this to write the whole batch at once.
+        """
+        with self.group_commit():
+            for record in records:
+                self.append(record)
+
+    @abstractmethod
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        """
+        Overwrites the record at the given position.
+
+        Returns:
+            bool: False if there is no record at that position.
+        """
+
+    def compact(self) -> None:
+        """
+        Rewrites the storage so that it holds only the current state of the ledger.
+        """
+        self.write_json(self.read_json())
+
+    def get_records(self, positions: Iterable[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Yields the records at the given positions in ascending order, skipping positions without a record.
+
+        The default reads the ledger once up to the last position, storages with direct access override it.
+        """
+        wanted = iter(sorted(set(positions)))
+        position: Optional[int] = next(wanted, None)
+
+        for idx, record in enumerate(self.iter_records()):
+            while position is not None and position < idx:
+                position = next(wanted, None)
+            if position is None:
+                return
+            if position == idx:
+                yield idx, record
+
+    def random_access(self) -> bool:
+        """
+        Returns True if `get_records` reads only the records it is asked for, False if every call reads the
+        ledger from the start, so that callers should ask for all the records they need at once.
+        """
+        return False
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        """
+        Returns a value that changes whenever the ledger is changed on disk, by this process or another one,
+        or None if the storage cannot tell. Storages that hold writes of a `group_commit` block in memory until
+        it exits return None meanwhile, since the files on disk do not describe the ledger readers see.
+        """
+        return None
+
+    @staticmethod
+    def _stat_signature(*paths: str) -> Optional[tuple[int, ...]]:
+        """
+        Builds a signature from the inode, size and modification time of the files that hold the ledger.
+        """
+        signature: list[int] = []
+
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            signature += [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+        return tuple(signature)
+
+    def count(self) -> int:
+        return sum(1 for _ in self.iter_records())
+
+    def get_record(self, index: int) -> Optional[dict[str, Any]]:
+        if index < 0:
+            return None
+        return next(islice(self.iter_records(), index, None), None)
+
+    def totals(self) -> dict[str, float]:
+        """
+        Sums the amounts of the ledger per category.
+
+        Returns:
+            dict[str, float]: The total amount of every category and the number of records under the "count" key.
+        """
+        result: dict[str, float] = {category: 0.0 for category in EntityRecordAttributes().categories}
+        result["count"] = 0
+
+        for record in self.iter_records():
+            result["count"] += 1
+            if record["category"] in result:
+                result[record["category"]] += record["amount"]
+
+        return result
+
+    def daily_totals(self) -> dict[int, dict[str, float]]:
+        """
+        Sums the amounts of the ledger per day and category.
+
+        Returns:
+            dict[int, dict[str, float]]: The totals of every day that has records, in the format of `totals`, by day number.
+        """
+        result: dict[int, dict[str, float]] = {}
+
+        for record in self.iter_records():
+            day = result.setdefault(to_day_number(record["date"]), {"count": 0})
+            day["count"] += 1
+            day[record["category"]] = day.get(record["category"], 0.0) + record["amount"]
+
+        return result
+
+    def select(self, by: str, value: float | str) -> list[tuple[int, dict[str, Any]]]:
+        """
+        Finds the records whose `by` field equals `value`. Dates are compared as calendar days,
+        so "2024-1-6" matches a record stored as "2024-01-06".
+
+        Args:
+            by (str): The field to compare ('amount', 'category' or 'date').
+            value (float | str): The value to search for.
+
+        Returns:
+            list[tuple[int, dict[str, Any]]]: The positions and contents of the matching records, in ledger order.
+        """
+        records = enumerate(self.iter_records())
+
+        if by == "date":
+            day: int = to_day_number(str(value))
+            return [(idx, record) for idx, record in records if record["date"] == value or to_day_number(record["date"]) == day]
+
+        return [(idx, record) for idx, record in records if record[by] == value]
+
+    def select_range(self, start: Optional[int], end: Optional[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Finds the records dated from `start` to `end`, both day numbers and both inclusive.
+
+        Args:
+            start (Optional[int]): The first day number of the range, or None for the beginning of the ledger.
+            end (Optional[int]): The last day number of the range, or None for the end of the ledger.
+
+        Returns:
+            Iterator[tuple[int, dict[str, Any]]]: The positions and contents of the records, in date order and in
+            ledger order within a day.
+        """
+        matches: list[tuple[int, int, dict[str, Any]]] = []
+
+        for idx, record in enumerate(self.iter_records()):
+            day: int = to_day_number(record["date"])
+            if self._within(day, start, end):
+                matches.append((day, idx, record))
+
+        matches.sort(key=lambda match: match[:2])
+        return ((idx, record) for _, idx, record in matches)
+
+    def select_amount_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        category: Optional[str] = None,
+        strict: bool = False
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Finds the records with amounts from `minimum` to `maximum`.
+
+        Args:
+            minimum (Optional[float]): The smallest amount, or None for no lower bound.
+            maximum (Optional[float]): The largest amount, or None for no upper bound.
+            category (Optional[str]): The only category to search, or None for all of them.
+            strict (bool): Whether amounts equal to `minimum` or `maximum` are left out.
+
+        Returns:
+            Iterator[tuple[int, dict[str, Any]]]: The positions and contents of the records, in ascending order of
+            amount and in ledger order within an amount.
+        """
+        matches: list[tuple[float, int, dict[str, Any]]] = []
+
+        for idx, record in enumerate(self.iter_records()):
+            amount: float = record["amount"]
+
+            if (category is None or record["category"] == category) and self._within(amount, minimum, maximum, strict):
+                matches.append((amount, idx, record))
+
+        matches.sort(key=lambda match: match[:2])
+        return ((idx, record) for _, idx, record in matches)
+
+    @staticmethod
+    def _within(value: float, low: Optional[float], high: Optional[float], strict: bool = False) -> bool:
+        """
+        Checks that `value` lies between the bounds of `select_range` or `select_amount_range`, None being no bound.
+        """
+        if strict:
+            return (low is None or value > low) and (high is None or value < high)
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    def search(self, terms: list[tuple[str, bool]]) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Finds the records whose descriptions contain every term.
+
+        Args:
+            terms (list[tuple[str, bool]]): Normalized tokens and whether each of them is a prefix, see `entities.text.parse_query`.
+
+        Returns:
+            Iterator[tuple[int, dict[str, Any]]]: The positions and contents of the matching records, in ledger order.
+        """
+        return ((idx, record) for idx, record in enumerate(self.iter_records()) if matches(tokenize(record["description"]), terms))
+
+    @contextmanager
+    def locked(self, exclusive: bool = False) -> Iterator[None]:
+        """
+        Holds an advisory lock on the ledger for the duration of the block: shared for readers, exclusive
+        for writers. Writers wait for each other in turn instead of overwriting each other's changes.
+
+        The lock is taken on a `<FILENAME>.lock` file next to the ledger with `fcntl.flock`, so it is honoured
+        by every process that uses this class. Within the process, threads wait for each other the same way.
+        Blocks can be nested and can exit in any order, such as those of iterators that hold the lock while
+        they are consumed: the file lock is exclusive while any block is, shared while any is left, and released
+        when the last one exits. An exclusive block waits for the blocks of other threads, never for those of
+        its own thread. On platforms without `fcntl` only threads of the same process are serialized.
+        """
+        holder: tuple[int, bool] = (threading.get_ident(), exclusive)
+
+        with self.__lock_changed:
+            self.__lock_changed.wait_for(lambda: self.__can_hold(holder))
+            self.__holders.append(holder)
+            try:
+                self.__update_lock()
+            except BaseException:
+                self.__holders.remove(holder)
+                raise
+
+        try:
+            yield
+        finally:
+            with self.__lock_changed:
+                # Blocks of one thread in the same mode are interchangeable, any of them can be the one that exits.
+                self.__holders.remove(holder)
+                self.__update_lock()
+                self.__lock_changed.notify_all()
+
+    def __can_hold(self, holder: tuple[int, bool]) -> bool:
+        thread, exclusive = holder
+        others: list[bool] = [mode for other, mode in self.__holders if other != thread]
+        return not others if exclusive else not any(others)
+
+    def __update_lock(self) -> None:
+        """
+        Takes, converts or releases the file lock to match the blocks that hold it.
+        """
+        mode: Optional[bool] = any(exclusive for _, exclusive in self.__holders) if self.__holders else None
+
+        if mode == self.__lock_mode:
+            return
+        if mode is None:
+            self.__unlock()
+        else:
+            self.__flock(mode)
+        self.__lock_mode = mode
+
+    def __flock(self, exclusive: bool) -> None:
+        if fcntl is None:
+            return
+
+        if self.__lock_file is None:
+            self.__lock_file = open(f"{self.FILENAME}.lock", 'ab')
+        fcntl.flock(self.__lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def __unlock(self) -> None:
+        if self.__lock_file is not None:
+            # Closing the file releases the lock.
+            self.__lock_file.close()
+            self.__lock_file = None
+
+    @contextmanager
+    def group_commit(self) -> Iterator[None]:
+        """
+        Groups the writes made inside the block into a single durable commit.
+
+        Every write is visible to readers as soon as it is made, but the storage defers flushing it to disk
+        until the outermost block exits, so a burst of writes pays for one fsync instead of one per write.
+        """
+        self._group_depth += 1
+        try:
+            yield
+        finally:
+            self._group_depth -= 1
+            if self._group_depth == 0:
+                self._commit()
+
+    def _commit(self) -> None:
+        """
+        Makes the writes deferred by `group_commit` durable.
+        """
+        for path in self._unsynced or ():
+            # A file replaced or removed inside the block was already synced by whoever did it.
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+        self._unsynced = None
+
+    def _sync(self, path: str, f: IO[Any]) -> None:
+        """
+        Flushes a file written in place to disk, or defers it to the end of the current `group_commit` block.
+        """
+        f.flush()
+
+        if self._group_depth > 0:
+            if self._unsynced is None:
+                self._unsynced = set()
+            self._unsynced.add(path)
+        else:
+            os.fsync(f.fileno())
+
+    def _replace_file(self, path: str, write: Callable[[Any], None], encoding: Optional[str] = 'utf-8', durable: bool = True) -> None:
+        """
+        Writes a new version of `path` next to it, flushes it to disk and renames it over the old one,
+        so a crash leaves either the old or the new file, never a truncated one. The file is opened in
+        binary mode when `encoding` is None. Files that can be rebuilt from the ledger pass `durable=False`
+        to skip the fsyncs, a crash may then leave the old version.
+        """
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, 'wb') if encoding is None else open(tmp_path, 'w', encoding=encoding) as f:
+            write(f)
+            f.flush()
+            if durable:
+                os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+        if durable:
+            self.__sync_directory(path)
+
+    @staticmethod
+    def __sync_directory(path: str) -> None:
+        # Persists the rename itself. Directories cannot be opened this way on every platform.
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class BaseIndex(ABC):
+    """
+    Interface shared by the structures derived from a ledger and kept next to it, such as balance rollups and
+    key indexes.
+
+    They are updated with the delta of every add and update, and saved together with the signature of the
+    storage, so that a ledger changed without them is detected and they are rebuilt from it. While the storage
+    has no signature, such as inside a `group_commit` block whose writes are not on disk yet, changes are not
+    applied: the saved structure keeps describing the ledger on disk, and is rebuilt once the block commits.
+
+    They are written without fsync, since everything they hold can be rebuilt from the ledger. A power failure
+    may leave an old version, whose signature no longer matches, or a partly written one that `verify` rebuilds.
+    """
+
+    def change(self, position: Optional[int], old: Optional[dict[str, Any]], new: Optional[dict[str, Any]]) -> AbstractContextManager[None]:
+        """
+        Applies the replacement of record `old` by record `new` at `position` once the block, which writes it to
+        the storage, exits. `position` is None for a record added to the end of the ledger, `old` is None for an
+        add. Nothing is saved if the block raises.
+        """
+        return self.change_many([(position, old, new)])
+
+    @abstractmethod
+    def change_many(self, changes: list[Change]) -> AbstractContextManager[None]:
+        """
+        Applies several changes, in the format of `change` and in order, once the block that writes them all
+        to the storage exits, saving the structure once.
+        """
+
+    @abstractmethod
+    def rebuild(self) -> None:
+        """
+        Builds the structure again from the whole ledger and saves it.
+        """
+
+    @abstractmethod
+    def verify(self) -> bool:
+        """
+        Compares the saved structure with one built from the ledger and rebuilds it if they differ.
+
+        Returns:
+            bool: True if the saved structure was up to date.
+        """
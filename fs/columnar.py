@@ -0,0 +1,288 @@
+import mmap
+import os
+import struct
+from array import array
+from contextlib import contextmanager
+from itertools import compress, repeat
+from operator import eq
+from typing import Any, Iterable, Iterator, Optional
+from entities.dates import from_day_number, to_day_number
+from entities.record_attributes import EntityRecordAttributes
+from fs.base import BaseStorage
+
+class ColumnarFile(BaseStorage):
+    """
+    Binary ledger storage that keeps every field in its own memory-mapped column file:
+
+    - `amount.f64`: amounts as float64.
+    - `date.i32`: dates as int32 day numbers (see `entities.dates`).
+    - `category.u8`: categories as uint8 codes, the position in `EntityRecordAttributes.categories`.
+    - `description.idx` and `description.bin`: a (uint64 offset, uint64 length) pair per record pointing into a blob of UTF-8 text.
+
+    Columns use the native byte order. Balances, key lookups and date and amount ranges scan the columns
+    directly, without parsing JSON or building record objects; only matching records are decoded. Dates are read back in the
+    `YYYY-MM-DD` form, whatever form they were added in.
+    """
+
+    # Column name -> array typecode. The amount column is written last, so after an interrupted append it is the
+    # shortest; the number of records is that of the shortest column.
+    COLUMNS: dict[str, str] = {
+        "description.idx": "Q",
+        "date.i32": "i",
+        "category.u8": "B",
+        "amount.f64": "d",
+    }
+    BLOB: str = "description.bin"
+    NATIVE_QUERIES: bool = True
+
+    def __init__(self, filename: str = "data.columns") -> None:
+        super().__init__()
+        self.FILENAME: str = filename
+        self.__categories: list[str] = EntityRecordAttributes().categories
+        self.__ensure_files_exist()
+
+    def __ensure_files_exist(self) -> None:
+        os.makedirs(self.FILENAME, exist_ok=True)
+
+        for name in [*self.COLUMNS, self.BLOB]:
+            path = os.path.join(self.FILENAME, name)
+            if not os.path.exists(path):
+                open(path, 'ab').close()
+
+    def __path(self, name: str) -> str:
+        return os.path.join(self.FILENAME, name)
+
+    @contextmanager
+    def __map(self, name: str) -> Iterator[memoryview]:
+        """
+        Maps a column file read-only and exposes it as a typed memoryview of its whole slots, leaving out the
+        partial slot an interrupted append may have left at the end.
+        """
+        typecode: str = self.COLUMNS.get(name, "B")
+        itemsize: int = array(typecode).itemsize
+
+        with open(self.__path(name), 'rb') as f:
+            if os.fstat(f.fileno()).st_size < itemsize:
+                yield memoryview(array(typecode))
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)[:len(mapped) - len(mapped) % itemsize]
+                column = view.cast(typecode) if typecode != "B" else view
+                try:
+                    yield column
+                finally:
+                    column.release()
+                    view.release()
+
+    def __encode(self, record: dict[str, Any], blob_offset: int) -> tuple[dict[str, array], bytes]:
+        description: bytes = record["description"].encode('utf-8')
+
+        if record["category"] not in self.__categories:
+            raise ValueError(f"Category '{record['category']}' was not found. Available categories: {self.__categories}.")
+
+        columns: dict[str, array] = {
+            "description.idx": array("Q", [blob_offset, len(description)]),
+            "date.i32": array("i", [to_day_number(record["date"])]),
+            "category.u8": array("B", [self.__categories.index(record["category"])]),
+            # Adding 0.0 turns -0.0 into 0.0, so equal amounts always have equal bytes.
+            "amount.f64": array("d", [record["amount"] + 0.0]),
+        }
+        return columns, description
+
+    def __decode(self, index: int, amounts: memoryview, dates: memoryview, categories: memoryview, offsets: memoryview, blob: memoryview) -> dict[str, Any]:
+        offset, length = offsets[2 * index], offsets[2 * index + 1]
+
+        return {
+            "amount": amounts[index],
+            "date": from_day_number(dates[index]),
+            "category": self.__categories[categories[index]],
+            "description": bytes(blob[offset:offset + length]).decode('utf-8'),
+        }
+
+    @contextmanager
+    def __columns(self) -> Iterator[tuple[memoryview, memoryview, memoryview, memoryview, memoryview]]:
+        """
+        Maps the amount, date, category and description offset columns, all cut to the number of records, and the blob.
+        """
+        with self.__map("amount.f64") as amounts, self.__map("date.i32") as dates, self.__map("category.u8") as categories, \
+                self.__map("description.idx") as offsets, self.__map(self.BLOB) as blob:
+            count: int = min(len(amounts), len(dates), len(categories), len(offsets) // 2)
+            views: list[memoryview] = [amounts[:count], dates[:count], categories[:count], offsets[:2 * count]]
+            try:
+                yield views[0], views[1], views[2], views[3], blob
+            finally:
+                for view in views:
+                    view.release()
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        return self._stat_signature(*(self.__path(name) for name in [*self.COLUMNS, self.BLOB]))
+
+    def count(self) -> int:
+        return min(
+            os.path.getsize(self.__path(name)) // (array(typecode).itemsize * (2 if name == "description.idx" else 1))
+            for name, typecode in self.COLUMNS.items()
+        )
+
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        with self.__columns() as columns:
+            return {"list": [self.__decode(i, *columns) for i in range(len(columns[0]))]}
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        with self.__columns() as columns:
+            for i in range(len(columns[0])):
+                yield self.__decode(i, *columns)
+
+    def get_record(self, index: int) -> Optional[dict[str, Any]]:
+        with self.__columns() as columns:
+            if 0 <= index < len(columns[0]):
+                return self.__decode(index, *columns)
+        return None
+
+    def random_access(self) -> bool:
+        return True
+
+    def get_records(self, positions: Iterable[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        with self.__columns() as columns:
+            result = [(idx, self.__decode(idx, *columns)) for idx in sorted(set(positions)) if 0 <= idx < len(columns[0])]
+
+        yield from result
+
+    def write_json(self, data: dict[str, list[dict[str, Any]]]) -> None:
+        columns: dict[str, array] = {name: array(typecode) for name, typecode in self.COLUMNS.items()}
+        blob = bytearray()
+
+        for record in data["list"]:
+            encoded, description = self.__encode(record, len(blob))
+            blob += description
+            for name, values in encoded.items():
+                columns[name].extend(values)
+
+        self.__replace_binary(self.BLOB, bytes(blob))
+        for name, values in columns.items():
+            self.__replace_binary(name, values.tobytes())
+
+    def __replace_binary(self, name: str, content: bytes) -> None:
+        self._replace_file(self.__path(name), lambda f: f.write(content), encoding=None)
+
+    def append(self, record: dict[str, Any]) -> None:
+        count: int = self.count()
+        encoded, description = self.__encode(record, os.path.getsize(self.__path(self.BLOB)))
+
+        with open(self.__path(self.BLOB), 'ab') as f:
+            f.write(description)
+            self._sync(self.__path(self.BLOB), f)
+
+        for name, values in encoded.items():
+            # Writing at the slot of the new record drops whatever an interrupted append left behind.
+            with open(self.__path(name), 'r+b') as f:
+                f.seek(count * values.itemsize * len(values))
+                f.write(values.tobytes())
+                f.truncate()
+                self._sync(self.__path(name), f)
+
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        if index < 0 or index >= self.count():
+            return False
+
+        # The new description is appended to the blob, the old text stays there until the next compaction.
+        encoded, description = self.__encode(record, os.path.getsize(self.__path(self.BLOB)))
+
+        with open(self.__path(self.BLOB), 'ab') as f:
+            f.write(description)
+            self._sync(self.__path(self.BLOB), f)
+
+        for name, values in encoded.items():
+            with open(self.__path(name), 'r+b') as f:
+                f.seek(index * values.itemsize * len(values))
+                f.write(values.tobytes())
+                self._sync(self.__path(name), f)
+
+        return True
+
+    def totals(self) -> dict[str, float]:
+        result: dict[str, float] = {}
+
+        with self.__columns() as (amounts, _, categories, _, _):
+            for code, category in enumerate(self.__categories):
+                result[category] = sum(compress(amounts, map(eq, categories, repeat(code))))
+            result["count"] = len(amounts)
+
+        return result
+
+    def daily_totals(self) -> dict[int, dict[str, float]]:
+        result: dict[int, dict[str, float]] = {}
+
+        with self.__columns() as (amounts, dates, categories, _, _):
+            for amount, day, code in zip(amounts, dates, categories):
+                totals = result.setdefault(day, {"count": 0})
+                totals["count"] += 1
+                totals[self.__categories[code]] = totals.get(self.__categories[code], 0.0) + amount
+
+        return result
+
+    def select_range(self, start: Optional[int], end: Optional[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        with self.__columns() as columns:
+            amounts, dates = columns[0], columns[1]
+            matches = sorted((day, idx) for idx, day in zip(range(len(amounts)), dates) if self._within(day, start, end))
+            result = [(idx, self.__decode(idx, *columns)) for _, idx in matches]
+
+        return iter(result)
+
+    def select_amount_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        category: Optional[str] = None,
+        strict: bool = False
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        if category is not None and category not in self.__categories:
+            return iter([])
+
+        code: Optional[int] = None if category is None else self.__categories.index(category)
+
+        with self.__columns() as columns:
+            amounts, categories = columns[0], columns[2]
+            matches = sorted(
+                (amount, idx) for idx, (amount, value) in enumerate(zip(amounts, categories))
+                if (code is None or value == code) and self._within(amount, minimum, maximum, strict)
+            )
+            result = [(idx, self.__decode(idx, *columns)) for _, idx in matches]
+
+        return iter(result)
+
+    def select(self, by: str, value: float | str) -> list[tuple[int, dict[str, Any]]]:
+        if by == "amount":
+            name, needle = "amount.f64", struct.pack("d", float(value) + 0.0)
+        elif by == "date":
+            name, needle = "date.i32", struct.pack("i", to_day_number(str(value)))
+        elif by == "category" and value in self.__categories:
+            name, needle = "category.u8", struct.pack("B", self.__categories.index(str(value)))
+        else:
+            return []
+
+        with self.__columns() as columns:
+            return [(idx, self.__decode(idx, *columns)) for idx in self.__find(name, needle) if idx < len(columns[0])]
+
+    def __find(self, name: str, needle: bytes) -> list[int]:
+        """
+        Searches a column for an encoded value with `mmap.find`, keeping only hits aligned to a column slot.
+        """
+        width: int = len(needle)
+        result: list[int] = []
+
+        with open(self.__path(name), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return result
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                position: int = mapped.find(needle)
+
+                while position != -1:
+                    if position % width == 0:
+                        result.append(position // width)
+                        position = mapped.find(needle, position + width)
+                    else:
+                        position = mapped.find(needle, position + 1)
+
+        return result
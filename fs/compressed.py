@@ -0,0 +1,334 @@
+import json
+import lzma
+import os
+import zlib
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, TextIO
+from entities.dates import to_day_number
+from entities.record_attributes import EntityRecordAttributes
+from fs.base import BaseStorage
+
+class CompressedFile(BaseStorage):
+    """
+    Ledger storage that packs records into independently compressed blocks of `block_size` records.
+
+    The block index `data.blocks` names the data file the blocks are appended to and keeps, for every block, its
+    position in that file and a summary of its records: the range of dates and amounts, and the count and total
+    per category. Records added since the last full block are kept uncompressed in the index until they fill a
+    new block. Rewriting the ledger creates a new data file and switches the index to it in one step.
+
+    Queries read the summaries first and decompress only the blocks that can hold matching records: balances
+    need no decompression at all, reading one record decompresses a single block, and key lookups and date and
+    amount ranges skip the blocks whose summary rules them out. A block rewritten by an
+    update is appended to the end of the file, the old copy is dropped by `compact`.
+    """
+
+    CODECS: dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+        "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+        "lzma": (lzma.compress, lzma.decompress),
+    }
+
+    NATIVE_QUERIES: bool = True
+
+    def __init__(self, filename: str = "data.blocks", codec: str = "zlib", block_size: int = 512) -> None:
+        """
+        Args:
+            filename (str): The block index, the data files are stored next to it.
+            codec (str): The compression used for new ledgers, 'zlib' or 'lzma'. An existing ledger keeps its own.
+            block_size (int): The number of records per block.
+        """
+        super().__init__()
+
+        if codec not in self.CODECS:
+            raise ValueError(f"Unknown codec '{codec}'. Available codecs: {list(self.CODECS)}.")
+
+        self.FILENAME: str = filename
+        self.block_size: int = block_size
+        self.__categories: list[str] = EntityRecordAttributes().categories
+        # The index changed inside a `group_commit` block, saved once when the block exits.
+        self.__pending_index: Optional[dict[str, Any]] = None
+        self.__ensure_files_exist(codec)
+
+    def __ensure_files_exist(self, codec: str) -> None:
+        if not os.path.exists(self.FILENAME):
+            open(self.__data_path(0), 'ab').close()
+            self.__write_index({"codec": codec, "generation": 0, "blocks": [], "tail": []})
+
+    def __data_path(self, generation: int) -> str:
+        return f"{self.FILENAME}.{generation}.bin"
+
+    def __read_index(self) -> dict[str, Any]:
+        if self.__pending_index is not None:
+            return self.__pending_index
+
+        with open(self.FILENAME, 'r', encoding='utf-8') as f:
+            index: dict[str, Any] = json.load(f)
+
+        return index
+
+    def __write_index(self, index: dict[str, Any]) -> None:
+        if self._group_depth > 0:
+            self.__pending_index = index
+            return
+
+        self.__save_index(index)
+
+    def __save_index(self, index: dict[str, Any]) -> None:
+        def write(f: TextIO) -> None:
+            json.dump(index, f, ensure_ascii=False)
+
+        self._replace_file(self.FILENAME, write)
+
+    def __summarize(self, records: list[dict[str, Any]]) -> dict[str, Any]:
+        days: list[int] = [to_day_number(record["date"]) for record in records]
+        amounts: list[float] = [record["amount"] for record in records]
+        counts: dict[str, int] = {category: 0 for category in self.__categories}
+        totals: dict[str, float] = {category: 0.0 for category in self.__categories}
+
+        for record in records:
+            counts[record["category"]] += 1
+            totals[record["category"]] += record["amount"]
+
+        return {
+            "count": len(records),
+            "min_day": min(days),
+            "max_day": max(days),
+            "min_amount": min(amounts),
+            "max_amount": max(amounts),
+            "counts": counts,
+            "totals": totals,
+        }
+
+    def __write_block(self, index: dict[str, Any], records: list[dict[str, Any]], f: BinaryIO) -> dict[str, Any]:
+        """
+        Compresses `records` into a block at the end of the data file open as `f` and returns its index entry.
+        """
+        compress = self.CODECS[index["codec"]][0]
+        data: bytes = compress(json.dumps(records, ensure_ascii=False).encode('utf-8'))
+        offset: int = f.seek(0, os.SEEK_END)
+        f.write(data)
+
+        return {"offset": offset, "length": len(data), **self.__summarize(records)}
+
+    def __append_block(self, index: dict[str, Any], records: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Writes a block of `records` to the end of the current data file and syncs it.
+        """
+        path: str = self.__data_path(index["generation"])
+
+        with open(path, 'ab') as f:
+            block = self.__write_block(index, records, f)
+            self._sync(path, f)
+
+        return block
+
+    def __read_block(self, index: dict[str, Any], block: dict[str, Any]) -> list[dict[str, Any]]:
+        decompress = self.CODECS[index["codec"]][1]
+
+        with open(self.__data_path(index["generation"]), 'rb') as f:
+            f.seek(block["offset"])
+            records: list[dict[str, Any]] = json.loads(decompress(f.read(block["length"])))
+
+        return records
+
+    def __locate(self, index: dict[str, Any], position: int) -> Optional[tuple[Optional[int], int]]:
+        """
+        Returns the block holding the record at `position` (None for the uncompressed tail) and the index of the
+        record inside it, or None if there is no such record.
+        """
+        start: int = 0
+
+        if position < 0:
+            return None
+
+        for number, block in enumerate(index["blocks"]):
+            if position < start + block["count"]:
+                return number, position - start
+            start += block["count"]
+
+        if position - start < len(index["tail"]):
+            return None, position - start
+        return None
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        if self.__pending_index is not None:
+            return None
+        # Every change rewrites the block index.
+        return self._stat_signature(self.FILENAME)
+
+    def count(self) -> int:
+        index = self.__read_index()
+        return sum(block["count"] for block in index["blocks"]) + len(index["tail"])
+
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        return {"list": list(self.iter_records())}
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        index = self.__read_index()
+
+        for block in index["blocks"]:
+            yield from self.__read_block(index, block)
+        yield from index["tail"]
+
+    def get_record(self, index: int) -> Optional[dict[str, Any]]:
+        block_index = self.__read_index()
+        location = self.__locate(block_index, index)
+
+        if location is None:
+            return None
+
+        number, local = location
+        if number is None:
+            return block_index["tail"][local]
+        return self.__read_block(block_index, block_index["blocks"][number])[local]
+
+    def random_access(self) -> bool:
+        return True
+
+    def get_records(self, positions: Iterable[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        index = self.__read_index()
+        # Positions are sorted, so each block is decompressed at most once.
+        block: Optional[tuple[int, list[dict[str, Any]]]] = None
+
+        for position in sorted(set(positions)):
+            location = self.__locate(index, position)
+
+            if location is None:
+                continue
+
+            number, local = location
+            if number is None:
+                yield position, index["tail"][local]
+                continue
+
+            if block is None or block[0] != number:
+                block = number, self.__read_block(index, index["blocks"][number])
+            yield position, block[1][local]
+
+    def write_json(self, data: dict[str, list[dict[str, Any]]]) -> None:
+        old_index = self.__read_index()
+        index: dict[str, Any] = {"codec": old_index["codec"], "generation": old_index["generation"] + 1, "blocks": [], "tail": []}
+        records = data["list"]
+        full: int = len(records) - len(records) % self.block_size
+
+        # The blocks go to a new data file, the old one stays in use until the index is switched. They are synced
+        # together, once, before the index that points to them is saved.
+        with open(self.__data_path(index["generation"]), 'wb') as f:
+            for start in range(0, full, self.block_size):
+                index["blocks"].append(self.__write_block(index, records[start:start + self.block_size], f))
+            os.fsync(f.fileno())
+        index["tail"] = records[full:]
+
+        # A rewrite is saved at once even inside `group_commit`, since the old data file is removed right after.
+        self.__pending_index = None
+        self.__save_index(index)
+        os.remove(self.__data_path(old_index["generation"]))
+
+    def append(self, record: dict[str, Any]) -> None:
+        index = self.__read_index()
+        index["tail"].append(record)
+
+        if len(index["tail"]) >= self.block_size:
+            index["blocks"].append(self.__append_block(index, index["tail"]))
+            index["tail"] = []
+
+        self.__write_index(index)
+
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        block_index = self.__read_index()
+        location = self.__locate(block_index, index)
+
+        if location is None:
+            return False
+
+        number, local = location
+        if number is None:
+            block_index["tail"][local] = record
+        else:
+            records = self.__read_block(block_index, block_index["blocks"][number])
+            records[local] = record
+            block_index["blocks"][number] = self.__append_block(block_index, records)
+
+        self.__write_index(block_index)
+        return True
+
+    def totals(self) -> dict[str, float]:
+        index = self.__read_index()
+        result: dict[str, float] = {category: 0.0 for category in self.__categories}
+        result["count"] = len(index["tail"])
+
+        for block in index["blocks"]:
+            result["count"] += block["count"]
+            for category, total in block["totals"].items():
+                result[category] += total
+
+        for record in index["tail"]:
+            result[record["category"]] += record["amount"]
+
+        return result
+
+    def __scan(self, may_contain: Callable[[dict[str, Any]], bool]) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Yields the records of the blocks whose summary `may_contain` accepts and of the tail, with their positions.
+        """
+        index = self.__read_index()
+        start: int = 0
+
+        for block in index["blocks"]:
+            if may_contain(block):
+                yield from enumerate(self.__read_block(index, block), start)
+            start += block["count"]
+
+        yield from enumerate(index["tail"], start)
+
+    def select(self, by: str, value: float | str) -> list[tuple[int, dict[str, Any]]]:
+        if by == "date":
+            day: int = to_day_number(str(value))
+            matches: Callable[[dict[str, Any]], bool] = lambda record: to_day_number(record["date"]) == day
+            may_contain: Callable[[dict[str, Any]], bool] = lambda block: block["min_day"] <= day <= block["max_day"]
+        elif by == "amount":
+            matches = lambda record: record["amount"] == value
+            may_contain = lambda block: block["min_amount"] <= value <= block["max_amount"]
+        else:
+            matches = lambda record: record[by] == value
+            may_contain = lambda block: block["counts"].get(value, 0) > 0
+
+        return [(idx, record) for idx, record in self.__scan(may_contain) if matches(record)]
+
+    def select_range(self, start: Optional[int], end: Optional[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        matches: list[tuple[int, int, dict[str, Any]]] = []
+        may_contain: Callable[[dict[str, Any]], bool] = lambda block: \
+            (start is None or block["max_day"] >= start) and (end is None or block["min_day"] <= end)
+
+        for idx, record in self.__scan(may_contain):
+            day: int = to_day_number(record["date"])
+            if self._within(day, start, end):
+                matches.append((day, idx, record))
+
+        matches.sort(key=lambda match: match[:2])
+        return ((idx, record) for _, idx, record in matches)
+
+    def select_amount_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        category: Optional[str] = None,
+        strict: bool = False
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        matches: list[tuple[float, int, dict[str, Any]]] = []
+        may_contain: Callable[[dict[str, Any]], bool] = lambda block: \
+            (category is None or block["counts"].get(category, 0) > 0) and \
+            (minimum is None or block["max_amount"] >= minimum) and (maximum is None or block["min_amount"] <= maximum)
+
+        for idx, record in self.__scan(may_contain):
+            if (category is None or record["category"] == category) and self._within(record["amount"], minimum, maximum, strict):
+                matches.append((record["amount"], idx, record))
+
+        matches.sort(key=lambda match: match[:2])
+        return ((idx, record) for _, idx, record in matches)
+
+    def _commit(self) -> None:
+        super()._commit()
+
+        if self.__pending_index is not None:
+            index, self.__pending_index = self.__pending_index, None
+            self.__save_index(index)
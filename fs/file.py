@@ -0,0 +1,296 @@
+import json
+import os
+import re
+from typing import Any, Iterable, Iterator, Optional, TextIO
+from fs.base import BaseStorage
+
+CHUNK_SIZE: int = 64 * 1024
+# Documents up to this many bytes are parsed whole and kept in memory between reads, larger ones are streamed.
+CACHE_SIZE: int = 16 * 1024 * 1024
+
+def stream_list(path: str, key: str = "list", chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yields the items of the `key` list of the JSON object stored at `path` one at a time, reading the file
+    in chunks of `chunk_size` characters. Memory use is bounded by the largest item, not by the document.
+
+    Raises:
+        ValueError: If the document is not a JSON object with a `key` list.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _ChunkReader(f, chunk_size)
+
+        reader.expect("{")
+        while True:
+            name = reader.decode(decoder)
+            reader.expect(":")
+
+            if name == key:
+                break
+
+            reader.decode(decoder)
+            reader.expect(",")
+
+        reader.expect("[")
+        if reader.separator() == "]":
+            return
+
+        yield from reader.items(decoder)
+
+class _ChunkReader:
+    """
+    A buffered view over a text file that decodes JSON values as soon as they are complete.
+    """
+
+    WHITESPACE = re.compile(r'\s*')
+    ITEM_SEPARATOR = re.compile(r'\s*([,\]]?)\s*')
+
+    def __init__(self, f: TextIO, chunk_size: int) -> None:
+        self.__f = f
+        self.__chunk_size = chunk_size
+        self.__buffer: str = ""
+        self.__pos: int = 0
+
+    def __fill(self) -> bool:
+        chunk = self.__f.read(self.__chunk_size)
+
+        if not chunk:
+            return False
+
+        self.__buffer = self.__buffer[self.__pos:] + chunk
+        self.__pos = 0
+        return True
+
+    def __next_char(self) -> str:
+        """
+        Skips whitespace and returns the character at the current position without consuming it.
+        """
+        while True:
+            self.__pos = self.WHITESPACE.match(self.__buffer, self.__pos).end()
+
+            if self.__pos < len(self.__buffer):
+                return self.__buffer[self.__pos]
+
+            if not self.__fill():
+                raise ValueError("Unexpected end of the JSON document.")
+
+    def expect(self, char: str) -> None:
+        if self.__next_char() != char:
+            raise ValueError(f"Expected '{char}' at the current position of the JSON document.")
+        self.__pos += 1
+
+    def separator(self) -> str:
+        """
+        Consumes the list separator (',' or ']') at the current position, or nothing if the list continues without one.
+        """
+        char = self.__next_char()
+
+        if char in ",]":
+            self.__pos += 1
+            return char
+        return ""
+
+    def items(self, decoder: json.JSONDecoder) -> Iterator[Any]:
+        """
+        Yields the items of a list up to its closing bracket. Items are decoded straight from the buffer,
+        with a single regex match for the separator that follows each of them.
+        """
+        separator = self.ITEM_SEPARATOR
+
+        while True:
+            buffer, pos = self.__buffer, self.__pos
+
+            try:
+                while True:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    match = separator.match(buffer, end)
+
+                    if match.end() == len(buffer):
+                        # The separator or the next item may continue in the next chunk.
+                        break
+
+                    yield value
+                    pos = match.end()
+
+                    if match.group(1) == "]":
+                        return
+                    if not match.group(1):
+                        raise ValueError("Expected ',' or ']' between the items of the JSON list.")
+            except json.JSONDecodeError:
+                pass
+
+            self.__pos = pos
+            yield self.decode(decoder)
+
+            char = self.separator()
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError("Expected ',' or ']' between the items of the JSON list.")
+            self.__next_char()
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        self.__next_char()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.__buffer, self.__pos)
+                # A number running up to the end of the buffer may continue in the next chunk.
+                if end < len(self.__buffer) or not isinstance(value, (int, float)):
+                    self.__pos = end
+                    return value
+            except json.JSONDecodeError:
+                pass
+
+            if not self.__fill():
+                try:
+                    value, self.__pos = decoder.raw_decode(self.__buffer, self.__pos)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON document: {e}")
+                return value
+
+class File(BaseStorage):
+    """
+    Ledger storage in a single JSON document, `{"list": [...]}`.
+
+    The parsed document is kept in memory between reads and reused for as long as the file keeps the
+    inode, size and modification time it had when it was read, so repeated queries do not parse the file
+    again until it changes. Writes made through this object refresh the cache themselves; `invalidate`
+    drops it, for changes that cannot be seen in the file attributes.
+    """
+
+    def __init__(self, filename: str = "data.json", cache_size: int = CACHE_SIZE) -> None:
+        """
+        Args:
+            filename (str): The JSON document holding the ledger.
+            cache_size (int): The largest file, in bytes, whose parsed document is cached. Larger files are streamed on every read.
+        """
+        super().__init__()
+        self.FILENAME: str = filename
+        self.cache_size: int = cache_size
+        # The document written inside a `group_commit` block, saved once when the block exits.
+        self.__pending: Optional[dict[str, list[dict[str, Any]]]] = None
+        # The signature of the file and the records parsed from it.
+        self.__cache: Optional[tuple[tuple[int, ...], list[dict[str, Any]]]] = None
+        self.__ensure_file_exists()
+
+    def __ensure_file_exists(self) -> None:
+        if not os.path.exists(self.FILENAME):
+            with open(self.FILENAME, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "list": []
+                }, f, ensure_ascii=False)
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        if self.__pending is not None:
+            return None
+        return self._stat_signature(self.FILENAME)
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached document, so the next read parses the file again.
+        """
+        self.__cache = None
+
+    def __cached(self) -> Optional[list[dict[str, Any]]]:
+        """
+        Returns the cached records if the file has not changed since they were read.
+        """
+        if self.__cache is not None and self.__cache[0] == self.signature():
+            return self.__cache[1]
+
+        self.__cache = None
+        return None
+
+    def write_json(self, data: dict[str, list[dict[str, Any]]], encoding='utf-8') -> None:
+        if self._group_depth > 0:
+            self.__pending = data
+            return
+
+        self.__cache = None
+        # `json.dumps` encodes in C, `json.dump` falls back to the much slower pure Python encoder.
+        self._replace_file(self.FILENAME, lambda f: f.write(json.dumps(data, ensure_ascii=False)), encoding)
+
+        signature = self.signature()
+        if signature is not None and signature[1] <= self.cache_size:
+            # A copy of the list, so later changes to `data` by the caller do not leak into the cache.
+            self.__cache = signature, list(data["list"])
+
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        if self.__pending is not None:
+            return self.__pending
+
+        records = self.__cached()
+        if records is not None:
+            # Callers may change the returned list before writing it back, the cache keeps its own.
+            return {"list": list(records)}
+
+        signature = self.signature()
+
+        with open(self.FILENAME, 'r', encoding='utf-8') as f:
+            data: dict[str, list[dict[str, Any]]] = json.load(f)
+
+        if signature is not None and signature == self.signature() and signature[1] <= self.cache_size:
+            self.__cache = signature, list(data["list"])
+
+        return data
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        if self.__pending is not None:
+            yield from self.__pending["list"]
+            return
+
+        records = self.__cached()
+        if records is None:
+            signature = self.signature()
+            if signature is None or signature[1] > self.cache_size:
+                yield from stream_list(self.FILENAME)
+                return
+            records = self.read_json()["list"]
+
+        yield from records
+
+    def random_access(self) -> bool:
+        # Large files are streamed on every read instead of being cached.
+        signature = self.signature()
+        return self.__pending is not None or (signature is not None and signature[1] <= self.cache_size)
+
+    def get_records(self, positions: Iterable[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        records = self.__pending["list"] if self.__pending is not None else self.__cached()
+
+        if records is None:
+            signature = self.signature()
+            if signature is None or signature[1] > self.cache_size:
+                yield from super().get_records(positions)
+                return
+            records = self.read_json()["list"]
+
+        for position in sorted(set(positions)):
+            if 0 <= position < len(records):
+                yield position, records[position]
+
+    def _commit(self) -> None:
+        # Every write of the block is folded into a single rewrite of the document.
+        if self.__pending is not None:
+            data, self.__pending = self.__pending, None
+            self.write_json(data)
+
+    def append(self, record: dict[str, Any]) -> None:
+        data = self.read_json()
+
+        if data is None or "list" not in data:
+            data = {"list": []}
+
+        data["list"].append(record)
+        self.write_json(data)
+
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        data = self.read_json()
+
+        if index < 0 or index >= len(data["list"]):
+            return False
+
+        data["list"][index] = record
+        self.write_json(data)
+        return True
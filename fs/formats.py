@@ -0,0 +1,69 @@
+import csv
+import json
+from typing import Any, Iterable, Iterator, TextIO
+
+# The fields of a record, in the order of the columns of CSV files.
+FIELDS: list[str] = ["amount", "category", "date", "description"]
+FORMATS: list[str] = ["csv", "jsonl"]
+
+def read_rows(f: TextIO, format: str) -> Iterator[Any]:
+    """
+    Yields the rows of an import file one at a time, without reading the whole file.
+
+    CSV files start with a header row naming the fields and give every value as a string. JSON Lines files hold
+    one object per line, blank lines are skipped and a line that is not valid JSON is yielded as the raw line,
+    so that it is reported as an invalid row instead of stopping the import.
+
+    Args:
+        f (TextIO): The file, opened in text mode. CSV files should be opened with `newline=''`.
+        format (str): 'csv' or 'jsonl'.
+
+    Returns:
+        Iterator[Any]: The rows, dictionaries keyed by field for valid input.
+    """
+    if format == "csv":
+        yield from csv.DictReader(f)
+    elif format == "jsonl":
+        decoder = json.JSONDecoder()
+
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield decoder.decode(line)
+            except ValueError:
+                yield line
+    else:
+        raise ValueError(f"Unknown format '{format}'. Available formats: {FORMATS}.")
+
+def write_rows(f: TextIO, records: Iterable[dict[str, Any]], format: str) -> int:
+    """
+    Writes records to an export file as they are read, in a form `read_rows` reads back.
+
+    Args:
+        f (TextIO): The file, opened in text mode. CSV files should be opened with `newline=''`.
+        records (Iterable[dict[str, Any]]): The records, in the storage format.
+        format (str): 'csv' or 'jsonl'.
+
+    Returns:
+        int: The number of records written.
+    """
+    count: int = 0
+
+    if format == "csv":
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+
+        for record in records:
+            writer.writerow([record[field] for field in FIELDS])
+            count += 1
+    elif format == "jsonl":
+        encoder = json.JSONEncoder(ensure_ascii=False)
+
+        for record in records:
+            f.write(encoder.encode({field: record[field] for field in FIELDS}) + "\n")
+            count += 1
+    else:
+        raise ValueError(f"Unknown format '{format}'. Available formats: {FORMATS}.")
+
+    return count
@@ -0,0 +1,721 @@
+import heapq
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import zlib
+from abc import abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import ExitStack, contextmanager
+from itertools import zip_longest
+from typing import IO, Any, Iterable, Iterator, Optional, TextIO
+from entities.dates import to_day_number
+from entities.record_attributes import EntityRecordAttributes
+from entities.text import tokenize
+from fs.base import BaseIndex, BaseStorage, Change
+
+class DirectoryIndex(BaseIndex):
+    """
+    Base of the indexes kept in a `<FILENAME><SUFFIX>` directory next to the ledger.
+
+    `manifest.json` in the directory holds the number of indexed records and the signature of the storage
+    they were read from. If the ledger is changed without the index, the signatures differ and the index is
+    rebuilt from the ledger on the next lookup.
+    """
+
+    SUFFIX: str
+    MANIFEST: str = "manifest.json"
+    # The number of lines a rebuild buffers before appending them to the files of the index.
+    FLUSH_LINES: int = 65536
+
+    def __init__(self, storage: BaseStorage) -> None:
+        """
+        Args:
+            storage (BaseStorage): The storage whose records are indexed.
+        """
+        self._storage = storage
+        self.FILENAME: str = f"{storage.FILENAME}{self.SUFFIX}"
+
+    def _load_manifest(self) -> Optional[dict[str, Any]]:
+        """
+        Returns the manifest, or None if it is missing or does not describe the current ledger.
+        """
+        signature = self._storage.signature()
+
+        try:
+            with open(os.path.join(self.FILENAME, self.MANIFEST), 'r', encoding='utf-8') as f:
+                manifest: dict[str, Any] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if signature is None or manifest.get("signature") != list(signature):
+            return None
+        return manifest
+
+    def _save_manifest(self, count: int) -> None:
+        signature = self._storage.signature()
+
+        def write(f: TextIO) -> None:
+            json.dump({"signature": signature, "count": count}, f, ensure_ascii=False)
+
+        self._storage._replace_file(os.path.join(self.FILENAME, self.MANIFEST), write, durable=False)
+
+    def _reset(self) -> None:
+        """
+        Empties the directory before a rebuild. The manifest goes with it, so an interrupted rebuild is never
+        taken for a valid index.
+        """
+        shutil.rmtree(self.FILENAME, ignore_errors=True)
+        os.makedirs(self.FILENAME)
+
+    def _append_lines(self, lines: dict[str, list[str]]) -> None:
+        """
+        Appends `+<value>\\t<position>` and `-<value>\\t<position>` lines to log files, given by path.
+        """
+        for path, file_lines in lines.items():
+            with open(path, 'a+b') as f:
+                # An interrupted append may have left a line without its newline, start a new line after it.
+                size: int = f.seek(0, os.SEEK_END)
+                if size > 0:
+                    f.seek(size - 1)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+
+                f.write("".join(file_lines).encode('utf-8'))
+
+    @staticmethod
+    def _replay_lines(path: str, prefix: str = "") -> dict[str, set[int]]:
+        """
+        Replays a log file written by `_append_lines` into the positions of each of its values, keeping only
+        the values whose line starts with `prefix`.
+        """
+        positions: dict[str, set[int]] = {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line[1:].startswith(prefix):
+                        continue
+
+                    try:
+                        value, position = line[1:].split("\t")
+                        if line[0] == "+":
+                            positions.setdefault(value, set()).add(int(position))
+                        elif line[0] == "-":
+                            positions.setdefault(value, set()).discard(int(position))
+                    except ValueError:
+                        # The tail of an interrupted append.
+                        continue
+        except FileNotFoundError:
+            pass
+
+        return positions
+
+    def _ensure_current(self) -> None:
+        """
+        Rebuilds the index if it does not describe the current ledger.
+        """
+        if self._load_manifest() is None:
+            with self._storage.locked(exclusive=True):
+                self.rebuild()
+
+class KeyIndex(DirectoryIndex):
+    """
+    Persistent hash indexes from the amount, the category and the date of a record to its positions, kept
+    next to the ledger in the `<FILENAME>.index` directory.
+
+    Every key has its own subdirectory of `BUCKETS` bucket files, and a value is hashed into one of them. A
+    bucket is a log of `+<value>\\t<position>` and `-<value>\\t<position>` lines: adds and updates append a
+    line to the bucket of each value they add or remove, and a lookup reads a single bucket.
+
+    Positions must be stable, see `BaseStorage.STABLE_POSITIONS`.
+    """
+
+    SUFFIX: str = ".index"
+    KEYS: tuple[str, ...] = ("amount", "category", "date")
+    BUCKETS: int = 64
+
+    @staticmethod
+    def value(by: str, value: Any) -> str:
+        """
+        Returns the indexed form of a value: dates as day numbers and amounts in their shortest exact form,
+        so that equal values always have equal keys.
+        """
+        if by == "date":
+            return str(to_day_number(str(value)))
+        if by == "amount":
+            # Adding 0.0 turns -0.0 into 0.0.
+            return repr(float(value) + 0.0)
+        return str(value)
+
+    def __bucket(self, by: str, value: str) -> str:
+        return os.path.join(self.FILENAME, by, f"{zlib.crc32(value.encode('utf-8')) % self.BUCKETS:02x}.log")
+
+    def rebuild(self) -> None:
+        lines: dict[str, list[str]] = {}
+        buffered: int = 0
+        count: int = 0
+
+        self._reset()
+        for by in self.KEYS:
+            os.makedirs(os.path.join(self.FILENAME, by))
+
+        for position, record in enumerate(self._storage.iter_records()):
+            count += 1
+            for by in self.KEYS:
+                value = self.value(by, record[by])
+                lines.setdefault(self.__bucket(by, value), []).append(f"+{value}\t{position}\n")
+
+            buffered += len(self.KEYS)
+            if buffered >= self.FLUSH_LINES:
+                self._append_lines(lines)
+                lines, buffered = {}, 0
+
+        self._append_lines(lines)
+        self._save_manifest(count)
+
+    def lookup(self, by: str, value: Any) -> list[int]:
+        """
+        Finds the positions of the records whose `by` field equals `value`, rebuilding the indexes first if they are out of date.
+
+        Args:
+            by (str): The field to compare ('amount', 'category' or 'date').
+            value (Any): The value to search for.
+
+        Returns:
+            list[int]: The positions of the matching records, in ascending order.
+        """
+        self._ensure_current()
+
+        value = self.value(by, value)
+        return sorted(self._replay_lines(self.__bucket(by, value), f"{value}\t").get(value, ()))
+
+    def verify(self) -> bool:
+        expected: dict[tuple[str, str], set[int]] = {}
+        actual: dict[tuple[str, str], set[int]] = {}
+
+        for position, record in enumerate(self._storage.iter_records()):
+            for by in self.KEYS:
+                expected.setdefault((by, self.value(by, record[by])), set()).add(position)
+
+        for by in self.KEYS:
+            directory = os.path.join(self.FILENAME, by)
+            for name in os.listdir(directory) if os.path.isdir(directory) else ():
+                for value, positions in self._replay_lines(os.path.join(directory, name)).items():
+                    if positions:
+                        actual[(by, value)] = positions
+
+        # Every indexed value must list exactly the positions of its records, and no other value may be left.
+        valid: bool = self._load_manifest() is not None and actual == expected
+
+        if not valid:
+            self.rebuild()
+
+        return valid
+
+    @contextmanager
+    def change_many(self, changes: list[Change]) -> Iterator[None]:
+        manifest = self._load_manifest()
+
+        yield
+
+        if self._storage.signature() is None:
+            # The writes of the block are held back by `group_commit`, see `BaseIndex`.
+            return
+
+        if manifest is None:
+            self.rebuild()
+            return
+
+        lines: dict[str, list[str]] = {}
+
+        for position, old, new in changes:
+            if position is None:
+                position = manifest["count"]
+                manifest["count"] += 1
+
+            for by in self.KEYS:
+                before = None if old is None else self.value(by, old[by])
+                after = None if new is None else self.value(by, new[by])
+
+                if before == after:
+                    continue
+                if before is not None:
+                    lines.setdefault(self.__bucket(by, before), []).append(f"-{before}\t{position}\n")
+                if after is not None:
+                    lines.setdefault(self.__bucket(by, after), []).append(f"+{after}\t{position}\n")
+
+        self._append_lines(lines)
+        self._save_manifest(manifest["count"])
+
+class SortedIndex(DirectoryIndex):
+    """
+    Base of the persistent indexes that keep the records sorted by a numeric key, for range queries. The
+    records can be split into partitions with separate files, such as one per category.
+
+    `<partition>.sorted.bin` holds the keys of the records of a partition in ascending order, as an array of
+    `TYPECODE`, followed by their positions as int64, both in the native byte order. Records with equal keys
+    are sorted by position. A range is found by binary search over the memory-mapped keys. Adds and updates
+    do not rewrite the sorted arrays: they append (operation, key, position) triples of `TYPECODE` to
+    `<partition>.changes.bin`, +1 for an entry added and -1 for one removed, which are merged into the sorted
+    arrays once there are more than `MERGE_THRESHOLD` of them.
+
+    A rebuild reads the ledger once into runs of at most `RUN_SIZE` entries per partition, sorts every run and
+    writes it to a temporary file in the same layout, then merges the runs into the sorted arrays. It holds a
+    single run in memory, whatever the size of the ledger.
+
+    Positions must be stable, see `BaseStorage.STABLE_POSITIONS`.
+    """
+
+    TYPECODE: str
+    PARTITIONS: tuple[str, ...] = ("all",)
+    MERGE_THRESHOLD: int = 4096
+    RUN_SIZE: int = 65536
+
+    @abstractmethod
+    def key(self, record: dict[str, Any]) -> float:
+        """
+        Returns the value a record is sorted by.
+        """
+
+    def partition(self, record: dict[str, Any]) -> str:
+        """
+        Returns the partition a record belongs to.
+        """
+        return self.PARTITIONS[0]
+
+    def __path(self, partition: str, kind: str) -> str:
+        return os.path.join(self.FILENAME, f"{partition}.{kind}.bin")
+
+    def __runs(self, directory: str) -> tuple[dict[str, list[str]], int]:
+        """
+        Reads the ledger into sorted runs of every partition, written to `directory`.
+
+        Returns:
+            tuple[dict[str, list[str]], int]: The paths of the runs of every partition, in ledger order, and
+            the number of records.
+        """
+        runs: dict[str, list[str]] = {partition: [] for partition in self.PARTITIONS}
+        keys: dict[str, array] = {partition: array(self.TYPECODE) for partition in self.PARTITIONS}
+        positions: dict[str, array] = {partition: array("q") for partition in self.PARTITIONS}
+
+        def write_run(partition: str) -> None:
+            # The positions of a run are ascending, so a stable sort keeps them in order within a key.
+            order = sorted(range(len(keys[partition])), key=keys[partition].__getitem__)
+            path = os.path.join(directory, f"{partition}.{len(runs[partition])}.bin")
+
+            with open(path, 'wb') as f:
+                f.write(array(self.TYPECODE, map(keys[partition].__getitem__, order)).tobytes())
+                f.write(array("q", map(positions[partition].__getitem__, order)).tobytes())
+
+            runs[partition].append(path)
+            keys[partition], positions[partition] = array(self.TYPECODE), array("q")
+
+        count: int = 0
+
+        for position, record in enumerate(self._storage.iter_records()):
+            count += 1
+            partition = self.partition(record)
+            keys[partition].append(self.key(record))
+            positions[partition].append(position)
+
+            if len(keys[partition]) >= self.RUN_SIZE:
+                write_run(partition)
+
+        for partition in self.PARTITIONS:
+            if keys[partition]:
+                write_run(partition)
+
+        return runs, count
+
+    @contextmanager
+    def __merge(self, runs: list[str]) -> Iterator[Iterator[tuple[float, int]]]:
+        """
+        Maps the runs of a partition and merges them into its sorted (key, position) entries.
+        """
+        with ExitStack() as stack:
+            yield heapq.merge(*(zip(*stack.enter_context(self.__map(path))) for path in runs))
+
+    def __write_sorted(self, partition: str, entries: Iterable[tuple[float, int]]) -> None:
+        def write(f: IO[bytes]) -> None:
+            # The keys go straight to the file, the positions that follow them wait in a temporary one.
+            with tempfile.TemporaryFile() as positions_file:
+                keys, positions = array(self.TYPECODE), array("q")
+
+                for key, position in entries:
+                    keys.append(key)
+                    positions.append(position)
+
+                    if len(keys) >= self.RUN_SIZE:
+                        f.write(keys.tobytes())
+                        positions_file.write(positions.tobytes())
+                        keys, positions = array(self.TYPECODE), array("q")
+
+                f.write(keys.tobytes())
+                positions_file.write(positions.tobytes())
+                positions_file.seek(0)
+                shutil.copyfileobj(positions_file, f)
+
+        self._storage._replace_file(self.__path(partition, "sorted"), write, encoding=None, durable=False)
+        self._storage._replace_file(self.__path(partition, "changes"), lambda f: None, encoding=None, durable=False)
+
+    @contextmanager
+    def __map(self, path: str) -> Iterator[tuple[memoryview, memoryview]]:
+        """
+        Maps a file of sorted arrays read-only and exposes it as the keys and the positions.
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(array(self.TYPECODE)), memoryview(array("q"))
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                raw = memoryview(mapped)
+                half: int = len(raw) // 2
+                keys, positions = raw[:half].cast(self.TYPECODE), raw[half:].cast("q")
+                try:
+                    yield keys, positions
+                finally:
+                    keys.release()
+                    positions.release()
+                    raw.release()
+
+    def __changes(self, partition: str) -> tuple[set[tuple[float, int]], set[tuple[float, int]]]:
+        """
+        Replays the changes of a partition into the entries added to and removed from its sorted arrays.
+        """
+        with open(self.__path(partition, "changes"), 'rb') as f:
+            content = f.read()
+
+        # A partial triple is the tail of an interrupted append.
+        changes = array(self.TYPECODE)
+        changes.frombytes(content[:len(content) - len(content) % 24])
+        added: set[tuple[float, int]] = set()
+        removed: set[tuple[float, int]] = set()
+
+        for idx in range(0, len(changes), 3):
+            op, entry = changes[idx], (changes[idx + 1], int(changes[idx + 2]))
+            if op > 0:
+                if entry in removed:
+                    removed.discard(entry)
+                else:
+                    added.add(entry)
+            elif entry in added:
+                added.discard(entry)
+            else:
+                removed.add(entry)
+
+        return added, removed
+
+    def _entries(
+        self,
+        partition: str,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        strict: bool = False
+    ) -> list[tuple[float, int]]:
+        """
+        Returns the sorted (key, position) entries of a partition with keys between `low` and `high`.
+
+        Args:
+            partition (str): The partition to search.
+            low (Optional[float]): The lower bound of the keys, or None for no bound.
+            high (Optional[float]): The upper bound of the keys, or None for no bound.
+            strict (bool): Whether the bounds themselves are left out.
+        """
+        added, removed = self.__changes(partition)
+        above = (lambda key: key > low) if strict else (lambda key: key >= low)
+        below = (lambda key: key < high) if strict else (lambda key: key <= high)
+
+        with self.__map(self.__path(partition, "sorted")) as (keys, positions):
+            start: int = 0 if low is None else (bisect_right if strict else bisect_left)(keys, low)
+            end: int = len(keys) if high is None else (bisect_left if strict else bisect_right)(keys, high)
+            end = max(start, end)
+            stored = [entry for entry in zip(keys[start:end], positions[start:end]) if entry not in removed]
+
+        new = sorted(entry for entry in added if (low is None or above(entry[0])) and (high is None or below(entry[0])))
+        return list(heapq.merge(stored, new))
+
+    def _range(
+        self,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        strict: bool = False,
+        partitions: Optional[tuple[str, ...]] = None
+    ) -> list[int]:
+        """
+        Finds the records with keys between `low` and `high`, rebuilding the index first if it is out of date.
+
+        Returns:
+            list[int]: The positions of the records, sorted by key and by position within a key.
+        """
+        self._ensure_current()
+        entries = [self._entries(partition, low, high, strict) for partition in partitions or self.PARTITIONS]
+        return [position for _, position in heapq.merge(*entries)]
+
+    def rebuild(self) -> None:
+        self._reset()
+
+        with tempfile.TemporaryDirectory(dir=self.FILENAME) as directory:
+            runs, count = self.__runs(directory)
+
+            for partition, partition_runs in runs.items():
+                with self.__merge(partition_runs) as entries:
+                    self.__write_sorted(partition, entries)
+
+        self._save_manifest(count)
+
+    def verify(self) -> bool:
+        valid: bool = self._load_manifest() is not None
+
+        if valid:
+            with tempfile.TemporaryDirectory(dir=self.FILENAME) as directory:
+                for partition, partition_runs in self.__runs(directory)[0].items():
+                    with self.__merge(partition_runs) as entries:
+                        if any(saved != built for saved, built in zip_longest(self._entries(partition), entries)):
+                            valid = False
+                            break
+
+        if not valid:
+            self.rebuild()
+
+        return valid
+
+    @contextmanager
+    def change_many(self, changes: list[Change]) -> Iterator[None]:
+        manifest = self._load_manifest()
+
+        yield
+
+        if self._storage.signature() is None:
+            # The writes of the block are held back by `group_commit`, see `BaseIndex`.
+            return
+
+        if manifest is None:
+            self.rebuild()
+            return
+
+        partitions: dict[str, array] = {}
+
+        for position, old, new in changes:
+            if position is None:
+                position = manifest["count"]
+                manifest["count"] += 1
+
+            before = None if old is None else (self.partition(old), self.key(old))
+            after = None if new is None else (self.partition(new), self.key(new))
+
+            if before != after:
+                if before is not None:
+                    partitions.setdefault(before[0], array(self.TYPECODE)).extend((-1, before[1], position))
+                if after is not None:
+                    partitions.setdefault(after[0], array(self.TYPECODE)).extend((1, after[1], position))
+
+        for partition, partition_changes in partitions.items():
+            self.__append_changes(partition, partition_changes)
+
+        self._save_manifest(manifest["count"])
+
+    def __append_changes(self, partition: str, changes: array) -> None:
+        path: str = self.__path(partition, "changes")
+
+        with open(path, 'r+b') as f:
+            size: int = f.seek(0, os.SEEK_END)
+            # Writing after the last whole triple drops whatever an interrupted append left behind.
+            f.seek(size - size % 24)
+            f.write(changes.tobytes())
+            f.truncate()
+
+        if os.path.getsize(path) > 24 * self.MERGE_THRESHOLD:
+            self.__write_sorted(partition, self._entries(partition))
+
+class DateIndex(SortedIndex):
+    """
+    Persistent index of the records sorted by date, kept next to the ledger in the `<FILENAME>.dates`
+    directory. Dates are stored as int64 day numbers (see `entities.dates`).
+    """
+
+    SUFFIX: str = ".dates"
+    TYPECODE: str = "q"
+
+    def key(self, record: dict[str, Any]) -> float:
+        return to_day_number(record["date"])
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> list[int]:
+        """
+        Finds the records dated from `start` to `end`, rebuilding the index first if it is out of date.
+
+        Args:
+            start (Optional[int]): The first day number of the range, or None for the beginning of the ledger.
+            end (Optional[int]): The last day number of the range, or None for the end of the ledger.
+
+        Returns:
+            list[int]: The positions of the records, in date order and in ledger order within a day.
+        """
+        return self._range(start, end)
+
+class AmountIndex(SortedIndex):
+    """
+    Persistent index of the records of every category sorted by amount, kept next to the ledger in the
+    `<FILENAME>.amounts` directory. Amounts are stored as float64.
+    """
+
+    SUFFIX: str = ".amounts"
+    TYPECODE: str = "d"
+    PARTITIONS: tuple[str, ...] = tuple(EntityRecordAttributes().categories)
+
+    def key(self, record: dict[str, Any]) -> float:
+        # Adding 0.0 turns -0.0 into 0.0.
+        return float(record["amount"]) + 0.0
+
+    def partition(self, record: dict[str, Any]) -> str:
+        return str(record["category"])
+
+    def range(
+        self,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        category: Optional[str] = None,
+        strict: bool = False
+    ) -> list[int]:
+        """
+        Finds the records with amounts from `minimum` to `maximum`, rebuilding the index first if it is out of date.
+
+        Args:
+            minimum (Optional[float]): The smallest amount, or None for no lower bound.
+            maximum (Optional[float]): The largest amount, or None for no upper bound.
+            category (Optional[str]): The only category to search, or None for all of them.
+            strict (bool): Whether amounts equal to `minimum` or `maximum` are left out.
+
+        Returns:
+            list[int]: The positions of the records, in ascending order of amount and in ledger order within an amount.
+        """
+        return self._range(minimum, maximum, strict, None if category is None else (category,))
+
+class TextIndex(DirectoryIndex):
+    """
+    Persistent inverted index from the words of record descriptions to record positions, kept next to the
+    ledger in the `<FILENAME>.text` directory. Words are normalized with `entities.text.tokenize`.
+
+    A token is stored in one of `BUCKETS` bucket files chosen by a hash of its first two characters, so that
+    all tokens that start with the same two characters share a bucket and a prefix search reads a single one.
+    Buckets are logs of `+<token>\\t<position>` and `-<token>\\t<position>` lines, appended to by adds and
+    updates that change the words of a description.
+
+    Positions must be stable, see `BaseStorage.STABLE_POSITIONS`.
+    """
+
+    SUFFIX: str = ".text"
+    BUCKETS: int = 256
+
+    def __bucket(self, token: str) -> str:
+        return os.path.join(self.FILENAME, f"{zlib.crc32(token[:2].encode('utf-8')) % self.BUCKETS:02x}.log")
+
+    def __buckets(self, term: str) -> list[str]:
+        # A single character does not pick a bucket, every bucket may hold tokens that start with it.
+        if len(term) < 2:
+            return [os.path.join(self.FILENAME, name) for name in os.listdir(self.FILENAME) if name.endswith(".log")]
+        return [self.__bucket(term)]
+
+    def __tokens(self, record: dict[str, Any]) -> set[str]:
+        return set(tokenize(record["description"]))
+
+    def rebuild(self) -> None:
+        lines: dict[str, list[str]] = {}
+        buffered: int = 0
+        count: int = 0
+
+        self._reset()
+
+        for position, record in enumerate(self._storage.iter_records()):
+            count += 1
+            for token in self.__tokens(record):
+                lines.setdefault(self.__bucket(token), []).append(f"+{token}\t{position}\n")
+                buffered += 1
+
+            if buffered >= self.FLUSH_LINES:
+                self._append_lines(lines)
+                lines, buffered = {}, 0
+
+        self._append_lines(lines)
+        self._save_manifest(count)
+
+    def search(self, terms: list[tuple[str, bool]]) -> list[int]:
+        """
+        Finds the records whose descriptions contain every term, rebuilding the index first if it is out of date.
+
+        Args:
+            terms (list[tuple[str, bool]]): Normalized tokens and whether each of them is a prefix, see `entities.text.parse_query`.
+
+        Returns:
+            list[int]: The positions of the matching records, in ascending order.
+        """
+        self._ensure_current()
+        result: Optional[set[int]] = None
+
+        for term, prefix in terms:
+            found: set[int] = set()
+
+            for path in self.__buckets(term):
+                for token, positions in self._replay_lines(path, term if prefix else f"{term}\t").items():
+                    found |= positions
+
+            result = found if result is None else result & found
+            if not result:
+                break
+
+        return sorted(result or ())
+
+    def verify(self) -> bool:
+        expected: dict[str, set[int]] = {}
+        actual: dict[str, set[int]] = {}
+
+        for position, record in enumerate(self._storage.iter_records()):
+            for token in self.__tokens(record):
+                expected.setdefault(token, set()).add(position)
+
+        if os.path.isdir(self.FILENAME):
+            for name in os.listdir(self.FILENAME):
+                if name.endswith(".log"):
+                    actual.update((token, positions) for token, positions in self._replay_lines(os.path.join(self.FILENAME, name)).items() if positions)
+
+        valid: bool = self._load_manifest() is not None and actual == expected
+
+        if not valid:
+            self.rebuild()
+
+        return valid
+
+    @contextmanager
+    def change_many(self, changes: list[Change]) -> Iterator[None]:
+        manifest = self._load_manifest()
+
+        yield
+
+        if self._storage.signature() is None:
+            # The writes of the block are held back by `group_commit`, see `BaseIndex`.
+            return
+
+        if manifest is None:
+            self.rebuild()
+            return
+
+        lines: dict[str, list[str]] = {}
+
+        for position, old, new in changes:
+            if position is None:
+                position = manifest["count"]
+                manifest["count"] += 1
+
+            before = set() if old is None else self.__tokens(old)
+            after = set() if new is None else self.__tokens(new)
+
+            for token in before - after:
+                lines.setdefault(self.__bucket(token), []).append(f"-{token}\t{position}\n")
+            for token in after - before:
+                lines.setdefault(self.__bucket(token), []).append(f"+{token}\t{position}\n")
+
+        self._append_lines(lines)
+        self._save_manifest(manifest["count"])
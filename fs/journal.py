@@ -0,0 +1,173 @@
+import json
+import os
+from typing import Any, Iterable, Iterator, Optional, TextIO
+from fs.base import BaseStorage
+
+class JournalFile(BaseStorage):
+    """
+    Append-only ledger storage with one JSON object per line.
+
+    Every `add` writes a single `{"op": "add", "record": {...}}` line and every `update` writes a single
+    `{"op": "update", "index": 0, "record": {...}}` line, so the cost of a write does not depend on the size
+    of the ledger. Readers replay the journal from the beginning to rebuild the list of records.
+
+    Counting and reading single records use the offset of the line that holds the current version of every
+    record. The offsets are kept in memory and only the lines appended since the last call are read to update
+    them, the whole journal being read again only after it was rewritten.
+    """
+
+    # The identity of the journal file, the number of bytes read from it and the line offset of every record.
+    __scanned: Optional[tuple[tuple[int, int], int, list[int]]] = None
+
+    def __init__(self, filename: str = "data.jsonl") -> None:
+        super().__init__()
+        self.FILENAME: str = filename
+        self.JOURNAL_FILENAME: str = filename
+        self.__ensure_file_exists()
+
+    def __ensure_file_exists(self) -> None:
+        if not os.path.exists(self.JOURNAL_FILENAME):
+            open(self.JOURNAL_FILENAME, 'a', encoding='utf-8').close()
+
+    def _append_entries(self, entries: Iterable[dict[str, Any]]) -> None:
+        with open(self.JOURNAL_FILENAME, 'a+b') as f:
+            # An interrupted append may have left a line without its newline, start a new line after it.
+            size: int = f.seek(0, os.SEEK_END)
+            if size > 0:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+            f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode('utf-8'))
+
+            self._sync(self.JOURNAL_FILENAME, f)
+
+    def __offsets(self) -> list[int]:
+        """
+        Returns the offset of the line that holds the current version of every record, by position.
+        """
+        with open(self.JOURNAL_FILENAME, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            identity: tuple[int, int] = (stat.st_dev, stat.st_ino)
+
+            if self.__scanned is None or self.__scanned[0] != identity or self.__scanned[1] > stat.st_size:
+                self.__scanned = identity, 0, []
+
+            _, offset, offsets = self.__scanned
+            tail: Optional[bytes] = None
+            f.seek(offset)
+
+            for line in f:
+                if not line.endswith(b"\n"):
+                    tail = line
+                    break
+                self.__add_offset(offsets, line, offset)
+                offset += len(line)
+
+            self.__scanned = identity, offset, offsets
+
+        if tail is not None:
+            # The last line of an append that is in progress or was interrupted is read again next time.
+            offsets = offsets.copy()
+            self.__add_offset(offsets, tail, offset)
+
+        return offsets
+
+    @staticmethod
+    def __add_offset(offsets: list[int], line: bytes, offset: int) -> None:
+        try:
+            entry: dict[str, Any] = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+
+        if entry.get("op") == "add":
+            offsets.append(offset)
+        elif entry.get("op") == "update" and 0 <= entry["index"] < len(offsets):
+            offsets[entry["index"]] = offset
+
+    def _entries(self, path: str, op: Optional[str] = None) -> Iterator[dict[str, Any]]:
+        """
+        Yields the entries of the journal at `path`, optionally only those of one operation.
+
+        A line that cannot be decoded is the tail of an interrupted write and is skipped.
+        """
+        prefix: str = f'{{"op": "{op}"' if op is not None else ""
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.startswith(prefix) or not line.strip():
+                    continue
+
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def _replay(self, path: str, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Applies the journal at `path` on top of `records`.
+        """
+        for entry in self._entries(path):
+            if entry["op"] == "add":
+                records.append(entry["record"])
+            elif entry["op"] == "update" and 0 <= entry["index"] < len(records):
+                records[entry["index"]] = entry["record"]
+
+        return records
+
+    def _updates(self, path: str) -> dict[int, dict[str, Any]]:
+        """
+        Returns the latest version of every record updated in the journal at `path`, by position.
+        """
+        return {entry["index"]: entry["record"] for entry in self._entries(path, "update")}
+
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        return {"list": self._replay(self.JOURNAL_FILENAME, [])}
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        # Only updated records are kept in memory, the added ones are streamed from a second pass over the journal.
+        updates = self._updates(self.JOURNAL_FILENAME)
+
+        for idx, entry in enumerate(self._entries(self.JOURNAL_FILENAME, "add")):
+            yield updates.get(idx, entry["record"])
+
+    def write_json(self, data: dict[str, list[dict[str, Any]]]) -> None:
+        def write(f: TextIO) -> None:
+            for record in data["list"]:
+                f.write(json.dumps({"op": "add", "record": record}, ensure_ascii=False) + "\n")
+
+        self._replace_file(self.JOURNAL_FILENAME, write)
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        return self._stat_signature(self.JOURNAL_FILENAME)
+
+    def count(self) -> int:
+        return len(self.__offsets())
+
+    def get_record(self, index: int) -> Optional[dict[str, Any]]:
+        return next((record for _, record in self.get_records([index])), None)
+
+    def get_records(self, positions: Iterable[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        offsets = self.__offsets()
+
+        with open(self.JOURNAL_FILENAME, 'rb') as f:
+            for idx in sorted(set(positions)):
+                if 0 <= idx < len(offsets):
+                    f.seek(offsets[idx])
+                    yield idx, json.loads(f.readline())["record"]
+
+    def random_access(self) -> bool:
+        return True
+
+    def append(self, record: dict[str, Any]) -> None:
+        self._append_entries([{"op": "add", "record": record}])
+
+    def append_many(self, records: list[dict[str, Any]]) -> None:
+        self._append_entries({"op": "add", "record": record} for record in records)
+
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        if index < 0 or index >= self.count():
+            return False
+
+        self._append_entries([{"op": "update", "index": index, "record": record}])
+        return True
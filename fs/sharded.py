@@ -0,0 +1,232 @@
+import json
+import os
+from contextlib import ExitStack
+from typing import Any, Iterator, Optional, TextIO
+from entities.dates import from_day_number, to_day_number
+from fs.base import BaseStorage
+from fs.file import File
+
+class ShardedFile(BaseStorage):
+    """
+    Ledger storage split into one `File` shard per calendar month, plus a small `manifest.json` that lists the
+    shards in month order together with the number of records in each.
+
+    The ledger is the concatenation of the shards in month order, so positions follow the dates of the
+    records: a record added for an earlier month, or moved to another month by an update, shifts the
+    positions of the records after it. Adds and updates touch only the shards of the months involved, and
+    date lookups open only the shard of the month they ask for.
+    """
+
+    MANIFEST: str = "manifest.json"
+    STABLE_POSITIONS: bool = False
+
+    def __init__(self, filename: str = "data.shards") -> None:
+        super().__init__()
+        self.FILENAME: str = filename
+        self.__shards: dict[str, File] = {}
+        # Shards joined to the current `group_commit` block and the manifest waiting to be saved with it.
+        self.__group = ExitStack()
+        self.__pending_manifest: Optional[list[dict[str, Any]]] = None
+        self.__ensure_files_exist()
+
+    def __ensure_files_exist(self) -> None:
+        os.makedirs(self.FILENAME, exist_ok=True)
+
+        if not os.path.exists(os.path.join(self.FILENAME, self.MANIFEST)):
+            self.__write_manifest([])
+
+    @staticmethod
+    def month(date: str) -> str:
+        """
+        Returns the `YYYY-MM` month of a `YYYY-MM-DD` or `YYYY-M-D` date.
+        """
+        year, month = map(int, date.split('-')[:2])
+        return f"{year:04d}-{month:02d}"
+
+    def __read_manifest(self) -> list[dict[str, Any]]:
+        if self.__pending_manifest is not None:
+            return self.__pending_manifest
+
+        with open(os.path.join(self.FILENAME, self.MANIFEST), 'r', encoding='utf-8') as f:
+            manifest: list[dict[str, Any]] = json.load(f)["shards"]
+
+        return manifest
+
+    def __write_manifest(self, manifest: list[dict[str, Any]]) -> None:
+        manifest = sorted((shard for shard in manifest if shard["count"] > 0), key=lambda shard: shard["month"])
+
+        if self._group_depth > 0:
+            self.__pending_manifest = manifest
+            return
+
+        def write(f: TextIO) -> None:
+            json.dump({"shards": manifest}, f, ensure_ascii=False)
+
+        self._replace_file(os.path.join(self.FILENAME, self.MANIFEST), write)
+
+    def __shard(self, month: str) -> File:
+        if month not in self.__shards:
+            self.__shards[month] = File(os.path.join(self.FILENAME, f"{month}.json"))
+
+        shard = self.__shards[month]
+        if self._group_depth > 0 and not shard._group_depth:
+            self.__group.enter_context(shard.group_commit())
+
+        return shard
+
+    def __locate(self, index: int) -> Optional[tuple[list[dict[str, Any]], int, int]]:
+        """
+        Finds the shard holding the record at `index`.
+
+        Returns:
+            Optional[tuple[list[dict[str, Any]], int, int]]: The manifest, the position of the shard in it and the
+            index of the record inside the shard, or None if there is no such record.
+        """
+        manifest = self.__read_manifest()
+        start: int = 0
+
+        if index < 0:
+            return None
+
+        for position, shard in enumerate(manifest):
+            if index < start + shard["count"]:
+                return manifest, position, index - start
+            start += shard["count"]
+
+        return None
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        # Shards and the manifest written inside a `group_commit` block are only saved when it exits.
+        if self._group_depth > 0:
+            return None
+        # Shards are always replaced through a rename, which updates the directory itself.
+        return self._stat_signature(self.FILENAME, os.path.join(self.FILENAME, self.MANIFEST))
+
+    def count(self) -> int:
+        return sum(shard["count"] for shard in self.__read_manifest())
+
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        return {"list": list(self.iter_records())}
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        for shard in self.__read_manifest():
+            yield from self.__shard(shard["month"]).iter_records()
+
+    def get_record(self, index: int) -> Optional[dict[str, Any]]:
+        location = self.__locate(index)
+
+        if location is None:
+            return None
+
+        manifest, position, local = location
+        return self.__shard(manifest[position]["month"]).get_record(local)
+
+    def write_json(self, data: dict[str, list[dict[str, Any]]]) -> None:
+        months: dict[str, list[dict[str, Any]]] = {}
+
+        for record in data["list"]:
+            months.setdefault(self.month(record["date"]), []).append(record)
+
+        for shard in self.__read_manifest():
+            if shard["month"] not in months:
+                self.__shard(shard["month"]).write_json({"list": []})
+
+        for month, records in months.items():
+            self.__shard(month).write_json({"list": records})
+
+        self.__write_manifest([{"month": month, "count": len(records)} for month, records in months.items()])
+
+    def compact(self) -> None:
+        # Rebuilds the manifest from the shards themselves, which also repairs counts left behind by a crash.
+        manifest: list[dict[str, Any]] = []
+
+        for name in os.listdir(self.FILENAME):
+            if name.endswith(".json") and name != self.MANIFEST:
+                month = name[:-len(".json")]
+                manifest.append({"month": month, "count": self.__shard(month).count()})
+
+        self.__write_manifest(manifest)
+
+    def append(self, record: dict[str, Any]) -> None:
+        month: str = self.month(record["date"])
+        manifest = self.__read_manifest()
+
+        self.__shard(month).append(record)
+
+        for shard in manifest:
+            if shard["month"] == month:
+                shard["count"] += 1
+                break
+        else:
+            manifest.append({"month": month, "count": 1})
+
+        self.__write_manifest(manifest)
+
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        location = self.__locate(index)
+
+        if location is None:
+            return False
+
+        manifest, position, local = location
+        old_month: str = manifest[position]["month"]
+        new_month: str = self.month(record["date"])
+
+        if old_month == new_month:
+            return self.__shard(old_month).replace(local, record)
+
+        # The record moves to the shard of its new month. It is written there before it is removed from the old
+        # one, so a crash in between leaves it in both shards rather than in none, and `compact` recounts them.
+        self.__shard(new_month).append(record)
+
+        shard = self.__shard(old_month)
+        data = shard.read_json()
+        del data["list"][local]
+        shard.write_json(data)
+
+        manifest[position]["count"] -= 1
+        for entry in manifest:
+            if entry["month"] == new_month:
+                entry["count"] += 1
+                break
+        else:
+            manifest.append({"month": new_month, "count": 1})
+
+        # The manifest is saved once, after both shards.
+        self.__write_manifest(manifest)
+        return True
+
+    def select(self, by: str, value: float | str) -> list[tuple[int, dict[str, Any]]]:
+        if by != "date":
+            return super().select(by, value)
+
+        day: int = to_day_number(str(value))
+        month: str = self.month(str(value))
+        start: int = 0
+
+        for shard in self.__read_manifest():
+            if shard["month"] == month:
+                records = self.__shard(month).iter_records()
+                return [(start + idx, record) for idx, record in enumerate(records) if to_day_number(record["date"]) == day]
+            start += shard["count"]
+
+        return []
+
+    def select_range(self, start: Optional[int], end: Optional[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        # Shards are in month order, so only the records of one month at a time need sorting.
+        first: Optional[str] = None if start is None else self.month(from_day_number(start))
+        last: Optional[str] = None if end is None else self.month(from_day_number(end))
+        offset: int = 0
+
+        for shard in self.__read_manifest():
+            if (first is None or shard["month"] >= first) and (last is None or shard["month"] <= last):
+                for idx, record in self.__shard(shard["month"]).select_range(start, end):
+                    yield offset + idx, record
+            offset += shard["count"]
+
+    def _commit(self) -> None:
+        self.__group.close()
+
+        if self.__pending_manifest is not None:
+            manifest, self.__pending_manifest = self.__pending_manifest, None
+            self.__write_manifest(manifest)
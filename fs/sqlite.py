@@ -0,0 +1,201 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Optional
+from entities.dates import to_day_number
+from entities.record_attributes import EntityRecordAttributes
+from fs.base import BaseStorage
+
+class SqliteFile(BaseStorage):
+    """
+    Ledger storage in an SQLite database, using the standard `sqlite3` module.
+
+    Every record is a row keyed by its position in the ledger. Dates are kept as they were added and also as a
+    day number (see `entities.dates`), which is indexed together with the category and the amount. Adds and
+    updates are single-row statements in their own transaction, balances, key lookups and date and amount ranges
+    run as SQL queries.
+    """
+
+    NATIVE_QUERIES: bool = True
+
+    SCHEMA: str = """
+        CREATE TABLE IF NOT EXISTS records (
+            position INTEGER PRIMARY KEY,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            date TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            description TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS records_day ON records (day);
+        CREATE INDEX IF NOT EXISTS records_category ON records (category);
+        CREATE INDEX IF NOT EXISTS records_amount ON records (amount);
+    """
+    COLUMNS: str = "position, amount, category, date, description"
+
+    def __init__(self, filename: str = "data.db") -> None:
+        super().__init__()
+        self.FILENAME: str = filename
+        self.__connection = sqlite3.connect(self.FILENAME)
+        self.__connection.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self.__connection.close()
+
+    @contextmanager
+    def __transaction(self) -> Iterator[None]:
+        # Inside `group_commit` the statements join one transaction that is committed when the block exits.
+        if self._group_depth > 0:
+            yield
+        else:
+            with self.__connection:
+                yield
+
+    def _commit(self) -> None:
+        self.__connection.commit()
+
+    @staticmethod
+    def __to_record(row: tuple[Any, ...]) -> tuple[int, dict[str, Any]]:
+        return row[0], {"amount": row[1], "date": row[3], "category": row[2], "description": row[4]}
+
+    @staticmethod
+    def __to_row(record: dict[str, Any]) -> tuple[Any, ...]:
+        return record["amount"], record["category"], record["date"], to_day_number(record["date"]), record["description"]
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        # Changes of an open transaction may not have reached the database file yet.
+        if self.__connection.in_transaction:
+            return None
+        return self._stat_signature(self.FILENAME)
+
+    def count(self) -> int:
+        # Positions are contiguous, so the largest one is found through the primary key instead of counting rows.
+        row = self.__connection.execute("SELECT MAX(position) FROM records").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        rows = self.__connection.execute(f"SELECT {self.COLUMNS} FROM records ORDER BY position")
+        return {"list": [self.__to_record(row)[1] for row in rows]}
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        for row in self.__connection.execute(f"SELECT {self.COLUMNS} FROM records ORDER BY position"):
+            yield self.__to_record(row)[1]
+
+    def write_json(self, data: dict[str, list[dict[str, Any]]]) -> None:
+        with self.__transaction():
+            self.__connection.execute("DELETE FROM records")
+            self.__connection.executemany(
+                "INSERT INTO records (position, amount, category, date, day, description) VALUES (?, ?, ?, ?, ?, ?)",
+                ((idx, *self.__to_row(record)) for idx, record in enumerate(data["list"]))
+            )
+
+    def compact(self) -> None:
+        self.__connection.execute("VACUUM")
+
+    def get_record(self, index: int) -> Optional[dict[str, Any]]:
+        row = self.__connection.execute(f"SELECT {self.COLUMNS} FROM records WHERE position = ?", (index,)).fetchone()
+        return None if row is None else self.__to_record(row)[1]
+
+    def random_access(self) -> bool:
+        return True
+
+    def get_records(self, positions: Iterable[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        wanted: list[int] = sorted(set(positions))
+
+        # Sent in batches that stay below the limit on the number of query parameters.
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            rows = self.__connection.execute(
+                f"SELECT {self.COLUMNS} FROM records WHERE position IN ({', '.join('?' * len(batch))}) ORDER BY position", batch
+            )
+            yield from (self.__to_record(row) for row in rows.fetchall())
+
+    def append(self, record: dict[str, Any]) -> None:
+        with self.__transaction():
+            self.__connection.execute(
+                "INSERT INTO records (position, amount, category, date, day, description) "
+                "VALUES ((SELECT IFNULL(MAX(position), -1) + 1 FROM records), ?, ?, ?, ?, ?)",
+                self.__to_row(record)
+            )
+
+    def append_many(self, records: list[dict[str, Any]]) -> None:
+        with self.__transaction():
+            start: int = self.count()
+            self.__connection.executemany(
+                "INSERT INTO records (position, amount, category, date, day, description) VALUES (?, ?, ?, ?, ?, ?)",
+                ((start + idx, *self.__to_row(record)) for idx, record in enumerate(records))
+            )
+
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        with self.__transaction():
+            cursor = self.__connection.execute(
+                "UPDATE records SET amount = ?, category = ?, date = ?, day = ?, description = ? WHERE position = ?",
+                (*self.__to_row(record), index)
+            )
+        return cursor.rowcount == 1
+
+    def totals(self) -> dict[str, float]:
+        result: dict[str, float] = {category: 0.0 for category in EntityRecordAttributes().categories}
+        result["count"] = 0
+
+        for category, total, count in self.__connection.execute("SELECT category, SUM(amount), COUNT(*) FROM records GROUP BY category"):
+            result[category] = total
+            result["count"] += count
+
+        return result
+
+    def daily_totals(self) -> dict[int, dict[str, float]]:
+        result: dict[int, dict[str, float]] = {}
+
+        for day, category, total, count in self.__connection.execute("SELECT day, category, SUM(amount), COUNT(*) FROM records GROUP BY day, category"):
+            totals = result.setdefault(day, {"count": 0})
+            totals[category] = total
+            totals["count"] += count
+
+        return result
+
+    def select(self, by: str, value: float | str) -> list[tuple[int, dict[str, Any]]]:
+        if by == "date":
+            column, value = "day", to_day_number(str(value))
+        elif by in ("amount", "category"):
+            column = by
+        else:
+            return []
+
+        rows = self.__connection.execute(f"SELECT {self.COLUMNS} FROM records WHERE {column} = ? ORDER BY position", (value,))
+        return [self.__to_record(row) for row in rows]
+
+    def select_range(self, start: Optional[int], end: Optional[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        conditions, parameters = self.__bounds("day", start, end, False)
+        rows = self.__connection.execute(f"SELECT {self.COLUMNS} FROM records{conditions} ORDER BY day, position", parameters)
+        return (self.__to_record(row) for row in rows)
+
+    def select_amount_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        category: Optional[str] = None,
+        strict: bool = False
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        conditions, parameters = self.__bounds("amount", minimum, maximum, strict)
+
+        if category is not None:
+            conditions += " AND category = ?" if conditions else " WHERE category = ?"
+            parameters.append(category)
+
+        rows = self.__connection.execute(f"SELECT {self.COLUMNS} FROM records{conditions} ORDER BY amount, position", parameters)
+        return (self.__to_record(row) for row in rows)
+
+    @staticmethod
+    def __bounds(column: str, low: Optional[float], high: Optional[float], strict: bool) -> tuple[str, list[Any]]:
+        """
+        Builds the WHERE clause of a range query on `column`, None being no bound.
+        """
+        conditions: list[str] = []
+        parameters: list[Any] = []
+
+        for bound, operator in ((low, ">" if strict else ">="), (high, "<" if strict else "<=")):
+            if bound is not None:
+                conditions.append(f"{column} {operator} ?")
+                parameters.append(bound)
+
+        return (f" WHERE {' AND '.join(conditions)}" if conditions else ""), parameters
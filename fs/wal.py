@@ -0,0 +1,153 @@
+import json
+import os
+import re
+from typing import Any, Iterable, Iterator, Optional, TextIO
+from fs.base import BaseStorage
+from fs.file import stream_list
+from fs.journal import JournalFile
+
+class WalFile(JournalFile):
+    """
+    Ledger storage made of a compacted snapshot and a write-ahead log of the changes made since it was taken.
+
+    The snapshot uses the same `{"list": [...]}` document as `File`, the log uses the `JournalFile` line format.
+    Reads load the snapshot and replay only the log. Compaction folds the log into a new snapshot, it runs on
+    demand or as soon as the log grows past `compact_threshold` bytes.
+
+    Both files carry a generation number. A log whose generation is older than the snapshot has already been
+    folded into it and is ignored, so a crash in the middle of compaction never applies a change twice. The
+    snapshot also records its number of records, so counting the ledger reads only the log.
+    """
+
+    def __init__(self, filename: str = "data.snapshot.json", compact_threshold: int = 1024 * 1024) -> None:
+        BaseStorage.__init__(self)
+        self.FILENAME: str = filename
+        self.JOURNAL_FILENAME: str = f"{filename}.wal"
+        self.compact_threshold: int = compact_threshold
+        # The generation of the snapshot and its number of records.
+        self.__snapshot_count: Optional[tuple[int, int]] = None
+        self.__ensure_files_exist()
+
+    def __ensure_files_exist(self) -> None:
+        if not os.path.exists(self.FILENAME):
+            self.__write_snapshot([], 0)
+        if not os.path.exists(self.JOURNAL_FILENAME) or self.__log_generation() < self.__snapshot_generation():
+            # Either a fresh ledger or a compaction that stopped right after switching the snapshot.
+            self.__write_log_header(self.__snapshot_generation())
+
+    def __read_snapshot(self) -> dict[str, Any]:
+        with open(self.FILENAME, 'r', encoding='utf-8') as f:
+            snapshot: dict[str, Any] = json.load(f)
+
+        snapshot.setdefault("generation", 0)
+        return snapshot
+
+    def __snapshot_header(self) -> Optional[re.Match[str]]:
+        # The generation and the count are written before the list, so they can be read without loading the whole snapshot.
+        with open(self.FILENAME, 'r', encoding='utf-8') as f:
+            return re.match(r'\{"generation": (\d+)(?:, "count": (\d+))?', f.read(64))
+
+    def __snapshot_generation(self) -> int:
+        match = self.__snapshot_header()
+        return int(match.group(1)) if match else self.__read_snapshot()["generation"]
+
+    def __write_snapshot(self, records: list[dict[str, Any]], generation: int) -> None:
+        def write(f: TextIO) -> None:
+            f.write(json.dumps({"generation": generation, "count": len(records), "list": records}, ensure_ascii=False))
+
+        self._replace_file(self.FILENAME, write)
+
+    def __write_log_header(self, generation: int) -> None:
+        def write(f: TextIO) -> None:
+            f.write(json.dumps({"op": "generation", "value": generation}) + "\n")
+
+        self._replace_file(self.JOURNAL_FILENAME, write)
+
+    def __log_generation(self) -> int:
+        with open(self.JOURNAL_FILENAME, 'r', encoding='utf-8') as f:
+            header = f.readline()
+
+        try:
+            return json.loads(header)["value"]
+        except (json.JSONDecodeError, KeyError):
+            return -1
+
+    def read_json(self) -> dict[str, list[dict[str, Any]]]:
+        snapshot = self.__read_snapshot()
+        records: list[dict[str, Any]] = snapshot["list"]
+
+        if self.__log_generation() == snapshot["generation"]:
+            self._replay(self.JOURNAL_FILENAME, records)
+
+        return {"list": records}
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        updates: dict[int, dict[str, Any]] = {}
+        added: list[dict[str, Any]] = []
+
+        # The log is small by construction, only the snapshot is streamed.
+        if self.__log_generation() == self.__snapshot_generation():
+            updates = self._updates(self.JOURNAL_FILENAME)
+            added = [entry["record"] for entry in self._entries(self.JOURNAL_FILENAME, "add")]
+
+        idx: int = 0
+        for record in stream_list(self.FILENAME):
+            yield updates.get(idx, record)
+            idx += 1
+
+        for record in added:
+            yield updates.get(idx, record)
+            idx += 1
+
+    def write_json(self, data: dict[str, list[dict[str, Any]]]) -> None:
+        generation: int = self.__snapshot_generation() + 1
+
+        # The snapshot is switched first: until the new log header is written the old log is simply ignored.
+        self.__write_snapshot(data["list"], generation)
+        self.__write_log_header(generation)
+
+    def count(self) -> int:
+        match = self.__snapshot_header()
+        generation: int = int(match.group(1)) if match else self.__read_snapshot()["generation"]
+
+        if self.__snapshot_count is None or self.__snapshot_count[0] != generation:
+            # Snapshots written before the count was recorded are counted once per generation.
+            count: int = int(match.group(2)) if match and match.group(2) else sum(1 for _ in stream_list(self.FILENAME))
+            self.__snapshot_count = generation, count
+
+        if self.__log_generation() != generation:
+            return self.__snapshot_count[1]
+        return self.__snapshot_count[1] + super().count()
+
+    def signature(self) -> Optional[tuple[int, ...]]:
+        return self._stat_signature(self.FILENAME, self.JOURNAL_FILENAME)
+
+    # The offsets of `JournalFile` cover only the log, records are read in order from the snapshot and the log.
+    def get_record(self, index: int) -> Optional[dict[str, Any]]:
+        return BaseStorage.get_record(self, index)
+
+    def get_records(self, positions: Iterable[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        return BaseStorage.get_records(self, positions)
+
+    def random_access(self) -> bool:
+        return False
+
+    def log_size(self) -> int:
+        return os.path.getsize(self.JOURNAL_FILENAME)
+
+    def append(self, record: dict[str, Any]) -> None:
+        super().append(record)
+        self.__compact_if_needed()
+
+    def append_many(self, records: list[dict[str, Any]]) -> None:
+        super().append_many(records)
+        self.__compact_if_needed()
+
+    def replace(self, index: int, record: dict[str, Any]) -> bool:
+        replaced = super().replace(index, record)
+        self.__compact_if_needed()
+        return replaced
+
+    def __compact_if_needed(self) -> None:
+        if self.log_size() > self.compact_threshold:
+            self.compact()
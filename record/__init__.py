@@ -1,15 +1,57 @@
-from typing import Any, Optional
-from entities.containers.linked_list import LinkedListRecord
+import base64
+import binascii
+import json
+from bisect import bisect_right
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
+from entities.compact_record import CompactRecord
+from entities.containers.array_list import ArrayListRecord
+from entities.dates import to_day_number
+from entities.record import EntityRecord
 from entities.record_attributes import EntityRecordAttributes
-from fs import File
+from entities.record_view import RecordView
+from entities.text import parse_query
+from fs import FIELDS, Aggregates, AmountIndex, BaseIndex, BaseStorage, DateIndex, File, KeyIndex, TextIndex
+from fs.base import Change
+from validator.batch import ValidatorBatch
+from validator.record import ValidatorRecord
 
 class Record:
     """
     Class to manage financial records, allowing for addition, update, and retrieval of record data.
     """
 
-    def __init__(self) -> None:
-        self.__fs = File()
+    # The number of records read from the storage at once by the streaming queries.
+    CHUNK_SIZE: int = 1024
+    # The number of records `add_many` writes to the storage at once.
+    BATCH_SIZE: int = 4096
+
+    def __init__(self, storage: Optional[BaseStorage] = None) -> None:
+        """
+        Args:
+            storage (Optional[BaseStorage]): The storage that holds the ledger. Defaults to the `data.json` file.
+        """
+        self.__fs = storage if storage is not None else File()
+        self.__aggregates = Aggregates(self.__fs)
+        # Key, date, amount and text indexes map values to positions, so they need positions that never move.
+        # Storages that answer key and range queries themselves keep only the text index, none of them can search.
+        self.__key_index: Optional[KeyIndex] = None
+        self.__date_index: Optional[DateIndex] = None
+        self.__amount_index: Optional[AmountIndex] = None
+        self.__text_index: Optional[TextIndex] = None
+        self.__indexes: list[BaseIndex] = [self.__aggregates]
+
+        if self.__fs.STABLE_POSITIONS and not self.__fs.NATIVE_QUERIES:
+            self.__key_index = KeyIndex(self.__fs)
+            self.__date_index = DateIndex(self.__fs)
+            self.__amount_index = AmountIndex(self.__fs)
+            self.__indexes += [self.__key_index, self.__date_index, self.__amount_index]
+        if self.__fs.STABLE_POSITIONS:
+            self.__text_index = TextIndex(self.__fs)
+            self.__indexes.append(self.__text_index)
+        self.__categories: list[str] = EntityRecordAttributes().categories
+        self.__batch_validator = ValidatorBatch()
 
     def add(
         self,
@@ -31,26 +73,105 @@ class Record:
             str: A success message if the record was added, or an error message if an exception occurred.
         """
         try:
-            current_data: dict[str, list[dict[str, Any]]] = self.__fs.read_json()
-
-            if current_data is None or "list" not in current_data:
-                current_data = {"list": []}
-
-            linked_list = LinkedListRecord()
-            linked_list.insert_first(amount, category, date, description)
-            
-            current = linked_list.get()
-
-            while current is not None:
-                current_data["list"].append(current.value.to_json())
-                current = current.next
+            records = ArrayListRecord()
+            records.insert_last(amount, category, date, description)
+            record = records.get(0).to_json()
 
-            self.__fs.write_json(current_data)
+            with self.__fs.locked(exclusive=True):
+                with self.__track([(None, None, record)]):
+                    self.__fs.append(record)
 
             return "The record was successfully added."
         except ValueError as e:
             return str(e)
 
+    def add_many(self, rows: Iterable[Any]) -> tuple[int, list[str]]:
+        """
+        Adds many records, validated with the same rules as `add`.
+
+        Rows are read as they are consumed and written to the storage in batches of `BATCH_SIZE` records, each
+        batch as a single commit under one lock. A row that fails validation is skipped and reported, the other
+        rows are still added.
+
+        Args:
+            rows (Iterable[Any]): Dictionaries with the amount, category, date and description of the records,
+                such as those of `fs.read_rows`. Amounts may also be given as strings.
+
+        Returns:
+            tuple[int, list[str]]: The number of records added and the error message of every rejected row,
+            prefixed with its number counted from 1.
+        """
+        added: int = 0
+        errors: list[tuple[int, str]] = []
+        batch: list[tuple[int, dict[str, Any]]] = []
+
+        for number, row in enumerate(rows, 1):
+            try:
+                batch.append((number, self.__read_row(row)))
+            except ValueError as e:
+                errors.append((number, str(e)))
+
+            if len(batch) >= self.BATCH_SIZE:
+                added += self.__add_batch(batch, errors)
+                batch = []
+
+        if batch:
+            added += self.__add_batch(batch, errors)
+
+        return added, [f"Row {number}: {message}" for number, message in sorted(errors)]
+
+    @staticmethod
+    def __read_row(row: Any) -> dict[str, Any]:
+        if not isinstance(row, dict):
+            raise ValueError(f"Expected an object with the fields {', '.join(FIELDS)}.")
+
+        missing: list[str] = [field for field in FIELDS if row.get(field) is None]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}.")
+
+        amount = row["amount"]
+        if isinstance(amount, str):
+            try:
+                amount = float(amount)
+            except ValueError:
+                raise ValueError(f"Invalid value for 'amount': {amount}")
+        elif isinstance(amount, int) and not isinstance(amount, bool):
+            amount = float(amount)
+
+        return {"amount": amount, "date": row["date"], "category": row["category"], "description": row["description"]}
+
+    def __add_batch(self, batch: list[tuple[int, dict[str, Any]]], errors: list[tuple[int, str]]) -> int:
+        """
+        Validates a batch column by column and adds its valid records. Only the rejected rows are checked one by
+        one, to report why.
+        """
+        records: list[dict[str, Any]] = [record for _, record in batch]
+        invalid: list[int] = self.__batch_validator.invalid_rows(
+            [record["amount"] for record in records],
+            [record["category"] for record in records],
+            [record["date"] for record in records],
+            [record["description"] for record in records]
+        )
+
+        rejected: set[int] = set()
+
+        for idx in invalid:
+            try:
+                CompactRecord.validate_json(records[idx])
+            except (TypeError, ValueError) as e:
+                errors.append((batch[idx][0], str(e)))
+                rejected.add(idx)
+
+        if rejected:
+            records = [record for idx, record in enumerate(records) if idx not in rejected]
+
+        if records:
+            with self.__fs.locked(exclusive=True):
+                with self.__track([(None, None, record) for record in records]):
+                    self.__fs.append_many(records)
+
+        return len(records)
+
     def update(
         self,
         index: int,
@@ -73,69 +194,170 @@ class Record:
             str: A success message if the record was updated, or an error message if an exception occurred.
         """
         try:
-            current_data: dict[str, list[dict[str, Any]]] = self.__fs.read_json()
+            with self.__fs.locked(exclusive=True):
+                current_record = self.__fs.get_record(index)
 
-            if current_data is None or len(current_data["list"]) == 0:
-                return "No records found."
+                if current_record is None:
+                    return "No records found." if self.__fs.count() == 0 else "Invalid index."
 
-            if index < 0 or index >= len(current_data["list"]):
-                return "Invalid index."
+                # The stored record is validated again only if the ledger may have been changed since it was validated.
+                records = ArrayListRecord()
+                if self.__aggregates.validated():
+                    records.load_trusted([current_record])
+                else:
+                    records.insert_last(current_record["amount"], current_record["category"], current_record["date"], current_record["description"])
 
-            linked_list = LinkedListRecord()
+                if records.update_by_index(0, new_amount, new_category, new_date, new_description):
+                    record = records.get(0).to_json()
 
-            for i in current_data["list"]:
-                linked_list.insert_last(i["amount"], i["category"], i["date"], i["description"])
+                    with self.__track([(index, current_record, record)]):
+                        self.__fs.replace(index, record)
 
-            if linked_list.update_by_index(index, new_amount, new_category, new_date, new_description):
-                current_data["list"].clear()
+                    return "The record was successfully updated."
+                else:
+                    return "Failed to update the record."
+        except ValueError as e:
+            return str(e)
 
-                current = linked_list.get()
+    def compact(self) -> str:
+        """
+        Compacts the storage so that it holds only the current state of the ledger.
 
-                while current is not None:
-                    current_data["list"].append(current.value.to_json())
-                    current = current.next
+        Returns:
+            str: A success message.
+        """
+        with self.__fs.locked(exclusive=True):
+            self.__fs.compact()
+            for derived in self.__indexes:
+                derived.rebuild()
 
-                self.__fs.write_json(current_data)
+        return "The ledger was successfully compacted."
 
-                return "The record was successfully updated."
-            else:
-                return "Failed to update the record."
-        except ValueError as e:
-            return str(e)
+    def verify(self) -> str:
+        """
+        Checks the saved balance totals and indexes against the records and rebuilds those that differ, and
+        checks that every record still passes validation.
+
+        Returns:
+            str: A message saying whether anything had to be rebuilt, followed by the positions of the invalid
+            records if there are any.
+        """
+        with self.__fs.locked(exclusive=True):
+            valid: list[bool] = [derived.verify() for derived in self.__indexes]
+            invalid: list[int] = self.__invalid_positions()
+            self.__aggregates.set_validated(not invalid)
 
-    def get_balance(self) -> list[str]:
+        if all(valid):
+            message = "The balance totals and indexes match the records."
+        else:
+            message = "The balance totals and indexes did not match the records and were rebuilt."
+
+        if invalid:
+            message += f" Invalid records at positions: {', '.join(map(str, invalid))}."
+        return message
+
+    def __invalid_positions(self) -> list[int]:
+        """
+        Returns the positions of the stored records that fail validation, checked `CHUNK_SIZE` records at a time.
+        """
+        invalid: list[int] = []
+        records = self.__fs.iter_records()
+        start: int = 0
+
+        while chunk := list(islice(records, self.CHUNK_SIZE)):
+            invalid += (start + idx for idx in self.__batch_validator.invalid_rows(
+                [record.get("amount") for record in chunk],
+                [record.get("category") for record in chunk],
+                [record.get("date") for record in chunk],
+                [record.get("description") for record in chunk]
+            ))
+            start += len(chunk)
+
+        return invalid
+
+    @contextmanager
+    def __track(self, changes: list[Change]) -> Iterator[None]:
+        """
+        Applies the changes written to the storage inside the block to the balance totals and indexes.
+        """
+        with ExitStack() as stack:
+            for derived in self.__indexes:
+                stack.enter_context(derived.change_many(changes))
+            yield
+
+    def get_balance(self, start: Optional[str] = None, end: Optional[str] = None) -> list[str]:
         """
         Calculates the total balance, income, and expense from the current records.
 
+        Args:
+            start (Optional[str]): The first date of the period to sum, or None for the beginning of the ledger.
+            end (Optional[str]): The last date of the period to sum, or None for the end of the ledger.
+
         Returns:
-            list[str]: A list containing the balance, income, and expense in string format.
+            list[str]: A list containing the balance, income, and expense in string format, or the error message if a date is invalid.
         """
+        try:
+            period = self.__period(start, end)
+        except ValueError as e:
+            return [str(e)]
+
+        with self.__fs.locked():
+            totals: dict[str, float] = self.__aggregates.totals(*period)
+
+        return self.__format_balance(totals)
+
+    def get_monthly_balance(self, start: Optional[str] = None, end: Optional[str] = None) -> list[str] | str:
+        """
+        Calculates the balance, income, and expense of every month that has records.
+
+        Args:
+            start (Optional[str]): The first date of the period to sum, or None for the beginning of the ledger.
+            end (Optional[str]): The last date of the period to sum, or None for the end of the ledger.
+
+        Returns:
+            list[str] | str: A list with the balance of every month in string format, or the error message if a date is invalid.
+        """
+        try:
+            period = self.__period(start, end)
+        except ValueError as e:
+            return str(e)
+
+        with self.__fs.locked():
+            months = self.__aggregates.months(*period)
+
+        return ["\n".join([f"[{month}]", *self.__format_balance(totals)]) for month, totals in months]
+
+    @staticmethod
+    def __period(start: Optional[str], end: Optional[str]) -> tuple[Optional[int], Optional[int]]:
+        """
+        Validates the dates of a period and converts them into day numbers.
+        """
+        validator = ValidatorRecord()
+
+        for value in (start, end):
+            if value is not None:
+                validator.is_date(value)
+
+        return (
+            None if start is None else to_day_number(start),
+            None if end is None else to_day_number(end),
+        )
+
+    def __format_balance(self, totals: dict[str, float]) -> list[str]:
         balance: str = "Balance: "
         income: str = "Income: "
         expense: str = "Expense: "
         result: list[str] = []
 
-        current_data: dict[str, list[dict[str, Any]]] = self.__fs.read_json()
-        
-        if len(current_data["list"]) == 0:
+        if totals["count"] == 0:
             balance += "0"
             income += "0"
             expense += "0"
         else:
-            record_attributes = EntityRecordAttributes()
-
-            balance_: float = 0.0
-            income_: float = 0.0
-            expense_: float = 0.0
-            for i in current_data["list"]:
-                if i["category"] == record_attributes.categories[0]:  # income
-                    balance_ += i["amount"]
-                    income_ += i["amount"]
-                elif i["category"] == record_attributes.categories[1]:  # expense
-                    balance_ -= i["amount"]
-                    expense_ += i["amount"]
+            income_: float = totals[self.__categories[0]]  # income
+            expense_: float = totals[self.__categories[1]]  # expense
             
-            balance += str(round(balance_, 2))
+            balance += str(round(income_ - expense_, 2))
             income += str(round(income_, 2))
             expense += str(round(expense_, 2))
             
@@ -153,13 +375,9 @@ class Record:
         """
         result: list[str] = []
 
-        current_data: dict[str, list[dict[str, Any]]] = self.__fs.read_json()
-        
-        if len(current_data["list"]) == 0:
-            return []
-        else:
-            for idx, val in enumerate(current_data["list"]):
-                result.append(f"[{idx}]\nAmount: {round(val['amount'], 2)}.\nCategory: {val['category']}.\nDate: {val['date']}.\nDescription: {val['description']}.")
+        with self.__fs.locked():
+            for idx, val in enumerate(self.__fs.iter_records()):
+                result.append(self.__format(idx, val))
 
         return result
 
@@ -174,31 +392,358 @@ class Record:
         Returns:
             list[str] | str: A list of records matching the search criteria, or a message if the key is invalid.
         """
-        result: list[str] = []
+        with self.__fs.locked():
+            if self.__aggregates.totals()["count"] == 0:
+                return "No records found."
+
+            error = self.__check_key(by, value)
+            if error is not None:
+                return error
+
+            return [self.__format(idx, val) for idx, val in self.__key_matches(by, value, None, 0, None)]
+
+    def iter_records(self) -> Iterator[RecordView]:
+        """
+        Yields all records lazily, in ledger order, as views that are not validated again.
+
+        The ledger stays locked for reading until the iterator is exhausted or closed.
+
+        Returns:
+            Iterator[RecordView]: The records and their positions.
+        """
+        with self.__fs.locked():
+            for idx, val in enumerate(self.__fs.iter_records()):
+                yield RecordView.from_json(idx, val)
+
+    def iter_by_key(self, by: str, value: float | str) -> Iterator[RecordView] | str:
+        """
+        Yields the records matching a key lazily, in ledger order, as views that are not validated again.
+
+        The ledger stays locked for reading until the iterator is exhausted or closed.
+
+        Args:
+            by (str): The key by which to search ('amount', 'category', 'date').
+            value (float | str): The value to search for.
+
+        Returns:
+            Iterator[RecordView] | str: The matching records and their positions, or the error message if the key or the value is invalid.
+        """
+        error = self.__check_key(by, value)
+        if error is not None:
+            return error
+
+        return self.__iter_by_key(by, value)
+
+    def __iter_by_key(self, by: str, value: float | str) -> Iterator[RecordView]:
+        with self.__fs.locked():
+            for idx, val in self.__key_matches(by, value, None, 0, None):
+                yield RecordView.from_json(idx, val)
+
+    def get_page(self, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None) -> tuple[list[str], Optional[str]] | str:
+        """
+        Retrieves one page of the records, reading only the records of that page from the storage.
+
+        Args:
+            limit (Optional[int]): The largest number of records on the page, or None for all the remaining ones.
+            offset (int): The number of records to skip.
+            cursor (Optional[str]): The cursor returned with the previous page, to continue after it.
+
+        Returns:
+            tuple[list[str], Optional[str]] | str: The string representation of the records and the cursor of the
+            next page, None on the last page, or the error message if a paging argument is invalid.
+        """
+        try:
+            after = self.__paging(limit, offset, cursor)
+        except ValueError as e:
+            return str(e)
+
+        start: int = offset if after is None else after + 1 + offset
+
+        with self.__fs.locked():
+            # One record more than asked for tells whether there is a next page.
+            stop: int = self.__fs.count() if limit is None else start + limit + 1
+            matches = list(self.__fs.get_records(range(start, stop)))
+
+        return self.__page(matches, limit)
+
+    def get_by_key_page(
+        self,
+        by: str,
+        value: float | str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> tuple[list[str], Optional[str]] | str:
+        """
+        Retrieves one page of the records matching a key, reading only the records of that page from the storage.
+
+        Args:
+            by (str): The key by which to search ('amount', 'category', 'date').
+            value (float | str): The value to search for.
+            limit (Optional[int]): The largest number of records on the page, or None for all the remaining ones.
+            offset (int): The number of matching records to skip.
+            cursor (Optional[str]): The cursor returned with the previous page, to continue after it.
+
+        Returns:
+            tuple[list[str], Optional[str]] | str: The string representation of the records and the cursor of the
+            next page, None on the last page, or the error message if the key or a paging argument is invalid.
+        """
+        try:
+            after = self.__paging(limit, offset, cursor)
+        except ValueError as e:
+            return str(e)
+
+        with self.__fs.locked():
+            if self.__aggregates.totals()["count"] == 0:
+                return "No records found."
+
+            error = self.__check_key(by, value)
+            if error is not None:
+                return error
+
+            return self.__page(list(self.__key_matches(by, value, after, offset, None if limit is None else limit + 1)), limit)
+
+    def __key_matches(
+        self,
+        by: str,
+        value: float | str,
+        after: Optional[int],
+        offset: int,
+        limit: Optional[int]
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Finds the records whose `by` field equals `value` and whose positions come after `after`, skipping
+        `offset` of them and reading at most `limit`. Must be called with the ledger locked.
+        """
+        if self.__key_index is not None:
+            positions = self.__key_index.lookup(by, value)
+            start: int = offset + (0 if after is None else bisect_right(positions, after))
+            # Only the positions of the page are read from the storage.
+            return self.__fs.get_records(positions[start:None if limit is None else start + limit])
+
+        matches = [(idx, val) for idx, val in self.__fs.select(by, value) if after is None or idx > after]
+        return iter(matches[offset:None if limit is None else offset + limit])
+
+    @staticmethod
+    def __check_key(by: str, value: float | str) -> Optional[str]:
+        """
+        Returns the error message if records cannot be searched by the key and value, otherwise None.
+        """
+        if not ((by == "amount" and isinstance(value, float)) or (by in ("category", "date") and isinstance(value, str))):
+            return f"The '{by}' key cannot be searched, the available search keys are 'amount', 'category', 'date'."
+
+        try:
+            # Validates the searched value the same way a stored one is validated.
+            EntityRecord(**{by: value})
+        except ValueError as e:
+            return str(e)
+
+        return None
+
+    def __paging(self, limit: Optional[int], offset: int, cursor: Optional[str]) -> Optional[int]:
+        """
+        Checks the paging arguments and returns the position the cursor continues after, if there is one.
+        """
+        if cursor is not None and not self.__fs.STABLE_POSITIONS:
+            raise ValueError("This storage does not support cursors, its positions change as records are added. Use --offset instead.")
+        if limit is not None and limit <= 0:
+            raise ValueError("The limit must be greater than 0.")
+        if offset < 0:
+            raise ValueError("The offset cannot be less than 0.")
+        if cursor is None:
+            return None
+
+        try:
+            after = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))["after"]
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise ValueError("Invalid cursor.")
+
+        if not isinstance(after, int) or after < 0:
+            raise ValueError("Invalid cursor.")
+        return after
+
+    def __page(self, matches: list[tuple[int, dict[str, Any]]], limit: Optional[int]) -> tuple[list[str], Optional[str]]:
+        """
+        Formats the records of a page read with one extra record, and makes the cursor of the next page if there is one.
+        """
+        cursor: Optional[str] = None
+
+        if limit is not None and len(matches) > limit:
+            matches = matches[:limit]
+
+            # The cursor holds the position of the last record of the page, which stays valid as records are added
+            # only where positions are stable.
+            if self.__fs.STABLE_POSITIONS:
+                cursor = base64.urlsafe_b64encode(json.dumps({"after": matches[-1][0]}).encode('ascii')).decode('ascii')
+
+        return [self.__format(idx, val) for idx, val in matches], cursor
+
+    def get_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[str] | str:
+        """
+        Retrieves the records dated within a period, in date order.
+
+        Records are read from the storage in chunks as the result is consumed, and the ledger stays locked for
+        reading until it is exhausted or closed.
+
+        Args:
+            start (Optional[str]): The first date of the period, or None for the beginning of the ledger.
+            end (Optional[str]): The last date of the period, or None for the end of the ledger.
+
+        Returns:
+            Iterator[str] | str: The string representation of the records, or the error message if a date is invalid.
+        """
+        try:
+            period = self.__period(start, end)
+        except ValueError as e:
+            return str(e)
+
+        return self.__range(*period)
 
-        current_data: dict[str, list[dict[str, Any]]] = self.__fs.read_json()
-        
-        if len(current_data["list"]) == 0:
-            return "No records found."
+    def __range(self, start: Optional[int], end: Optional[int]) -> Iterator[str]:
+        with self.__fs.locked():
+            if self.__date_index is None:
+                for idx, val in self.__fs.select_range(start, end):
+                    yield self.__format(idx, val)
+            else:
+                yield from self.__stream(self.__date_index.range(start, end))
+
+    def get_by_amount(
+        self,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        category: Optional[str] = None,
+        strict: bool = False
+    ) -> Iterator[str] | str:
+        """
+        Retrieves the records with amounts within a range, in ascending order of amount.
+
+        Records are read from the storage in chunks as the result is consumed, and the ledger stays locked for
+        reading until it is exhausted or closed.
+
+        Args:
+            minimum (Optional[float]): The smallest amount, or None for no lower bound.
+            maximum (Optional[float]): The largest amount, or None for no upper bound.
+            category (Optional[str]): The only category to search, or None for all of them.
+            strict (bool): Whether amounts equal to `minimum` or `maximum` are left out.
+
+        Returns:
+            Iterator[str] | str: The string representation of the records, or the error message if a bound or the category is invalid.
+        """
+        try:
+            # Validates the bounds and the category the same way stored values are validated.
+            for amount in (minimum, maximum):
+                if amount is not None:
+                    EntityRecord(amount=amount)
+            if category is not None:
+                EntityRecord(category=category)
+        except ValueError as e:
+            return str(e)
+
+        return self.__amount_range(minimum, maximum, category, strict)
+
+    def __amount_range(self, minimum: Optional[float], maximum: Optional[float], category: Optional[str], strict: bool) -> Iterator[str]:
+        with self.__fs.locked():
+            if self.__amount_index is None:
+                for idx, val in self.__fs.select_amount_range(minimum, maximum, category, strict):
+                    yield self.__format(idx, val)
+            else:
+                yield from self.__stream(self.__amount_index.range(minimum, maximum, category, strict))
+
+    def search(self, query: str) -> Iterator[str] | str:
+        """
+        Retrieves the records whose descriptions contain every word of the query, in ledger order.
+
+        Words are compared after Unicode normalization and case folding, and a word ending with `*` matches
+        every word that starts with it. Records are read from the storage in chunks as the result is consumed,
+        and the ledger stays locked for reading until it is exhausted or closed.
+
+        Args:
+            query (str): The words to search for, separated by spaces.
+
+        Returns:
+            Iterator[str] | str: The string representation of the records, or the error message if the query has no words.
+        """
+        terms = parse_query(query)
+
+        if not terms:
+            return "The search query must contain at least one word."
+
+        return self.__search(terms)
+
+    def __search(self, terms: list[tuple[str, bool]]) -> Iterator[str]:
+        with self.__fs.locked():
+            if self.__text_index is None:
+                for idx, val in self.__fs.search(terms):
+                    yield self.__format(idx, val)
+            else:
+                yield from self.__stream(self.__text_index.search(terms))
+
+    def export(self, start: Optional[str] = None, end: Optional[str] = None, category: Optional[str] = None) -> Iterator[dict[str, Any]] | str:
+        """
+        Retrieves the records to export, as stored and without building record objects, for `fs.write_rows`.
+
+        The whole ledger is read in ledger order, a period in date order. Records are read from the storage as
+        the result is consumed, and the ledger stays locked for reading until it is exhausted or closed.
+
+        Args:
+            start (Optional[str]): The first date of the period, or None for the beginning of the ledger.
+            end (Optional[str]): The last date of the period, or None for the end of the ledger.
+            category (Optional[str]): The only category to export, or None for all of them.
+
+        Returns:
+            Iterator[dict[str, Any]] | str: The records, or the error message if a date or the category is invalid.
+        """
+        try:
+            period = self.__period(start, end)
+            if category is not None:
+                EntityRecord(category=category)
+        except ValueError as e:
+            return str(e)
+
+        return self.__export(*period, category)
+
+    def __export(self, start: Optional[int], end: Optional[int], category: Optional[str]) -> Iterator[dict[str, Any]]:
+        with self.__fs.locked():
+            if start is None and end is None:
+                records: Iterator[dict[str, Any]] = self.__fs.iter_records()
+            elif self.__date_index is None:
+                records = (val for _, val in self.__fs.select_range(start, end))
+            else:
+                records = (val for _, val in self.__records(self.__date_index.range(start, end)))
+
+            for val in records:
+                if category is None or val["category"] == category:
+                    yield val
+
+    def __stream(self, positions: list[int]) -> Iterator[str]:
+        """
+        Reads the records at `positions` in chunks and yields them formatted, in the order of `positions`.
+        """
+        for idx, val in self.__records(positions):
+            yield self.__format(idx, val)
+
+    def __records(self, positions: list[int]) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Reads the records at `positions` in chunks and yields them with their positions, in the order of `positions`.
+
+        A storage without random access is read in a single pass instead, holding the records until their turn
+        comes when `positions` are not in ledger order.
+        """
+        if self.__fs.random_access():
+            chunks: Iterable[list[int]] = (positions[start:start + self.CHUNK_SIZE] for start in range(0, len(positions), self.CHUNK_SIZE))
+        elif all(previous < position for previous, position in zip(positions, positions[1:])):
+            yield from self.__fs.get_records(positions)
+            return
         else:
-            try:
-                linked_list = LinkedListRecord()
-
-                for i in current_data["list"]:
-                    linked_list.insert_last(i["amount"], i["category"], i["date"], i["description"])
-                
-                if by == "amount" and isinstance(value, float):
-                    for idx, val in linked_list.get_by_amount(value).items():
-                        result.append(f"[{idx}]\nAmount: {round(val.amount, 2)}.\nCategory: {val.category}.\nDate: {val.date}.\nDescription: {val.description}.")
-                elif by == "category" and isinstance(value, str):
-                    for idx, val in linked_list.get_by_category(value).items():
-                        result.append(f"[{idx}]\nAmount: {round(val.amount, 2)}.\nCategory: {val.category}.\nDate: {val.date}.\nDescription: {val.description}.")
-                elif by == "date" and isinstance(value, str):
-                    for idx, val in linked_list.get_by_date(value).items():
-                        result.append(f"[{idx}]\nAmount: {round(val.amount, 2)}.\nCategory: {val.category}.\nDate: {val.date}.\nDescription: {val.description}.")
-                else:
-                    return f"The '{by}' key cannot be searched, the available search keys are 'amount', 'category', 'date'."
-            except ValueError as e:
-                return str(e)
-        
-        return result
+            chunks = [positions]
+
+        for chunk in chunks:
+            records = dict(self.__fs.get_records(chunk))
+
+            for idx in chunk:
+                if idx in records:
+                    yield idx, records[idx]
+
+    @staticmethod
+    def __format(idx: int, val: dict[str, Any]) -> str:
+        return str(RecordView.from_json(idx, val))
@@ -1,5 +1,6 @@
 from typing import Any
 import unittest
+from entities.containers.array_list import ArrayListRecord
 from entities.containers.linked_list import LinkedListRecord
 
 
@@ -249,4 +250,92 @@ class TestLinkedListRecord(unittest.TestCase):
         self.assertEqual(linked_list.update_by_index(1, new_amount=535.535), True)
         self.assertEqual(linked_list.update_by_index(2, new_category="expense"), True)
         self.assertEqual(linked_list.update_by_index(3, new_date="2011-2-2"), True)
-        self.assertEqual(linked_list.update_by_index(4, new_description="Not Empty"), True)
\ No newline at end of file
+        self.assertEqual(linked_list.update_by_index(4, new_description="Not Empty"), True)
+
+class TestArrayListRecord(unittest.TestCase):
+    """Unit tests for the ArrayListRecord class to verify it behaves like LinkedListRecord."""
+
+    test_data: list[list[Any]] = [
+        [134.4234, "income", "2024-5-5", "That description doesn't make sense."],
+        [123.31, "expense", "2024-1-1", ""],
+        [4234.424, "income", "2024-4-10", "Bonus payment for project completion."],
+        [54234.31, "expense", "2024-1-6", "Продукты"],
+    ]  # amount, category, date, description
+
+    def filled(self) -> ArrayListRecord:
+        array_list = ArrayListRecord()
+        for item in self.test_data:
+            array_list.insert_last(amount=item[0], category=item[1], date=item[2], description=item[3])
+        return array_list
+
+    def test_insert(self):
+        """Test that insert_first and insert_last keep the order of the records.
+
+        Checks that:
+        - Records inserted at the end keep their order, those inserted at the beginning are reversed.
+        - Records are read by index, and None is returned for an index out of range.
+        """
+        array_list = self.filled()
+        self.assertEqual(array_list.length, len(self.test_data))
+        self.assertEqual([array_list.get(i).amount for i in range(array_list.length)], [item[0] for item in self.test_data])
+        self.assertEqual(array_list.get(len(self.test_data)), None)
+        self.assertEqual(array_list.get(-1), None)
+
+        array_list = ArrayListRecord()
+        self.assertEqual(array_list.get(), None)
+        for item in self.test_data:
+            array_list.insert_first(amount=item[0], category=item[1], date=item[2], description=item[3])
+        self.assertEqual([array_list.get(i).amount for i in range(array_list.length)], [item[0] for item in reversed(self.test_data)])
+
+    def test_load_trusted(self):
+        """Test that stored records are loaded without validation and validated once they are changed.
+
+        Checks that:
+        - Trusted records are appended with their stored values, even ones that would not pass validation.
+        - Values set through `update_by_index` are still validated.
+        """
+        array_list = self.filled()
+        array_list.load_trusted([
+            {"amount": 5.0, "category": "expense", "date": "2024-3-1", "description": "Такси"},
+            {"amount": -1.0, "category": "gift", "date": "2024-3-1", "description": ""},
+        ])
+        self.assertEqual(array_list.length, len(self.test_data) + 2)
+        self.assertEqual(array_list.get(len(self.test_data)).to_json()["description"], "Такси")
+        self.assertEqual(array_list.get(len(self.test_data) + 1).category, "gift")
+
+        with self.assertRaises(ValueError):
+            array_list.update_by_index(len(self.test_data), new_category="gift")
+
+    def test_get_by(self):
+        """Test that get_by_amount, get_by_category and get_by_date return the matching records by index."""
+        array_list = self.filled()
+
+        self.assertEqual(list(array_list.get_by_amount(4234.424)), [2])
+        self.assertEqual(list(array_list.get_by_category("expense")), [1, 3])
+        self.assertEqual(list(array_list.get_by_date("2024-1-6")), [3])
+
+        with self.assertRaises(ValueError):
+            array_list.get_by_category("gift")
+
+    def test_remove_by_index(self):
+        """Test that remove_by_index removes the record at the index and shifts the following ones."""
+        array_list = self.filled()
+
+        self.assertEqual(array_list.remove_by_index(10), False)
+        self.assertEqual(array_list.remove_by_index(-1), False)
+        self.assertEqual(array_list.remove_by_index(1), True)
+        self.assertEqual(array_list.length, len(self.test_data) - 1)
+        self.assertEqual(array_list.get(1).amount, self.test_data[2][0])
+        self.assertEqual(ArrayListRecord().remove_by_index(0), False)
+
+    def test_update_by_index(self):
+        """Test that update_by_index changes only the given fields and validates them."""
+        array_list = self.filled()
+
+        self.assertEqual(ArrayListRecord().update_by_index(0, 0.0, "", "", ""), False)
+        self.assertEqual(array_list.update_by_index(1, new_amount=535.535, new_date="2011-2-2"), True)
+        self.assertEqual(array_list.get(1).to_json(), {"amount": 535.535, "date": "2011-2-2", "category": "expense", "description": ""})
+        self.assertEqual(array_list.update_by_index(4, new_amount=1.0), False)
+
+        with self.assertRaises(ValueError):
+            array_list.update_by_index(0, new_category="gift")
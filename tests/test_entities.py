@@ -1,6 +1,7 @@
 import random
 import string
 import unittest
+from entities.compact_record import CompactRecord
 from entities.record import EntityRecord
 
 class TestEntityRecord(unittest.TestCase):
@@ -77,4 +78,51 @@ class TestEntityRecord(unittest.TestCase):
             return result
 
         with self.assertRaises(ValueError):
-            EntityRecord(description=generate_string(501))
\ No newline at end of file
+            EntityRecord(description=generate_string(501))
+
+class TestCompactRecord(unittest.TestCase):
+    """Unit tests for the CompactRecord class to ensure it validates like EntityRecord and stays compact."""
+
+    def test_validation(self):
+        """Test that every field is validated with the rules of EntityRecord.
+
+        Verifies that:
+        - Valid values are set and converted to the same JSON as EntityRecord.
+        - Invalid values raise the same exceptions, also when set after construction.
+        - Reading a field that was never set raises AttributeError.
+        """
+        record = CompactRecord(123.456, "income", "2024-2-1", "Продукты")
+        self.assertEqual(record.to_json(), EntityRecord(123.456, "income", "2024-2-1", "Продукты").to_json())
+
+        for kwargs, error in (
+            ({"amount": 123}, TypeError),
+            ({"amount": -12.0}, ValueError),
+            ({"category": "none"}, ValueError),
+            ({"date": "2/11/2024"}, ValueError),
+            ({"date": "2024-2-30"}, ValueError),
+            ({"description": "x" * 501}, ValueError),
+        ):
+            with self.assertRaises(error):
+                CompactRecord(**kwargs)
+
+        with self.assertRaises(ValueError):
+            record.category = "none"
+        self.assertEqual(record.category, "income")
+
+        with self.assertRaises(AttributeError):
+            CompactRecord(amount=1.0).date
+
+        CompactRecord.validate_json(record.to_json())
+        with self.assertRaises(ValueError):
+            CompactRecord.validate_json({**record.to_json(), "date": "2024-2-30"})
+        with self.assertRaises(ValueError):
+            CompactRecord.validate_json({"amount": 1.0})
+
+    def test_compact(self):
+        """Test that records keep only their values in slots and share their validators."""
+        first, second = CompactRecord(1.0, "income", "2024-1-1", ""), CompactRecord(2.0, "expense", "2024-1-2", "")
+
+        self.assertFalse(hasattr(first, "__dict__"))
+        with self.assertRaises(AttributeError):
+            first.note = "x"
+        self.assertIs(first._date_type, second._date_type)
@@ -1,4 +1,5 @@
 import unittest
+from entities.schema import compile_schema
 from entities.types import EntityTypeBool, EntityTypeDict, EntityTypeFloat, EntityTypeInteger, EntityTypeList, EntityTypeString
 
 class TestEntityTypes(unittest.TestCase):
@@ -380,4 +381,74 @@ class TestEntityTypes(unittest.TestCase):
         type_bool = EntityTypeBool(validate_function=validate_function)
         type_bool.value = False
         with self.assertRaises(ValueError):
-            type_bool.value = True
\ No newline at end of file
+            type_bool.value = True
+
+    def test_compile(self):
+        """
+        Tests the compiled validators of the entity types and of whole schemas.
+
+        Verifies:
+            - Invalid limits are reported when a type is created, before any value is set.
+            - A compiled type checks values like setting them does, without changing the value of the type.
+            - A compiled schema checks every field of a record and reports missing ones.
+        """
+        for create in (
+            lambda: EntityTypeString(min_length=-1),
+            lambda: EntityTypeString(max_length=-1),
+            lambda: EntityTypeList(min_length=-1),
+            lambda: EntityTypeDict(max_keys=-1),
+        ):
+            with self.assertRaises(AttributeError):
+                create()
+
+        type_string = EntityTypeString(pattern=r"^[a-z]+$", allowed_values=["abc", "ab1"], max_length=3)
+        validate = type_string.compile()
+        validate("abc")
+
+        for value, error in (("ab1", ValueError), ("abcd", ValueError), ("xyz", ValueError), (1, TypeError)):
+            with self.assertRaises(error):
+                validate(value)
+        with self.assertRaises(AttributeError):
+            type_string.value
+        self.assertIs(type_string.compile(), validate)
+
+        # Compiled validators raise the same errors as setting the value.
+        for entity_type, values in (
+            (EntityTypeInteger(min_val=0, max_val=10), [5, -1, 11, 1.0]),
+            (EntityTypeFloat(min_val=0.0), [1.0, -1.0, 1]),
+            (EntityTypeString(min_length=2, max_length=3, allowed_values=["ab", "abcd"], pattern=r"^a"), ["ab", "a", "abcd", "bb", "ba", 1]),
+            (EntityTypeList(allowed_type=int, min_length=1, max_length=2), [[1], [], [1, 2, 3], ["a"], "a"]),
+            (EntityTypeDict(allowed_key_type=str, allowed_value_type=int, min_keys=1, max_keys=2, required_keys=["a"]), [
+                {"a": 1}, {}, {"a": 1, "b": 2, "c": 3}, {1: 1, "a": 1}, {"a": "b"}, {"b": 1}, [],
+            ]),
+            (EntityTypeBool(), [True, 1]),
+        ):
+            validate = entity_type.compile()
+            for value in values:
+                try:
+                    entity_type.value = value
+                    expected = None
+                except (TypeError, ValueError, KeyError) as e:
+                    expected = (type(e), str(e))
+                try:
+                    validate(value)
+                    actual = None
+                except (TypeError, ValueError, KeyError) as e:
+                    actual = (type(e), str(e))
+                self.assertEqual(actual, expected, value)
+
+        validate_record = compile_schema({
+            "count": EntityTypeInteger(min_val=0),
+            "share": EntityTypeFloat(max_val=1.0),
+            "name": EntityTypeString(min_length=1),
+        })
+        validate_record({"count": 1, "share": 0.5, "name": "a"})
+
+        for record, error in (
+            ({"count": -1, "share": 0.5, "name": "a"}, ValueError),
+            ({"count": 1, "share": 1, "name": "a"}, TypeError),
+            ({"count": 1, "share": 0.5, "name": ""}, ValueError),
+            ({"count": 1, "share": 0.5}, ValueError),
+        ):
+            with self.assertRaises(error):
+                validate_record(record)
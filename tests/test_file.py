@@ -1,7 +1,15 @@
+import json
 import os
+import shutil
+import struct
+import tempfile
+import zlib
 from typing import Any
 import unittest
-from fs import File
+from unittest import mock
+from entities.dates import to_day_number
+from fs.file import CHUNK_SIZE, stream_list
+from fs import BaseStorage, ColumnarFile, CompressedFile, File, JournalFile, ShardedFile, SqliteFile, WalFile
 
 class TestFile(unittest.TestCase):
     def file_exists(self, filename: str) -> bool:
@@ -58,3 +66,745 @@ class TestFile(unittest.TestCase):
         self.assertEqual(data, data_from_file, f"The data from the file does not match the original data. Expected: {data}. Found: {data_from_file}")
         # Delete the file and check if the deletion was successful
         self.assertEqual(self.delete_file(self.__fs.FILENAME), True)
+
+class TestFileCache(unittest.TestCase):
+    """Unit tests for the parsed document cache of the JSON storage."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "data.json")
+        self.records: list[dict[str, Any]] = [
+            {"amount": float(i), "date": "2024-05-05", "category": "expense", "description": f"Запись {i}"}
+            for i in range(3)
+        ]
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_repeated_reads_parse_once(self):
+        """Test that reads reuse the parsed document until the file changes."""
+        file = File(self.filename)
+        file.write_json({"list": self.records})
+
+        with mock.patch("fs.file.json.load", wraps=json.load) as load:
+            self.assertEqual(file.read_json(), {"list": self.records})
+            self.assertEqual(list(file.iter_records()), self.records)
+            self.assertEqual(file.count(), 3)
+            self.assertEqual(load.call_count, 0)
+
+        # A document changed by the caller does not change the cache.
+        file.read_json()["list"].clear()
+        self.assertEqual(file.read_json(), {"list": self.records})
+
+    def test_changes_by_another_writer(self):
+        """Test that a file replaced by another object is parsed again."""
+        file = File(self.filename)
+        self.assertEqual(file.read_json(), {"list": []})
+
+        File(self.filename).append(self.records[0])
+        self.assertEqual(file.read_json(), {"list": self.records[:1]})
+
+        # A change the file attributes cannot reveal needs an explicit invalidation.
+        stat = os.stat(self.filename)
+        with open(self.filename, 'r+', encoding='utf-8') as f:
+            content = f.read().replace("0.0", "9.0")
+            f.seek(0)
+            f.write(content)
+        os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.assertEqual(file.read_json()["list"][0]["amount"], 0.0)
+        file.invalidate()
+        self.assertEqual(file.read_json()["list"][0]["amount"], 9.0)
+
+    def test_large_files_are_streamed(self):
+        """Test that files above the cache size are not kept in memory."""
+        file = File(self.filename, cache_size=10)
+        file.write_json({"list": self.records})
+
+        with mock.patch("fs.file.stream_list", wraps=stream_list) as stream:
+            self.assertEqual(list(file.iter_records()), self.records)
+            self.assertEqual(list(file.iter_records()), self.records)
+            self.assertEqual(stream.call_count, 2)
+
+class TestJournalFile(unittest.TestCase):
+    """Unit tests for the append-only JournalFile storage."""
+
+    FILENAME: str = "test_data.jsonl"
+
+    def tearDown(self) -> None:
+        if os.path.isfile(self.FILENAME):
+            os.remove(self.FILENAME)
+
+    def test_append(self):
+        """Test that every append adds exactly one line and the records are replayed in order."""
+        journal = JournalFile(self.FILENAME)
+        records: list[dict[str, Any]] = [
+            {"amount": 10.0, "date": "2024-5-5", "category": "income", "description": "Зарплата"},
+            {"amount": 2.5, "date": "2024-5-6", "category": "expense", "description": ""},
+        ]
+
+        for record in records:
+            journal.append(record)
+
+        with open(self.FILENAME, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), len(records))
+
+        self.assertEqual(journal.read_json(), {"list": records})
+        self.assertEqual(journal.count(), len(records))
+
+    def test_replace(self):
+        """Test that updates are appended to the journal and applied on replay."""
+        journal = JournalFile(self.FILENAME)
+        record: dict[str, Any] = {"amount": 10.0, "date": "2024-5-5", "category": "income", "description": "Зарплата"}
+        updated: dict[str, Any] = dict(record, amount=20.0)
+
+        journal.append(record)
+        self.assertTrue(journal.replace(0, updated))
+        self.assertFalse(journal.replace(1, updated))
+
+        self.assertEqual(journal.read_json(), {"list": [updated]})
+        self.assertEqual(journal.get_record(0), updated)
+        self.assertIsNone(journal.get_record(1))
+
+    def test_torn_line(self):
+        """Test that a partially written last line is ignored on replay."""
+        journal = JournalFile(self.FILENAME)
+        journal.append({"amount": 10.0, "date": "2024-5-5", "category": "income", "description": ""})
+
+        with open(self.FILENAME, 'a', encoding='utf-8') as f:
+            f.write('{"op": "add", "record": {"amou')
+
+        self.assertEqual(len(journal.read_json()["list"]), 1)
+        self.assertEqual(journal.count(), 1)
+
+        journal.append({"amount": 20.0, "date": "2024-5-6", "category": "income", "description": ""})
+        self.assertEqual(journal.count(), 2)
+        self.assertEqual(journal.get_record(1)["amount"], 20.0)
+
+    def test_offsets(self):
+        """Test that counts and single reads decode only the lines appended since the previous call."""
+        journal = JournalFile(self.FILENAME)
+        record: dict[str, Any] = {"amount": 10.0, "date": "2024-5-5", "category": "income", "description": "Зарплата"}
+        journal.append_many([dict(record, amount=float(i)) for i in range(100)])
+        self.assertEqual(journal.count(), 100)
+
+        with mock.patch("fs.journal.json.loads", wraps=json.loads) as loads:
+            self.assertTrue(journal.replace(42, dict(record, amount=420.0)))
+            self.assertEqual(journal.get_record(42)["amount"], 420.0)
+            self.assertEqual(journal.get_record(99)["amount"], 99.0)
+            self.assertLessEqual(loads.call_count, 3)
+
+        # Writes of another instance and rewrites of the journal are picked up.
+        JournalFile(self.FILENAME).append(dict(record, amount=100.0))
+        self.assertEqual(journal.count(), 101)
+        self.assertEqual([idx for idx, _ in journal.get_records([100, 5, 101])], [5, 100])
+
+        journal.write_json({"list": [record]})
+        self.assertEqual(journal.count(), 1)
+        self.assertEqual(journal.get_record(0), record)
+
+class TestWalFile(unittest.TestCase):
+    """Unit tests for the snapshot plus write-ahead log storage."""
+
+    FILENAME: str = "test_data.snapshot.json"
+
+    def tearDown(self) -> None:
+        for filename in (self.FILENAME, f"{self.FILENAME}.wal"):
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+    def records(self, count: int) -> list[dict[str, Any]]:
+        return [
+            {"amount": float(i), "date": "2024-5-5", "category": "income", "description": f"Запись {i}"}
+            for i in range(count)
+        ]
+
+    def test_log_replay(self):
+        """Test that changes go to the log and are replayed on top of the snapshot."""
+        wal = WalFile(self.FILENAME)
+        records = self.records(3)
+
+        for record in records:
+            wal.append(record)
+        records[1] = dict(records[1], amount=100.0)
+        wal.replace(1, records[1])
+
+        self.assertEqual(wal.read_json(), {"list": records})
+        self.assertEqual(WalFile(self.FILENAME).read_json(), {"list": records})
+
+    def test_compact(self):
+        """Test that compaction folds the log into the snapshot and empties the log."""
+        wal = WalFile(self.FILENAME)
+        records = self.records(3)
+
+        for record in records:
+            wal.append(record)
+        size_before = wal.log_size()
+        wal.compact()
+
+        self.assertLess(wal.log_size(), size_before)
+        self.assertEqual(wal.read_json(), {"list": records})
+
+        wal.append(records[0])
+        self.assertEqual(wal.read_json(), {"list": records + [records[0]]})
+
+    def test_compact_threshold(self):
+        """Test that the log is compacted automatically once it passes the threshold."""
+        wal = WalFile(self.FILENAME, compact_threshold=300)
+        records = self.records(10)
+
+        for record in records:
+            wal.append(record)
+
+        self.assertLessEqual(wal.log_size(), 300)
+        self.assertEqual(wal.read_json(), {"list": records})
+
+    def test_interrupted_compaction(self):
+        """Test that a log already folded into the snapshot is not applied twice."""
+        wal = WalFile(self.FILENAME)
+        records = self.records(2)
+
+        for record in records:
+            wal.append(record)
+
+        with open(f"{self.FILENAME}.wal", 'r', encoding='utf-8') as f:
+            stale_log = f.read()
+        wal.compact()
+        # Simulate a crash between switching the snapshot and resetting the log.
+        with open(f"{self.FILENAME}.wal", 'w', encoding='utf-8') as f:
+            f.write(stale_log)
+
+        self.assertEqual(wal.read_json(), {"list": records})
+
+        wal = WalFile(self.FILENAME)
+        wal.append(records[0])
+        self.assertEqual(wal.read_json(), {"list": records + [records[0]]})
+
+    def test_count_reads_only_the_log(self):
+        """Test that counting and updating the ledger do not read the snapshot."""
+        wal = WalFile(self.FILENAME)
+        records = self.records(5)
+
+        for record in records[:3]:
+            wal.append(record)
+        wal.compact()
+        for record in records[3:]:
+            wal.append(record)
+
+        with mock.patch("fs.wal.stream_list", wraps=stream_list) as stream:
+            self.assertEqual(wal.count(), 5)
+            self.assertTrue(wal.replace(4, records[0]))
+            self.assertFalse(wal.replace(5, records[0]))
+            self.assertEqual(WalFile(self.FILENAME).count(), 5)
+
+        stream.assert_not_called()
+
+class TestColumnarFile(unittest.TestCase):
+    """Unit tests for the memory-mapped columnar storage."""
+
+    FILENAME: str = "test_data.columns"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.FILENAME, ignore_errors=True)
+
+    def records(self) -> list[dict[str, Any]]:
+        return [
+            {"amount": 134.4234, "date": "2024-05-05", "category": "income", "description": "That description doesn't make sense."},
+            {"amount": 123.31, "date": "2024-01-01", "category": "expense", "description": ""},
+            {"amount": 54234.31, "date": "2024-01-06", "category": "expense", "description": "Продукты"},
+            {"amount": 123.31, "date": "2021-04-01", "category": "expense", "description": "Empty"},
+        ]
+
+    def test_round_trip(self):
+        """Test that appended and rewritten records are read back unchanged."""
+        columnar = ColumnarFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            columnar.append(record)
+
+        self.assertEqual(columnar.count(), len(records))
+        self.assertEqual(columnar.read_json(), {"list": records})
+        self.assertEqual(columnar.get_record(2), records[2])
+        self.assertIsNone(columnar.get_record(4))
+
+        columnar.write_json({"list": records[:2]})
+        self.assertEqual(ColumnarFile(self.FILENAME).read_json(), {"list": records[:2]})
+
+    def test_replace(self):
+        """Test that a record can be replaced in place, including a longer description."""
+        columnar = ColumnarFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            columnar.append(record)
+        records[1] = {"amount": 1.5, "date": "2020-02-29", "category": "income", "description": "Подарок на день рождения"}
+
+        self.assertTrue(columnar.replace(1, records[1]))
+        self.assertFalse(columnar.replace(4, records[1]))
+        self.assertEqual(columnar.read_json(), {"list": records})
+
+    def test_interrupted_append(self):
+        """Test that columns left with partial slots and different lengths by an interrupted append are read up to the last whole record."""
+        columnar = ColumnarFile(self.FILENAME)
+        records = self.records()
+
+        for record in records[:3]:
+            columnar.append(record)
+
+        # The date column got the next record, the description column half of its offset pair and the amount column
+        # half of its slot, while the category column got nothing.
+        with open(os.path.join(self.FILENAME, "date.i32"), 'ab') as f:
+            f.write(struct.pack("i", to_day_number(records[3]["date"])))
+        with open(os.path.join(self.FILENAME, "description.idx"), 'ab') as f:
+            f.write(struct.pack("Q", 0))
+        with open(os.path.join(self.FILENAME, "amount.f64"), 'ab') as f:
+            f.write(struct.pack("d", records[3]["amount"])[:4])
+
+        self.assertEqual(columnar.count(), 3)
+        self.assertEqual(columnar.read_json(), {"list": records[:3]})
+        self.assertEqual(columnar.totals()["count"], 3)
+        self.assertEqual(columnar.select("date", records[3]["date"]), [])
+        self.assertEqual(list(columnar.select_range(None, None)), list(BaseStorage.select_range(columnar, None, None)))
+
+        columnar.append(records[3])
+        self.assertEqual(columnar.read_json(), {"list": records})
+
+    def test_dates_are_normalized(self):
+        """Test that dates are stored as day numbers and read back as YYYY-MM-DD."""
+        columnar = ColumnarFile(self.FILENAME)
+        columnar.append({"amount": 1.0, "date": "2024-5-5", "category": "income", "description": ""})
+
+        self.assertEqual(columnar.read_json()["list"][0]["date"], "2024-05-05")
+
+    def test_queries(self):
+        """Test that balances and key lookups computed from the columns match the stored records."""
+        columnar = ColumnarFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            columnar.append(record)
+
+        totals = columnar.totals()
+        self.assertEqual(totals["count"], 4)
+        self.assertAlmostEqual(totals["income"], 134.4234)
+        self.assertAlmostEqual(totals["expense"], 123.31 + 54234.31 + 123.31)
+
+        self.assertEqual([idx for idx, _ in columnar.select("amount", 123.31)], [1, 3])
+        self.assertEqual([idx for idx, _ in columnar.select("category", "expense")], [1, 2, 3])
+        self.assertEqual(columnar.select("date", "2024-1-6"), [(2, records[2])])
+        self.assertEqual(columnar.select("amount", 0.5), [])
+
+        self.assertEqual(columnar.daily_totals(), BaseStorage.daily_totals(columnar))
+        for start, end in ((None, None), (to_day_number("2024-1-6"), None), (None, to_day_number("2024-1-6"))):
+            self.assertEqual(list(columnar.select_range(start, end)), list(BaseStorage.select_range(columnar, start, end)))
+        for bounds in ((None, None, None, False), (123.31, None, "expense", True), (100.0, 200.0, None, False), (0.0, None, "other", False)):
+            self.assertEqual(list(columnar.select_amount_range(*bounds)), list(BaseStorage.select_amount_range(columnar, *bounds)))
+
+class TestSqliteFile(unittest.TestCase):
+    """Unit tests for the SQLite storage."""
+
+    FILENAME: str = "test_data.db"
+
+    def tearDown(self) -> None:
+        if os.path.isfile(self.FILENAME):
+            os.remove(self.FILENAME)
+
+    def records(self) -> list[dict[str, Any]]:
+        return [
+            {"amount": 134.4234, "date": "2024-5-5", "category": "income", "description": "That description doesn't make sense."},
+            {"amount": 123.31, "date": "2024-01-01", "category": "expense", "description": ""},
+            {"amount": 54234.31, "date": "2024-1-6", "category": "expense", "description": "Продукты"},
+        ]
+
+    def test_round_trip(self):
+        """Test that appended, replaced and rewritten records are read back unchanged."""
+        sqlite = SqliteFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            sqlite.append(record)
+        records[0] = dict(records[0], category="expense")
+
+        self.assertTrue(sqlite.replace(0, records[0]))
+        self.assertFalse(sqlite.replace(3, records[0]))
+        self.assertEqual(sqlite.count(), 3)
+        self.assertEqual(sqlite.read_json(), {"list": records})
+        self.assertEqual(sqlite.get_record(2), records[2])
+        self.assertIsNone(sqlite.get_record(3))
+
+        sqlite.write_json({"list": records[1:]})
+        self.assertEqual(sqlite.read_json(), {"list": records[1:]})
+        sqlite.close()
+
+    def test_queries(self):
+        """Test that balances and key lookups run in SQL return the stored records."""
+        sqlite = SqliteFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            sqlite.append(record)
+
+        totals = sqlite.totals()
+        self.assertEqual(totals["count"], 3)
+        self.assertAlmostEqual(totals["income"], 134.4234)
+        self.assertAlmostEqual(totals["expense"], 123.31 + 54234.31)
+        self.assertEqual(sqlite.daily_totals(), BaseStorage.daily_totals(sqlite))
+
+        self.assertEqual(sqlite.select("date", "2024-01-06"), [(2, records[2])])
+        self.assertEqual([idx for idx, _ in sqlite.select("category", "expense")], [1, 2])
+        self.assertEqual(sqlite.select("amount", 123.31), [(1, records[1])])
+
+        for start, end in ((None, None), (to_day_number("2024-1-6"), None), (None, to_day_number("2024-1-6"))):
+            self.assertEqual(list(sqlite.select_range(start, end)), list(BaseStorage.select_range(sqlite, start, end)))
+        for bounds in ((None, None, None, False), (123.31, None, "expense", True), (100.0, 200.0, None, False)):
+            self.assertEqual(list(sqlite.select_amount_range(*bounds)), list(BaseStorage.select_amount_range(sqlite, *bounds)))
+        sqlite.close()
+
+class TestStreamList(unittest.TestCase):
+    """Unit tests for the incremental reader of the ledger document."""
+
+    FILENAME: str = "test_stream.json"
+
+    def tearDown(self) -> None:
+        if os.path.isfile(self.FILENAME):
+            os.remove(self.FILENAME)
+
+    def write(self, data: Any) -> None:
+        with open(self.FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    def test_items(self):
+        """Test that items split across chunk boundaries are decoded whole and in order."""
+        records: list[dict[str, Any]] = [
+            {"amount": 1234.5 + i, "date": "2024-5-5", "category": "income", "description": "Продукты " * i}
+            for i in range(50)
+        ]
+        self.write({"generation": 3, "other": {"list": [1]}, "list": records})
+
+        for chunk_size in (1, 7, 64, CHUNK_SIZE):
+            self.assertEqual(list(stream_list(self.FILENAME, chunk_size=chunk_size)), records)
+
+    def test_empty_and_invalid(self):
+        """Test an empty list and a document without the list."""
+        self.write({"list": []})
+        self.assertEqual(list(stream_list(self.FILENAME)), [])
+
+        self.write({"items": []})
+        with self.assertRaises(ValueError):
+            list(stream_list(self.FILENAME))
+
+    def test_storages(self):
+        """Test that every storage streams the same records it returns from read_json."""
+        records: list[dict[str, Any]] = [
+            {"amount": float(i), "date": "2024-05-05", "category": "expense", "description": f"Запись {i}"}
+            for i in range(5)
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for storage in (
+                File(os.path.join(directory, "data.json")),
+                JournalFile(os.path.join(directory, "data.jsonl")),
+                WalFile(os.path.join(directory, "data.snapshot.json"), compact_threshold=400),
+                ColumnarFile(os.path.join(directory, "data.columns")),
+                SqliteFile(os.path.join(directory, "data.db")),
+                CompressedFile(os.path.join(directory, "data.blocks"), block_size=2),
+            ):
+                for record in records:
+                    storage.append(record)
+                storage.replace(3, records[0])
+
+                self.assertEqual(list(storage.iter_records()), storage.read_json()["list"])
+                self.assertEqual(storage.count(), len(records))
+                self.assertEqual(storage.get_record(3), records[0])
+                self.assertEqual(list(storage.get_records([4, 0, 3, 9, -1, 0])), [(0, records[0]), (3, records[0]), (4, records[4])])
+
+class TestDurableWrites(unittest.TestCase):
+    """Unit tests for atomic rewrites and group commit."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        if os.path.isfile("data.json"):
+            os.remove("data.json")
+
+    def record(self, amount: float) -> dict[str, Any]:
+        return {"amount": amount, "date": "2024-5-5", "category": "income", "description": "Зарплата"}
+
+    def test_interrupted_write_keeps_old_file(self):
+        """Test that a failure in the middle of a rewrite leaves the previous ledger intact."""
+        file = File()
+        file.write_json({"list": [self.record(1.0)]})
+
+        with mock.patch("fs.file.json.dumps", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                file.write_json({"list": [self.record(2.0)]})
+
+        self.assertEqual(file.read_json(), {"list": [self.record(1.0)]})
+
+    def test_json_group_commit(self):
+        """Test that writes inside a group commit are visible at once and saved with one rewrite."""
+        file = File()
+
+        with mock.patch("fs.base.os.replace", wraps=os.replace) as replace:
+            with file.group_commit():
+                for i in range(5):
+                    file.append(self.record(float(i)))
+
+                self.assertEqual(file.count(), 5)
+                with open(file.FILENAME, 'r', encoding='utf-8') as f:
+                    self.assertEqual(json.load(f), {"list": []})
+
+            self.assertEqual(replace.call_count, 1)
+
+        self.assertEqual(file.read_json(), {"list": [self.record(float(i)) for i in range(5)]})
+
+    def test_journal_group_commit(self):
+        """Test that appends are synced one by one, or once per group commit."""
+        journal = JournalFile(os.path.join(self.directory.name, "data.jsonl"))
+
+        with mock.patch("fs.base.os.fsync") as fsync:
+            journal.append(self.record(1.0))
+            self.assertEqual(fsync.call_count, 1)
+
+            with journal.group_commit():
+                for i in range(5):
+                    journal.append(self.record(float(i)))
+                self.assertEqual(journal.count(), 6)
+            self.assertEqual(fsync.call_count, 2)
+
+    def test_sqlite_group_commit(self):
+        """Test that statements inside a group commit are committed as one transaction."""
+        path = os.path.join(self.directory.name, "data.db")
+        sqlite = SqliteFile(path)
+        reader = SqliteFile(path)
+
+        with sqlite.group_commit():
+            for i in range(3):
+                sqlite.append(self.record(float(i)))
+            self.assertEqual(sqlite.count(), 3)
+            self.assertEqual(reader.count(), 0)
+
+        self.assertEqual(reader.count(), 3)
+        sqlite.close()
+        reader.close()
+
+class TestShardedFile(unittest.TestCase):
+    """Unit tests for the storage split into monthly shards."""
+
+    FILENAME: str = "test_data.shards"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.FILENAME, ignore_errors=True)
+
+    def records(self) -> list[dict[str, Any]]:
+        return [
+            {"amount": 1.0, "date": "2024-5-5", "category": "income", "description": "Май"},
+            {"amount": 2.0, "date": "2024-1-6", "category": "expense", "description": "Январь"},
+            {"amount": 3.0, "date": "2024-05-20", "category": "expense", "description": "Май"},
+        ]
+
+    def shard(self, month: str) -> list[dict[str, Any]]:
+        with open(os.path.join(self.FILENAME, f"{month}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)["list"]
+
+    def test_append(self):
+        """Test that records go to the shard of their month and are read back in month order."""
+        sharded = ShardedFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            sharded.append(record)
+
+        self.assertEqual(self.shard("2024-05"), [records[0], records[2]])
+        self.assertEqual(self.shard("2024-01"), [records[1]])
+        self.assertEqual(sharded.read_json(), {"list": [records[1], records[0], records[2]]})
+        self.assertEqual(sharded.count(), 3)
+        self.assertEqual(sharded.get_record(2), records[2])
+
+    def test_replace(self):
+        """Test updates within a month and updates that move a record to another month."""
+        sharded = ShardedFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            sharded.append(record)
+
+        self.assertTrue(sharded.replace(1, dict(records[0], amount=10.0)))
+        self.assertEqual(self.shard("2024-05")[0]["amount"], 10.0)
+
+        moved = dict(records[1], date="2024-6-1")
+        self.assertTrue(sharded.replace(0, moved))
+        self.assertEqual(self.shard("2024-01"), [])
+        self.assertEqual(sharded.get_record(2), moved)
+        self.assertFalse(sharded.replace(3, moved))
+
+    def test_interrupted_move(self):
+        """Test that a crash while a record moves to another month does not lose it."""
+        sharded = ShardedFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            sharded.append(record)
+
+        write_json = File.write_json
+        calls: list[str] = []
+
+        def crash_on_second_write(shard: File, data: dict[str, Any]) -> None:
+            calls.append(shard.FILENAME)
+            if len(calls) == 2:
+                raise OSError("Simulated crash.")
+            write_json(shard, data)
+
+        moved = dict(records[1], date="2024-6-1")
+        with mock.patch.object(File, "write_json", crash_on_second_write):
+            with self.assertRaises(OSError):
+                sharded.replace(0, moved)
+
+        self.assertEqual(self.shard("2024-06"), [moved])
+        sharded = ShardedFile(self.FILENAME)
+        sharded.compact()
+        self.assertIn(moved, sharded.read_json()["list"])
+
+    def test_select_date(self):
+        """Test that a date lookup returns global positions from the shard of that month."""
+        sharded = ShardedFile(self.FILENAME)
+        records = self.records()
+
+        for record in records:
+            sharded.append(record)
+
+        self.assertEqual(sharded.select("date", "2024-05-20"), [(2, records[2])])
+        self.assertEqual(sharded.select("date", "2023-05-20"), [])
+        self.assertEqual([idx for idx, _ in sharded.select("category", "expense")], [0, 2])
+
+    def test_write_json_and_compact(self):
+        """Test that rewriting the ledger regroups the shards and compaction rebuilds the manifest."""
+        sharded = ShardedFile(self.FILENAME)
+        records = self.records()
+
+        sharded.write_json({"list": records})
+        sharded.write_json({"list": records[:1]})
+        self.assertEqual(sharded.read_json(), {"list": records[:1]})
+
+        os.remove(os.path.join(self.FILENAME, ShardedFile.MANIFEST))
+        sharded = ShardedFile(self.FILENAME)
+        sharded.compact()
+        self.assertEqual(sharded.read_json(), {"list": records[:1]})
+
+    def test_group_commit(self):
+        """Test that a group commit saves every touched shard and the manifest once at the end."""
+        sharded = ShardedFile(self.FILENAME)
+        records = self.records()
+
+        with sharded.group_commit():
+            for record in records:
+                sharded.append(record)
+            self.assertEqual(sharded.count(), 3)
+            self.assertEqual(ShardedFile(self.FILENAME).count(), 0)
+
+        self.assertEqual(ShardedFile(self.FILENAME).count(), 3)
+
+class TestCompressedFile(unittest.TestCase):
+    """Unit tests for the block-compressed storage."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "data.blocks")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def records(self, count: int) -> list[dict[str, Any]]:
+        return [
+            {"amount": float(i), "date": f"2024-{i // 4 % 12 + 1}-1", "category": ["income", "expense"][i % 2], "description": "Продукты"}
+            for i in range(count)
+        ]
+
+    def test_rewrite_syncs_once(self):
+        """Test that a rewrite syncs the new data file once, however many blocks it holds, before switching the index."""
+        compressed = CompressedFile(self.filename, block_size=4)
+        records = self.records(21)
+
+        with mock.patch("fs.base.os.fsync") as fsync, mock.patch("fs.compressed.open", wraps=open) as opened:
+            compressed.write_json({"list": records})
+
+        # The data file, the index and the directory of the index.
+        self.assertEqual(fsync.call_count, 3)
+        self.assertEqual(len([call for call in opened.call_args_list if call.args[0].endswith(".1.bin")]), 1)
+        self.assertEqual(compressed.read_json(), {"list": records})
+
+    def test_round_trip(self):
+        """Test that records are sealed into blocks and read back in order with both codecs."""
+        records = self.records(10)
+
+        for codec in ("zlib", "lzma"):
+            compressed = CompressedFile(os.path.join(self.directory.name, f"{codec}.blocks"), codec=codec, block_size=4)
+
+            for record in records:
+                compressed.append(record)
+
+            self.assertEqual(compressed.read_json(), {"list": records})
+            self.assertEqual(compressed.count(), 10)
+            self.assertEqual(compressed.get_record(5), records[5])
+            self.assertEqual(compressed.get_record(9), records[9])
+            self.assertIsNone(compressed.get_record(10))
+
+        with self.assertRaises(ValueError):
+            CompressedFile(self.filename, codec="gzip")
+
+    def test_replace_and_compact(self):
+        """Test that updates rewrite only their block and compaction drops the old copies."""
+        compressed = CompressedFile(self.filename, block_size=4)
+        records = self.records(10)
+
+        for record in records:
+            compressed.append(record)
+        records[1] = dict(records[1], amount=100.0)
+        records[9] = dict(records[9], description="Хвост")
+
+        self.assertTrue(compressed.replace(1, records[1]))
+        self.assertTrue(compressed.replace(9, records[9]))
+        self.assertFalse(compressed.replace(10, records[9]))
+        self.assertEqual(compressed.read_json(), {"list": records})
+
+        size = os.path.getsize(f"{self.filename}.0.bin")
+        compressed.compact()
+        self.assertFalse(os.path.exists(f"{self.filename}.0.bin"))
+        self.assertLess(os.path.getsize(f"{self.filename}.1.bin"), size)
+        self.assertEqual(compressed.read_json(), {"list": records})
+
+    def test_queries_skip_blocks(self):
+        """Test that balances use the block summaries and lookups decompress only candidate blocks."""
+        compressed = CompressedFile(self.filename, block_size=4)
+        records = self.records(10)
+
+        for record in records:
+            compressed.append(record)
+
+        decompress = mock.Mock(wraps=zlib.decompress)
+
+        with mock.patch.dict(CompressedFile.CODECS, {"zlib": (CompressedFile.CODECS["zlib"][0], decompress)}):
+            totals = compressed.totals()
+            self.assertEqual(decompress.call_count, 0)
+            self.assertEqual(totals, {"income": 20.0, "expense": 25.0, "count": 10})
+
+            self.assertEqual(compressed.select("date", "2024-02-01"), [(i, records[i]) for i in range(4, 8)])
+            self.assertEqual(decompress.call_count, 1)
+
+            self.assertEqual(list(compressed.select_range(to_day_number("2024-02-01"), None)), [(i, records[i]) for i in range(4, 10)])
+            self.assertEqual(decompress.call_count, 2)
+
+        self.assertEqual(compressed.select("amount", 9.0), [(9, records[9])])
+        self.assertEqual([idx for idx, _ in compressed.select("category", "income")], [0, 2, 4, 6, 8])
+
+    def test_compression_ratio(self):
+        """Test that repetitive records take several times less space than plain JSON."""
+        compressed = CompressedFile(self.filename, block_size=256)
+        records = self.records(1024)
+        compressed.write_json({"list": records})
+
+        plain = len(json.dumps({"list": records}, ensure_ascii=False).encode('utf-8'))
+        self.assertLess(os.path.getsize(f"{self.filename}.1.bin") * 4, plain)
@@ -1,9 +1,38 @@
+import base64
+import io
+import multiprocessing
 import os
+import shutil
+import tempfile
+import threading
 from typing import Any
 import unittest
-from fs import File
+from unittest import mock
+from fs import ColumnarFile, CompressedFile, DateIndex, File, JournalFile, KeyIndex, ShardedFile, SqliteFile, TextIndex, WalFile, read_rows, write_rows
+from entities.containers.array_list import ArrayListRecord
+from entities.record_view import RecordView
 from record import Record
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore
+
+def add_records(filename: str, count: int) -> None:
+    """Adds `count` records to the JSON ledger at `filename`, used as a separate writer process."""
+    record = Record(File(filename))
+
+    for i in range(count):
+        record.add(float(i), "income", "2024-5-5", f"Process {os.getpid()}")
+
+def crash_in_group_commit(filename: str) -> None:
+    """Adds a record inside a `group_commit` block of the JSON ledger at `filename` and exits before the block commits."""
+    storage = File(filename)
+
+    with storage.group_commit():
+        Record(storage).add(500.0, "income", "2024-5-6", "Не сохранено")
+        os._exit(0)
+
 class TestRecord(unittest.TestCase):
     """Unit tests for the Record class to test data manipulation and file-based storage."""
 
@@ -16,6 +45,11 @@ class TestRecord(unittest.TestCase):
         Returns:
             bool: True if the file was deleted, False if it didn't exist.
         """
+        for path in (f"{filename}.lock", f"{filename}.totals"):
+            if os.path.isfile(path):
+                os.remove(path)
+        for path in (f"{filename}.index", f"{filename}.dates", f"{filename}.amounts", f"{filename}.text"):
+            shutil.rmtree(path, ignore_errors=True)
         if os.path.isfile(filename):
             os.remove(filename)
             return True
@@ -166,4 +200,619 @@ class TestRecord(unittest.TestCase):
         self.assertEqual(type(record.get_by_key("None", "123")), str)
         self.assertEqual(type(record.get_by_key("None", 123.0)), str)
 
-        self.delete_file()
\ No newline at end of file
+        self.delete_file()
+    def test_journal_storage(self):
+        """Test that Record works on top of the append-only journal storage.
+
+        Verifies that:
+        - Added and updated records are replayed from the journal.
+        - Balance and key lookups read the replayed journal.
+        """
+        journal = JournalFile("test_data.jsonl")
+        record = Record(journal)
+
+        record.add(100.0, "income", "2024-5-5", "Зарплата")
+        record.add(30.0, "expense", "2024-5-6", "Продукты")
+        self.assertEqual(record.update(1, new_amount=40.0), "The record was successfully updated.")
+        self.assertEqual(record.update(2, new_amount=40.0), "Invalid index.")
+
+        self.assertEqual(len(record.get()), 2)
+        self.assertEqual(record.get_balance(), ["Balance: 60.0", "Income: 100.0", "Expense: 40.0"])
+        self.assertEqual(len(record.get_by_key("amount", 40.0)), 1)
+
+        self.delete_file(journal.FILENAME)
+
+    def test_columnar_storage(self):
+        """Test that balances and key lookups work on top of the columnar storage."""
+        columnar = ColumnarFile("test_data.columns")
+        record = Record(columnar)
+
+        record.add(100.0, "income", "2024-5-5", "Зарплата")
+        record.add(30.0, "expense", "2024-1-6", "Продукты")
+        record.update(1, new_amount=40.0)
+
+        self.assertEqual(record.get_balance(), ["Balance: 60.0", "Income: 100.0", "Expense: 40.0"])
+        self.assertEqual(len(record.get_by_key("date", "2024-1-6")), 1)
+        self.assertEqual(len(record.get_by_key("category", "income")), 1)
+        self.assertEqual(type(record.get_by_key("amount", -1.0)), str)
+
+        shutil.rmtree(columnar.FILENAME)
+        self.delete_file(columnar.FILENAME)
+
+    def test_balance_totals(self):
+        """Test that balances are read from the saved rollups and rebuilt when the ledger changes behind them.
+
+        Verifies that:
+        - Adds and updates keep the rollups current without summing the ledger.
+        - A ledger written without the rollups is summed again on the next balance.
+        - `verify` reports and repairs rollups that no longer match the records, and reports invalid records.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            file = File(os.path.join(directory, "data.json"))
+            record = Record(file)
+
+            with mock.patch.object(File, "daily_totals", wraps=file.daily_totals) as daily_totals:
+                record.add(100.0, "income", "2024-5-5", "Зарплата")
+                record.add(30.0, "expense", "2024-5-6", "Продукты")
+                record.update(1, new_amount=40.0)
+                record.update(0, new_category="expense")
+
+                self.assertEqual(record.get_balance(), ["Balance: -140.0", "Income: 0.0", "Expense: 140.0"])
+                self.assertEqual(daily_totals.call_count, 1)
+
+            File(file.FILENAME).append({"amount": 10.0, "category": "income", "date": "2024-05-07", "description": ""})
+            self.assertEqual(record.get_balance(), ["Balance: -130.0", "Income: 10.0", "Expense: 140.0"])
+            self.assertEqual(len(record.get_by_key("date", "2024-05-07")), 1)
+
+            File(file.FILENAME).append({"amount": 5.0, "category": "expense", "date": "2024-05-08", "description": ""})
+            self.assertEqual(record.verify(), "The balance totals and indexes did not match the records and were rebuilt.")
+            self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+            File(file.FILENAME).append({"amount": -5.0, "category": "expense", "date": "2024-05-08", "description": ""})
+            self.assertEqual(
+                record.verify(),
+                "The balance totals and indexes did not match the records and were rebuilt. Invalid records at positions: 4."
+            )
+
+    def test_period_balance(self):
+        """Test balances of a period and of every month.
+
+        Verifies that:
+        - Only the records dated within the period are summed, its bounds included.
+        - Records moved to another day by an update are counted on their new day.
+        - Months without records are left out and invalid dates return the validation error.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            record = Record(File(os.path.join(directory, "data.json")))
+
+            record.add(100.0, "income", "2024-1-31", "Зарплата")
+            record.add(30.0, "expense", "2024-2-1", "Продукты")
+            record.add(20.0, "expense", "2024-2-29", "Продукты")
+            record.add(50.0, "income", "2024-4-15", "Подарок")
+            record.update(2, new_date="2024-3-1")
+
+            self.assertEqual(record.get_balance("2024-02-01", "2024-03-01"), ["Balance: -50.0", "Income: 0.0", "Expense: 50.0"])
+            self.assertEqual(record.get_balance("2024-1-31", "2024-1-31"), ["Balance: 100.0", "Income: 100.0", "Expense: 0.0"])
+            self.assertEqual(record.get_balance("2024-03-02", "2024-04-14"), ["Balance: 0", "Income: 0", "Expense: 0"])
+            self.assertEqual(record.get_balance(end="2024-02-01"), ["Balance: 70.0", "Income: 100.0", "Expense: 30.0"])
+            self.assertEqual(record.get_balance("2024-13-01"), ["Invalid date: unable to create a valid datetime object."])
+
+            self.assertEqual(record.get_monthly_balance(), [
+                "[2024-01]\nBalance: 100.0\nIncome: 100.0\nExpense: 0.0",
+                "[2024-02]\nBalance: -30.0\nIncome: 0.0\nExpense: 30.0",
+                "[2024-03]\nBalance: -20.0\nIncome: 0.0\nExpense: 20.0",
+                "[2024-04]\nBalance: 50.0\nIncome: 50.0\nExpense: 0.0",
+            ])
+            self.assertEqual(record.get_monthly_balance("2024-02-15", "2024-12-31")[0], "[2024-03]\nBalance: -20.0\nIncome: 0.0\nExpense: 20.0")
+            self.assertEqual(record.get_monthly_balance("2025-01-01"), [])
+
+    def test_key_index(self):
+        """Test that key lookups go through the hash indexes.
+
+        Verifies that:
+        - Lookups read only the records at the indexed positions.
+        - Updates move a record from the index entries of its old values to those of its new ones.
+        - Storages whose positions move fall back to scanning.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            file = File(os.path.join(directory, "data.json"))
+            record = Record(file)
+
+            record.add(100.0, "income", "2024-5-5", "Зарплата")
+            record.add(30.0, "expense", "2024-5-6", "Продукты")
+            record.add(30.0, "expense", "2024-05-05", "Продукты")
+            self.assertTrue(os.path.isdir(f"{file.FILENAME}.index"))
+
+            with mock.patch.object(File, "select") as select:
+                self.assertEqual(len(record.get_by_key("date", "2024-05-05")), 2)
+                self.assertEqual(len(record.get_by_key("amount", 30.0)), 2)
+                select.assert_not_called()
+
+            record.update(2, new_amount=40.0, new_date="2024-5-7")
+            self.assertEqual(record.get_by_key("amount", 30.0)[0][:3], "[1]")
+            self.assertEqual(len(record.get_by_key("date", "2024-5-5")), 1)
+            self.assertEqual(record.get_by_key("date", "2024-5-7")[0][:3], "[2]")
+            self.assertEqual(len(record.get_by_key("category", "expense")), 2)
+            self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+            # A rebuild appends the lines of the records read so far whenever it has buffered `FLUSH_LINES` of them.
+            with mock.patch.object(KeyIndex, "FLUSH_LINES", 2):
+                index = KeyIndex(file)
+                index.rebuild()
+                self.assertEqual(index.lookup("category", "expense"), [1, 2])
+                self.assertEqual(index.lookup("amount", 100.0), [0])
+                self.assertTrue(index.verify())
+
+            sharded = Record(ShardedFile(os.path.join(directory, "data.shards")))
+            sharded.add(100.0, "income", "2024-5-5", "Зарплата")
+            sharded.add(30.0, "expense", "2024-4-6", "Продукты")
+            self.assertEqual(sharded.get_by_key("date", "2024-5-5")[0][:3], "[1]")
+            self.assertFalse(os.path.exists(os.path.join(directory, "data.shards.index")))
+
+    def test_sidecars(self):
+        """Test what the indexes kept next to the ledger cost a write.
+
+        Verifies that:
+        - An add to the JSON ledger syncs only the ledger and its directory, not the indexes.
+        - Storages that answer queries themselves keep only the balance rollups and the text index, and answer lookups from the stored records.
+        - Their period and monthly balances do not sum the ledger again, and searches do not read every description.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            record = Record(File(os.path.join(directory, "data.json")))
+            record.add(100.0, "income", "2024-5-5", "Зарплата")
+
+            with mock.patch("fs.base.os.fsync") as fsync:
+                record.add(30.0, "expense", "2024-5-6", "Продукты")
+            self.assertEqual(fsync.call_count, 2)
+
+        for storage in (SqliteFile, ColumnarFile, CompressedFile):
+            with tempfile.TemporaryDirectory() as directory:
+                native = storage(os.path.join(directory, "data"))
+                record = Record(native)
+                record.add(100.0, "income", "2024-5-5", "Зарплата")
+                record.add(30.0, "expense", "2024-5-6", "Продукты")
+                record.update(1, new_amount=40.0)
+
+                for suffix in (".totals", ".text"):
+                    self.assertTrue(os.path.exists(f"{native.FILENAME}{suffix}"))
+                for suffix in (".index", ".dates", ".amounts"):
+                    self.assertFalse(os.path.exists(f"{native.FILENAME}{suffix}"))
+
+                with mock.patch.object(storage, "daily_totals") as daily_totals:
+                    self.assertEqual(record.get_balance(), ["Balance: 60.0", "Income: 100.0", "Expense: 40.0"])
+                    self.assertEqual(record.get_balance("2024-5-6"), ["Balance: -40.0", "Income: 0.0", "Expense: 40.0"])
+                    self.assertEqual(len(record.get_monthly_balance()), 1)
+                daily_totals.assert_not_called()
+
+                with mock.patch.object(storage, "iter_records") as iter_records:
+                    self.assertEqual([line[:3] for line in record.search("продукты")], ["[1]"])
+                iter_records.assert_not_called()
+                self.assertEqual([line[:3] for line in record.get_range("2024-5-5", "2024-5-6")], ["[0]", "[1]"])
+                self.assertEqual([line[:3] for line in record.get_by_amount(50.0)], ["[0]"])
+                self.assertEqual(record.get_by_key("amount", 40.0)[0][:3], "[1]")
+                self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+                if isinstance(native, SqliteFile):
+                    native.close()
+
+    def test_queries_read_sequential_storage_once(self):
+        """Test that index lookups read a storage without random access in a single pass, however many chunks they span."""
+        with tempfile.TemporaryDirectory() as directory:
+            wal = WalFile(os.path.join(directory, "data.snapshot.json"))
+            record = Record(wal)
+            record.add_many({"amount": float(i + 1), "category": "expense", "date": f"2024-5-{28 - i}", "description": "Продукты"} for i in range(20))
+            # Brings the indexes up to date before counting the passes.
+            record.verify()
+
+            iter_records = WalFile.iter_records
+            with mock.patch.object(Record, "CHUNK_SIZE", 3), \
+                    mock.patch.object(WalFile, "iter_records", autospec=True, side_effect=iter_records) as passes:
+                lines = list(record.get_range("2024-5-9", "2024-5-28"))
+                self.assertEqual([line[:line.index("]") + 1] for line in lines], [f"[{i}]" for i in range(19, -1, -1)])
+                self.assertEqual(passes.call_count, 1)
+
+                self.assertEqual(len(list(record.get_by_amount(5.0))), 16)
+                self.assertEqual(len(list(record.search("продукты"))), 20)
+                self.assertEqual(passes.call_count, 3)
+
+    def test_get_range(self):
+        """Test date range queries.
+
+        Verifies that:
+        - Records are returned in date order, both bounds included, whatever order they were added in.
+        - Updates that change a date move the record within the range, also after the changes are merged.
+        - Storages whose positions move return the same records without the index.
+        """
+        records: list[list[Any]] = [
+            [100.0, "income", "2024-5-5", "Зарплата"],
+            [30.0, "expense", "2024-1-6", "Продукты"],
+            [20.0, "expense", "2024-3-1", "Такси"],
+            [50.0, "income", "2024-1-6", "Подарок"],
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for storage in (File(os.path.join(directory, "data.json")), ShardedFile(os.path.join(directory, "data.shards"))):
+                record = Record(storage)
+                for item in records:
+                    record.add(*item)
+
+                found = [line.split("\n")[3] for line in record.get_range("2024-01-06", "2024-3-1")]
+                self.assertEqual(found, ["Date: 2024-1-6.", "Date: 2024-1-6.", "Date: 2024-3-1."])
+                self.assertEqual(list(record.get_range("2024-06-01")), [])
+                self.assertEqual(record.get_range("2024-02-30"), "Invalid date: unable to create a valid datetime object.")
+
+            record = Record(File(os.path.join(directory, "data.json")))
+            record.update(0, new_date="2023-12-31")
+            self.assertEqual(next(iter(record.get_range()))[:3], "[0]")
+
+            with mock.patch.object(DateIndex, "MERGE_THRESHOLD", 2):
+                record.update(2, new_date="2023-12-30")
+                record.update(1, new_date="2025-1-1")
+
+            self.assertEqual([line[:3] for line in record.get_range()], ["[2]", "[0]", "[3]", "[1]"])
+            self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+            # A rebuild sorts runs of `RUN_SIZE` records and merges them.
+            with mock.patch.object(DateIndex, "RUN_SIZE", 1):
+                index = DateIndex(File(os.path.join(directory, "data.json")))
+                index.rebuild()
+                self.assertEqual(index.range(), [2, 0, 3, 1])
+                self.assertTrue(index.verify())
+
+    def test_get_by_amount(self):
+        """Test amount range and threshold queries.
+
+        Verifies that:
+        - Records are returned in ascending order of amount, with inclusive or strict bounds and per category.
+        - Updates that change an amount or a category move the record in the index.
+        - Storages whose positions move return the same records without the index.
+        """
+        records: list[list[Any]] = [
+            [100.0, "income", "2024-5-5", "Зарплата"],
+            [300.0, "expense", "2024-1-6", "Ремонт"],
+            [20.0, "expense", "2024-3-1", "Такси"],
+            [100.0, "expense", "2024-1-6", "Продукты"],
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for storage in (File(os.path.join(directory, "data.json")), ShardedFile(os.path.join(directory, "data.shards"))):
+                record = Record(storage)
+                for item in records:
+                    record.add(*item)
+
+                amounts = lambda lines: [line.split("\n")[1] for line in lines]
+                self.assertEqual(amounts(record.get_by_amount(100.0)), ["Amount: 100.0.", "Amount: 100.0.", "Amount: 300.0."])
+                self.assertEqual(amounts(record.get_by_amount(100.0, strict=True)), ["Amount: 300.0."])
+                self.assertEqual(amounts(record.get_by_amount(20.0, 100.0, "expense")), ["Amount: 20.0.", "Amount: 100.0."])
+                self.assertEqual(list(record.get_by_amount(500.0)), [])
+                self.assertEqual(type(record.get_by_amount(-1.0)), str)
+                self.assertEqual(type(record.get_by_amount(category="gift")), str)
+
+            record = Record(File(os.path.join(directory, "data.json")))
+            record.update(1, new_amount=10.0)
+            record.update(0, new_category="expense")
+
+            self.assertEqual([line[:3] for line in record.get_by_amount(category="expense")], ["[1]", "[2]", "[0]", "[3]"])
+            self.assertEqual(list(record.get_by_amount(category="income")), [])
+            self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+    def test_search(self):
+        """Test full-text search over record descriptions.
+
+        Verifies that:
+        - Words are matched regardless of case and Unicode form, all of them must be present.
+        - A word ending with `*` matches words that start with it.
+        - Updates that change a description change the words the record is found by.
+        - Storages whose positions move return the same records without the index.
+        """
+        records: list[list[Any]] = [
+            [100.0, "expense", "2024-5-5", "Такси до аэропорта"],
+            [300.0, "expense", "2024-1-6", "ТАКСИ домой"],
+            [20.0, "income", "2024-3-1", "Ｂonus за такси"],
+            [100.0, "expense", "2024-1-6", "Продукты"],
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for storage in (File(os.path.join(directory, "data.json")), ShardedFile(os.path.join(directory, "data.shards"))):
+                record = Record(storage)
+                for item in records:
+                    record.add(*item)
+
+                descriptions = lambda lines: sorted(line.split("\n")[4] for line in lines)
+                self.assertEqual(len(list(record.search("такси"))), 3)
+                self.assertEqual(descriptions(record.search("такси АЭРОПОРТА")), ["Description: Такси до аэропорта."])
+                self.assertEqual(descriptions(record.search("bonus")), ["Description: Ｂonus за такси."])
+                self.assertEqual(descriptions(record.search("до*")), ["Description: ТАКСИ домой.", "Description: Такси до аэропорта."])
+                self.assertEqual(descriptions(record.search("п*")), ["Description: Продукты."])
+                self.assertEqual(list(record.search("такси продукты")), [])
+                self.assertEqual(type(record.search("  ")), str)
+
+            record = Record(File(os.path.join(directory, "data.json")))
+            record.update(3, new_description="Такси за продуктами")
+
+            self.assertEqual([line[:3] for line in record.search("такси")], ["[0]", "[1]", "[2]", "[3]"])
+            self.assertEqual(list(record.search("продукты")), [])
+            self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+            # A rebuild appends the lines of the records read so far whenever it has buffered `FLUSH_LINES` of them.
+            with mock.patch.object(TextIndex, "FLUSH_LINES", 2):
+                index = TextIndex(File(os.path.join(directory, "data.json")))
+                index.rebuild()
+                self.assertEqual(index.search([("такси", False)]), [0, 1, 2, 3])
+                self.assertTrue(index.verify())
+
+    def test_add_many(self):
+        """Test adding records in batches from CSV and JSON Lines input.
+
+        Verifies that:
+        - Valid rows are added in order and invalid ones are reported by their row number.
+        - Every batch is written with a single call to the storage.
+        - Balance totals and indexes are kept up to date by the batches.
+        """
+        csv_input = (
+            "amount,category,date,description\n"
+            "100,income,2024-1-5,Зарплата\n"
+            "abc,expense,2024-1-6,Такси\n"
+            "20.5,expense,2024-1-6,Такси\n"
+            "30,gift,2024-1-7,Подарок\n"
+            "40,expense,2024-2-30,Кафе\n"
+            "50,expense,2024-2-1\n"
+            "60,expense,2024-2-2,Продукты\n"
+        )
+        jsonl_input = (
+            '{"amount": 5, "category": "expense", "date": "2024-3-1", "description": "Такси"}\n'
+            "\n"
+            "not json\n"
+            '{"amount": -1.0, "category": "expense", "date": "2024-3-1", "description": "Кафе"}\n'
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            storages = (
+                File(os.path.join(directory, "data.json")),
+                JournalFile(os.path.join(directory, "data.jsonl")),
+                SqliteFile(os.path.join(directory, "data.db")),
+                ShardedFile(os.path.join(directory, "data.shards")),
+            )
+
+            for storage in storages:
+                record = Record(storage)
+                record.add(1.0, "income", "2023-12-31", "Остаток")
+
+                with mock.patch.object(Record, "BATCH_SIZE", 2), mock.patch.object(storage, "append_many", wraps=storage.append_many) as append_many:
+                    added, errors = record.add_many(read_rows(io.StringIO(csv_input, newline=""), "csv"))
+
+                self.assertEqual(added, 3)
+                self.assertEqual(append_many.call_count, 2)
+                self.assertEqual([error.split(":")[0] for error in errors], ["Row 2", "Row 4", "Row 5", "Row 6"])
+                self.assertEqual(errors[0], "Row 2: Invalid value for 'amount': abc")
+
+                added, errors = record.add_many(read_rows(io.StringIO(jsonl_input), "jsonl"))
+
+                self.assertEqual(added, 1)
+                self.assertEqual([error.split(":")[0] for error in errors], ["Row 2", "Row 3"])
+                self.assertEqual([line.split("\n")[1] for line in record.get()], ["Amount: 1.0.", "Amount: 100.0.", "Amount: 20.5.", "Amount: 60.0.", "Amount: 5.0."])
+                self.assertEqual(record.get_balance()[0], "Balance: 15.5")
+                self.assertEqual(len(record.get_by_key("category", "expense")), 3)
+                self.assertEqual(len(list(record.search("такси"))), 2)
+                self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+    def test_export(self):
+        """Test exporting records to CSV and JSON Lines.
+
+        Verifies that:
+        - The whole ledger is exported in ledger order, a period in date order, optionally of one category.
+        - Exported files are imported back unchanged.
+        - Invalid dates and categories are reported.
+        """
+        records: list[list[Any]] = [
+            [100.0, "income", "2024-5-5", "Зарплата, май"],
+            [300.0, "expense", "2024-1-6", "Ремонт \"под ключ\""],
+            [20.0, "expense", "2024-3-1", "Такси"],
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for storage in (File(os.path.join(directory, "data.json")), ShardedFile(os.path.join(directory, "data.shards"))):
+                record = Record(storage)
+                for item in records:
+                    record.add(*item)
+
+                self.assertEqual([val["date"] for val in record.export("2024-1-1", "2024-4-1")], ["2024-1-6", "2024-3-1"])
+                self.assertEqual([val["amount"] for val in record.export(category="expense")], [300.0, 20.0])
+                self.assertEqual(type(record.export("2024-13-1")), str)
+                self.assertEqual(type(record.export(category="gift")), str)
+
+            for format in ("csv", "jsonl"):
+                output = io.StringIO(newline="")
+                self.assertEqual(write_rows(output, Record(File(os.path.join(directory, "data.json"))).export(), format), 3)
+
+                copy = Record(File(os.path.join(directory, f"copy.{format}.json")))
+                self.assertEqual(copy.add_many(read_rows(io.StringIO(output.getvalue(), newline=""), format)), (3, []))
+                self.assertEqual(list(copy.export()), [dict(zip(("amount", "category", "date", "description"), item)) for item in records])
+
+    def test_paging(self):
+        """Test paging through records with a limit, an offset and cursors.
+
+        Verifies that:
+        - Pages hold at most `limit` records and come with a cursor only if more records follow.
+        - Following the cursors visits every record once, also for key lookups.
+        - Only the records of the requested page are read from the storage.
+        - Invalid paging arguments are reported.
+        - Storages whose positions change as records are added page by offset only, without cursors.
+        """
+        rows = [{"amount": float(idx), "category": ("income", "expense")[idx % 2], "date": "2024-1-1", "description": str(idx)} for idx in range(10)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            record = Record(File(os.path.join(directory, "data.json")))
+            record.add_many(rows)
+
+            records, cursor = record.get_page(4, offset=2)
+            self.assertEqual([line[:3] for line in records], ["[2]", "[3]", "[4]", "[5]"])
+            records, cursor = record.get_page(4, cursor=cursor)
+            self.assertEqual([line[:3] for line in records], ["[6]", "[7]", "[8]", "[9]"])
+            self.assertIsNone(cursor)
+
+            pages, cursor = [], None
+            while True:
+                records, cursor = record.get_by_key_page("category", "expense", 2, cursor=cursor)
+                pages.append([line[:3] for line in records])
+                if cursor is None:
+                    break
+            self.assertEqual(pages, [["[1]", "[3]"], ["[5]", "[7]"], ["[9]"]])
+            self.assertEqual(record.get_by_key_page("category", "expense", offset=4), (record.get_by_key("category", "expense")[4:], None))
+
+            self.assertEqual(type(record.get_page(0)), str)
+            self.assertEqual(type(record.get_page(offset=-1)), str)
+            self.assertEqual(record.get_page(cursor="garbage"), "Invalid cursor.")
+            self.assertEqual(type(record.get_by_key_page("category", "gift", 2)), str)
+
+            record = Record(ShardedFile(os.path.join(directory, "data.shards")))
+            record.add_many(rows)
+            records, cursor = record.get_page(4, offset=2)
+            self.assertEqual([line[:3] for line in records], ["[2]", "[3]", "[4]", "[5]"])
+            self.assertIsNone(cursor)
+            self.assertEqual(record.get_by_key_page("category", "expense", 2, offset=2), (record.get_by_key("category", "expense")[2:4], None))
+            self.assertTrue(record.get_page(4, cursor=base64.urlsafe_b64encode(b'{"after": 1}').decode('ascii')).startswith("This storage does not support cursors"))
+
+            storage = File(os.path.join(directory, "data.json"))
+            with mock.patch.object(storage, "get_records", wraps=storage.get_records) as get_records:
+                Record(storage).get_page(3, offset=5)
+
+            self.assertEqual(list(get_records.call_args.args[0]), [5, 6, 7, 8])
+
+    def test_iterators(self):
+        """Test the lazy iterators over record views.
+
+        Verifies that:
+        - Views carry the position and the typed fields of the records and print like `get`.
+        - Records are read only as the iterator is consumed.
+        - Invalid keys and values are reported before iterating.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            storage = File(os.path.join(directory, "data.json"))
+            record = Record(storage)
+            record.add(100.0, "income", "2024-5-5", "Зарплата")
+            record.add(20.0, "expense", "2024-1-6", "Такси")
+            record.add(30.0, "expense", "2024-1-7", "Кафе")
+
+            views = list(record.iter_records())
+            self.assertEqual(views[1], RecordView(1, 20.0, "expense", "2024-1-6", "Такси"))
+            self.assertEqual([str(view) for view in views], record.get())
+            self.assertEqual(views[0].to_json(), storage.get_record(0))
+
+            self.assertEqual([view.position for view in record.iter_by_key("category", "expense")], [1, 2])
+            self.assertEqual([str(view) for view in record.iter_by_key("date", "2024-1-6")], record.get_by_key("date", "2024-1-6"))
+            self.assertEqual(type(record.iter_by_key("name", "x")), str)
+            self.assertEqual(type(record.iter_by_key("category", "gift")), str)
+
+            with mock.patch.object(storage, "iter_records", wraps=storage.iter_records) as iter_records:
+                views = record.iter_records()
+                iter_records.assert_not_called()
+                self.assertEqual(next(views).position, 0)
+                views.close()
+            iter_records.assert_called_once()
+
+    def test_validated_ledger(self):
+        """Test that updates trust stored records only while the ledger is known to be valid.
+
+        Verifies that:
+        - Records of a ledger written only by `Record` are trusted, through adds, batches and updates.
+        - A ledger changed without `Record` is validated again until `verify` finds it valid.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            file = File(os.path.join(directory, "data.json"))
+            record = Record(file)
+            record.add(100.0, "income", "2024-5-5", "Зарплата")
+
+            with mock.patch.object(ArrayListRecord, "load_trusted", autospec=True, side_effect=ArrayListRecord.load_trusted) as load_trusted:
+                self.assertEqual(record.update(0, new_amount=90.0), "The record was successfully updated.")
+                self.assertEqual(load_trusted.call_count, 1)
+
+                record.add_many([{"amount": 30.0, "category": "expense", "date": "2024-5-6", "description": "Продукты"}])
+                self.assertEqual(record.update(1, new_amount=40.0), "The record was successfully updated.")
+                self.assertEqual(load_trusted.call_count, 2)
+
+                File(file.FILENAME).append({"amount": 10.0, "category": "income", "date": "2024-5-7", "description": ""})
+                self.assertEqual(record.update(2, new_amount=20.0), "The record was successfully updated.")
+                self.assertEqual(load_trusted.call_count, 2)
+
+                self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+                self.assertEqual(record.update(2, new_amount=25.0), "The record was successfully updated.")
+                self.assertEqual(load_trusted.call_count, 3)
+
+                # A ledger that already had records when `Record` first wrote to it is not trusted.
+                other = File(os.path.join(directory, "other.json"))
+                other.append({"amount": 10.0, "category": "income", "date": "2024-5-7", "description": ""})
+                Record(other).add(5.0, "expense", "2024-5-8", "Такси")
+                self.assertEqual(Record(other).update(1, new_amount=6.0), "The record was successfully updated.")
+                self.assertEqual(load_trusted.call_count, 3)
+
+            self.assertEqual(record.compact(), "The ledger was successfully compacted.")
+            self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+    def test_crash_in_group_commit(self):
+        """Test that balance totals and indexes do not count a write lost in an interrupted `group_commit` block."""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "data.json")
+            Record(File(filename)).add(10.0, "income", "2024-5-5", "Сохранено")
+
+            process = multiprocessing.Process(target=crash_in_group_commit, args=(filename,))
+            process.start()
+            process.join()
+
+            record = Record(File(filename))
+            self.assertEqual(record.get_balance(), ["Balance: 10.0", "Income: 10.0", "Expense: 0.0"])
+            self.assertEqual(len(record.get()), 1)
+
+            record.add(5.0, "expense", "2024-5-7", "Продукты")
+            self.assertEqual([line[:3] for line in record.get_by_key("category", "expense")], ["[1]"])
+            self.assertEqual(record.verify(), "The balance totals and indexes match the records.")
+
+    def test_concurrent_writers(self):
+        """Test that adds made by several processes at the same time are all kept."""
+        PROCESSES, RECORDS = 4, 20
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "data.json")
+            File(filename)
+
+            processes = [multiprocessing.Process(target=add_records, args=(filename, RECORDS)) for _ in range(PROCESSES)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+            self.assertEqual(len(Record(File(filename)).get()), PROCESSES * RECORDS)
+
+    @unittest.skipIf(fcntl is None, "fcntl is not available on this platform")
+    def test_interleaved_iterators(self):
+        """Test that the ledger stays locked until the last of two interleaved iterators is done, without blocking other threads."""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "data.json")
+            record = Record(File(filename))
+            for i in range(3):
+                record.add(float(i + 1), "income", "2024-5-5", f"Record {i}")
+
+            def locked_by_iterators() -> bool:
+                with open(f"{filename}.lock", 'ab') as f:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        return True
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                    return False
+
+            first, second = record.iter_records(), record.iter_records()
+            next(first)
+            next(second)
+
+            # Another thread reads while both iterators are half consumed.
+            reader = threading.Thread(target=record.get)
+            reader.start()
+            reader.join(timeout=5)
+            self.assertFalse(reader.is_alive())
+
+            # The first iterator is exhausted before the second one, which still holds the lock.
+            self.assertEqual(len(list(first)), 2)
+            self.assertTrue(locked_by_iterators())
+            self.assertEqual(len(list(second)), 2)
+            self.assertFalse(locked_by_iterators())
@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+import validator.batch
+from validator.batch import ValidatorBatch
+from validator.record import ValidatorRecord
+
+class TestValidatorBatch(unittest.TestCase):
+    """
+    Unit tests for the ValidatorBatch class, with and without NumPy.
+    """
+    def check_columns(self):
+        validator_batch = ValidatorBatch()
+
+        amounts = [10.0, -1.0, 5, "5.0", True, 0.0, 1.5]
+        categories = ["income", "expense", "gift", "income", "expense", None, "income"]
+        dates = ["2024-1-5", "2024-02-30", "2024-5-5", "5.5.2024", "2024-5-5", "2024-5-5", ["2024-5-5"]]
+        descriptions = ["", "a" * 500, "a" * 501, "ok", 5, "ok", "ok"]
+
+        self.assertEqual(validator_batch.invalid_amounts(amounts), [1, 2, 3, 4])
+        self.assertEqual(validator_batch.invalid_categories(categories), [2, 5])
+        self.assertEqual(validator_batch.invalid_dates(dates), [1, 3, 6])
+        self.assertEqual(validator_batch.invalid_descriptions(descriptions), [2, 4])
+        self.assertEqual(validator_batch.invalid_rows(amounts, categories, dates, descriptions), [1, 2, 3, 4, 5, 6])
+
+        # Columns of a single type take the vectorized paths.
+        self.assertEqual(validator_batch.invalid_amounts([1.0, -0.5, 0.0, -2.0]), [1, 3])
+        self.assertEqual(validator_batch.invalid_descriptions(["", "a" * 501, "b"]), [1])
+        self.assertEqual(validator_batch.invalid_categories(["income", "expense", "income"]), [])
+        self.assertEqual(validator_batch.invalid_rows([], [], [], []), [])
+
+        with self.assertRaises(ValueError):
+            validator_batch.invalid_rows([1.0], [], ["2024-1-1"], [""])
+
+    def test_invalid_rows(self):
+        """
+        Tests that `ValidatorBatch` finds the rows `EntityRecord` would reject.
+
+        Verifies:
+            - Every rule is checked, including the types of the values, with the pure-Python fallback.
+        """
+        with mock.patch.object(validator.batch, "numpy", None):
+            self.check_columns()
+
+    @unittest.skipIf(validator.batch.numpy is None, "NumPy is not installed")
+    def test_numpy_matches_python(self):
+        """
+        Tests that the NumPy paths of `ValidatorBatch` find the same rows as the pure-Python fallback.
+
+        Verifies:
+            - Columns of a single type, which take the vectorized paths, and mixed columns give the same errors.
+            - The description limit is the one of the record types.
+        """
+        self.check_columns()
+
+        limit = ValidatorRecord.MAX_DESCRIPTION_LENGTH
+        columns = (
+            [[1.0, -0.5, 0.0, -2.0, 3.25], [], [1.0, "2.0", -1.0]],
+            [["a" * limit, "a" * (limit + 1), "", "b"], [], ["ok", None, "a" * (limit + 1)]],
+        )
+        validator_batch = ValidatorBatch()
+
+        for check, values in zip((validator_batch.invalid_amounts, validator_batch.invalid_descriptions), columns):
+            for column in values:
+                with mock.patch.object(validator.batch, "numpy", None):
+                    expected = check(column)
+                self.assertEqual(check(column), expected)
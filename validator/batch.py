@@ -0,0 +1,94 @@
+from typing import Any, Callable, Sequence
+from validator.record import ValidatorRecord
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
+class ValidatorBatch:
+    """
+    Checks whole columns of records against the rules of `EntityRecord` at once: amounts are floats of at least 0,
+    categories are known, dates are valid and descriptions are strings of at most
+    `ValidatorRecord.MAX_DESCRIPTION_LENGTH` characters.
+
+    Nothing is built and no exception is raised per row. Amounts and description lengths are compared as NumPy
+    arrays when NumPy is installed and in a single loop otherwise. Categories and dates repeat a lot in a ledger,
+    so every distinct value is checked only once.
+    """
+
+    def __init__(self) -> None:
+        self.__validator_record = ValidatorRecord()
+
+    def invalid_rows(
+        self,
+        amounts: Sequence[Any],
+        categories: Sequence[Any],
+        dates: Sequence[Any],
+        descriptions: Sequence[Any]
+    ) -> list[int]:
+        """
+        Finds the rows with at least one value that `EntityRecord` would reject.
+
+        Args:
+            amounts (Sequence[Any]): The amount of every row.
+            categories (Sequence[Any]): The category of every row.
+            dates (Sequence[Any]): The date of every row.
+            descriptions (Sequence[Any]): The description of every row.
+
+        Returns:
+            list[int]: The indices of the invalid rows, in ascending order.
+        """
+        if not len(amounts) == len(categories) == len(dates) == len(descriptions):
+            raise ValueError("All columns must have the same number of rows.")
+
+        invalid: set[int] = set(self.invalid_amounts(amounts))
+        invalid.update(self.invalid_categories(categories))
+        invalid.update(self.invalid_dates(dates))
+        invalid.update(self.invalid_descriptions(descriptions))
+        return sorted(invalid)
+
+    def invalid_amounts(self, values: Sequence[Any]) -> list[int]:
+        if numpy is not None and values and set(map(type, values)) == {float}:
+            amounts = numpy.fromiter(values, dtype=numpy.float64, count=len(values))
+            return numpy.flatnonzero(amounts < 0.0).tolist()
+
+        return [idx for idx, value in enumerate(values) if not isinstance(value, float) or value < 0.0]
+
+    def invalid_categories(self, values: Sequence[Any]) -> list[int]:
+        return self.__invalid_strings(values, ValidatorRecord.CATEGORIES.__contains__)
+
+    def invalid_dates(self, values: Sequence[Any]) -> list[int]:
+        return self.__invalid_strings(values, self.__is_date)
+
+    def invalid_descriptions(self, values: Sequence[Any]) -> list[int]:
+        limit: int = ValidatorRecord.MAX_DESCRIPTION_LENGTH
+
+        if set(map(type, values)) <= {str}:
+            if numpy is not None and values:
+                lengths = numpy.fromiter(map(len, values), dtype=numpy.int64, count=len(values))
+                return numpy.flatnonzero(lengths > limit).tolist()
+            return [idx for idx, value in enumerate(values) if len(value) > limit]
+
+        return [idx for idx, value in enumerate(values) if not isinstance(value, str) or len(value) > limit]
+
+    def __is_date(self, value: str) -> bool:
+        try:
+            self.__validator_record.is_date(value)
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def __invalid_strings(values: Sequence[Any], is_valid: Callable[[str], bool]) -> list[int]:
+        """
+        Returns the indices of the values that are not strings accepted by `is_valid`, which is called once
+        per distinct string.
+        """
+        if set(map(type, values)) <= {str}:
+            rejected: set[str] = {value for value in set(values) if not is_valid(value)}
+            if not rejected:
+                return []
+            return [idx for idx, value in enumerate(values) if value in rejected]
+
+        return [idx for idx, value in enumerate(values) if not isinstance(value, str) or not is_valid(value)]